@@ -0,0 +1,76 @@
+"""Throughput and p99 latency of completions with micro-batching on and off.
+
+The simulated upstream admits a fixed number of concurrent calls; each call
+costs a fixed overhead plus a small per-prompt cost, which is the situation
+where ``complete_batch`` pays off. Run with ``python benchmarks/bench_batching.py``.
+"""
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from sheratan_core.batching import MicroBatcher  # noqa: E402
+
+TOTAL_REQUESTS = 2_000
+CALLERS = 256
+UPSTREAM_SLOTS = 8
+CALL_OVERHEAD_S = 0.020
+PER_PROMPT_S = 0.001
+
+
+class SimulatedUpstream:
+    def __init__(self) -> None:
+        self._slots = asyncio.Semaphore(UPSTREAM_SLOTS)
+
+    async def complete(self, req: Dict[str, Any]) -> Dict[str, Any]:
+        async with self._slots:
+            await asyncio.sleep(CALL_OVERHEAD_S + PER_PROMPT_S)
+        return {"model": req["model"], "output": "ok", "usage": {}}
+
+    async def complete_batch(self, reqs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        async with self._slots:
+            await asyncio.sleep(CALL_OVERHEAD_S + PER_PROMPT_S * len(reqs))
+        return [{"model": r["model"], "output": "ok", "usage": {}} for r in reqs]
+
+
+class UnbatchedUpstream(SimulatedUpstream):
+    complete_batch = None  # type: ignore[assignment]
+
+
+async def run(router: Any, batcher: MicroBatcher) -> tuple[float, float]:
+    latencies: List[float] = []
+    remaining = TOTAL_REQUESTS
+
+    async def caller() -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            await batcher.submit(router, {"model": "m", "prompt": "p", "max_tokens": 16})
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(caller() for _ in range(CALLERS)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    return TOTAL_REQUESTS / elapsed, p99
+
+
+def main() -> None:
+    print(f"{'mode':<12} {'req/s':>10} {'p99 ms':>10}")
+    for label, router, batcher in (
+        ("batching off", UnbatchedUpstream(), MicroBatcher()),
+        ("batching on", SimulatedUpstream(), MicroBatcher(max_batch_size=32, max_wait_ms=5)),
+    ):
+        rps, p99 = asyncio.run(run(router, batcher))
+        print(f"{label:<12} {rps:>10.0f} {p99 * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
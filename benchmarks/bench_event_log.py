@@ -0,0 +1,82 @@
+"""Append, scan and lookup throughput of the job event log on one core.
+
+Appends ``N`` ``RelayStatus`` events (spread over 1,000 jobs) through
+``append_status`` with the default 50 ms fsync batching, then with an
+fsync per event for comparison, and reports events per second including
+serialisation. Afterwards it scans the whole log through mmap and looks
+up the latest event and full history of random jobs.
+
+Run with ``python benchmarks/bench_event_log.py [events] [directory]``.
+Defaults to 200,000 events in a temporary directory; pass a directory on
+the target disk to measure its fsync cost.
+"""
+from __future__ import annotations
+
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from sheratan_core.eventlog import JobEventLog  # noqa: E402
+from sheratan_core.schemas import RelayStatus  # noqa: E402
+
+JOBS = 1_000
+FSYNC_EACH_EVENTS = 2_000
+LOOKUPS = 2_000
+
+
+def events(count: int) -> list[RelayStatus]:
+    return [
+        RelayStatus(job_id=f"job-{index % JOBS}", phase="running", progress=index % 100, ts="2025-01-01T00:00:00Z")
+        for index in range(count)
+    ]
+
+
+def append_rate(directory: Path, batch: list[RelayStatus], fsync_interval_ms: float) -> float:
+    log = JobEventLog(directory, fsync_interval_ms=fsync_interval_ms, segment_bytes=16 * 1024 * 1024)
+    start = time.perf_counter()
+    for event in batch:
+        log.append_status(event)
+    log.sync()
+    elapsed = time.perf_counter() - start
+    log.close()
+    return len(batch) / elapsed
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    root = Path(sys.argv[2]) if len(sys.argv) > 2 else Path(tempfile.mkdtemp(prefix="sheratan-events-"))
+    batch = events(count)
+
+    batched = append_rate(root / "batched", batch, 50)
+    print(f"append, fsync every 50 ms : {batched:>12,.0f} events/s ({count:,} events)")
+    per_event = append_rate(root / "per-event", batch[:FSYNC_EACH_EVENTS], 0)
+    print(f"append, fsync per event   : {per_event:>12,.0f} events/s ({FSYNC_EACH_EVENTS:,} events)")
+
+    start = time.perf_counter()
+    log = JobEventLog(root / "batched", fsync_interval_ms=0)
+    print(f"reopen + index rebuild    : {(time.perf_counter() - start) * 1e3:>12.1f} ms ({len(log):,} jobs)")
+
+    start = time.perf_counter()
+    scanned = sum(1 for _ in log.scan())
+    print(f"mmap scan                 : {scanned / (time.perf_counter() - start):>12,.0f} events/s")
+
+    jobs = [f"job-{random.randrange(JOBS)}" for _ in range(LOOKUPS)]
+    start = time.perf_counter()
+    for job_id in jobs:
+        log.latest(job_id)
+    print(f"latest(job_id)            : {(time.perf_counter() - start) / LOOKUPS * 1e6:>12.1f} us")
+
+    start = time.perf_counter()
+    for job_id in jobs[:20]:
+        log.events_for(job_id)
+    print(f"events_for(job_id)        : {(time.perf_counter() - start) / 20 * 1e3:>12.1f} ms "
+          f"({count // JOBS} events per job, interleaved)")
+    log.close()
+
+
+if __name__ == "__main__":
+    main()
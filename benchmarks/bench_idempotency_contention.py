@@ -0,0 +1,59 @@
+"""Reservation throughput of the single-lock vs. sharded in-memory store.
+
+Each thread reserves its own stream of keys; the total number of calls is
+fixed so the numbers are comparable across thread counts. On a GIL build
+the gain from sharding is limited to less lock hand-off; on free-threaded
+CPython the shards can run truly in parallel.
+
+Run with ``python benchmarks/bench_idempotency_contention.py``.
+"""
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from sheratan_core.orchestrator import (  # noqa: E402
+    InMemoryIdempotencyStore,
+    ShardedIdempotencyStore,
+)
+
+TOTAL_CALLS = 320_000
+THREADS = (1, 2, 4, 8, 16, 32)
+MAX_ENTRIES = 100_000
+
+
+def run(store, threads: int) -> float:
+    per_thread = TOTAL_CALLS // threads
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(worker_id: int) -> None:
+        barrier.wait()
+        for index in range(per_thread):
+            store.reserve(f"{worker_id}-{index}", "fp", 1_000 + index // 1_000)
+
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for thread in pool:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in pool:
+        thread.join()
+    return per_thread * threads / (time.perf_counter() - start)
+
+
+def main() -> None:
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"GIL enabled: {gil}")
+    print(f"{'threads':>8} {'single ops/s':>14} {'sharded ops/s':>14}")
+    for threads in THREADS:
+        single = run(InMemoryIdempotencyStore(ttl_seconds=60, max_entries=MAX_ENTRIES), threads)
+        sharded = run(ShardedIdempotencyStore(ttl_seconds=60, max_entries=MAX_ENTRIES, shards=16), threads)
+        print(f"{threads:>8} {single:>14,.0f} {sharded:>14,.0f}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Per-call cost of ``InMemoryIdempotencyStore.reserve`` as the store grows.
+
+The store is filled with one entry per second of TTL, so in steady state
+every call expires exactly one old entry and inserts one new entry. The cost
+per call should stay flat from 1k to 10M entries. The old full-scan expiry
+is included up to 100k entries for comparison.
+
+Run with ``python benchmarks/bench_idempotency_expiry.py [max_entries]``.
+The default stops at 1M; pass ``10000000`` for the full run (needs several
+GB of RAM).
+"""
+from __future__ import annotations
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from sheratan_core.orchestrator import InMemoryIdempotencyStore  # noqa: E402
+
+SIZES = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+CALLS = 20_000
+LEGACY_MAX_SIZE = 100_000
+
+
+class FullScanStore(InMemoryIdempotencyStore):
+    """The previous expiry strategy: scan every entry on every reserve."""
+
+    def _evict_expired(self, cutoff: int) -> None:
+        keys_to_delete = [k for k, (_, ts) in self._entries.items() if ts < cutoff]
+        for key in keys_to_delete:
+            self._entries.pop(key, None)
+
+
+def fill(store: InMemoryIdempotencyStore, size: int) -> None:
+    for index in range(size):
+        store.reserve(f"key-{index}", "fp", index + 1)
+
+
+def per_call_us(store: InMemoryIdempotencyStore, size: int, calls: int) -> float:
+    start = time.perf_counter()
+    for index in range(calls):
+        store.reserve(f"new-{index}", "fp", size + index + 1)
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main() -> None:
+    limit = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"{'entries':>12} {'heap us/call':>14} {'scan us/call':>14}")
+    for size in (s for s in SIZES if s <= limit):
+        store = InMemoryIdempotencyStore(ttl_seconds=size, max_entries=2 * size)
+        fill(store, size)
+        heap_us = per_call_us(store, size, CALLS)
+        del store
+
+        scan = "-"
+        if size <= LEGACY_MAX_SIZE:
+            legacy = FullScanStore(ttl_seconds=size, max_entries=2 * size)
+            fill(legacy, size)
+            calls = max(50, CALLS * 1_000 // size)
+            scan = f"{per_call_us(legacy, size, calls):.2f}"
+        print(f"{size:>12,} {heap_us:>14.2f} {scan:>14}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Resident memory per idempotency entry: compact store vs in-memory store.
+
+Each store is filled with ``N`` distinct 36-character keys (UUID-like,
+as relay callbacks send them) in a fresh child process, and the growth of
+the resident set size is divided by ``N``. Insert throughput is reported
+alongside. The in-memory store is skipped above 1M keys unless
+``--all`` is given, since at 10M it needs several GB of RAM.
+
+Run with ``python benchmarks/bench_idempotency_memory.py [max_entries] [--all]``.
+The default measures 1M and 10M keys.
+"""
+from __future__ import annotations
+
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from sheratan_core.orchestrator import (  # noqa: E402
+    CompactIdempotencyStore,
+    InMemoryIdempotencyStore,
+)
+
+SIZES = (1_000_000, 10_000_000)
+INMEMORY_MAX_SIZE = 1_000_000
+STORES = {"compact": CompactIdempotencyStore, "inmemory": InMemoryIdempotencyStore}
+
+
+def rss_bytes() -> int:
+    with open("/proc/self/statm") as handle:
+        return int(handle.read().split()[1]) * 4096
+
+
+def measure(kind: str, size: int) -> None:
+    fingerprint = "f" * 64
+    before = rss_bytes()
+    store = STORES[kind](ttl_seconds=3_600, max_entries=size)
+    start = time.perf_counter()
+    for index in range(size):
+        store.reserve(f"{index:08x}-0000-4000-8000-000000000000", fingerprint, 1_000)
+    elapsed = time.perf_counter() - start
+    used = rss_bytes() - before
+    print(f"{used / size:.1f} {elapsed / size * 1e6:.2f}")
+
+
+def main() -> None:
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        measure(sys.argv[2], int(sys.argv[3]))
+        return
+    args = [arg for arg in sys.argv[1:] if arg != "--all"]
+    limit = int(args[0]) if args else SIZES[-1]
+    include_all = "--all" in sys.argv
+    print(f"{'store':>10} {'entries':>12} {'bytes/entry':>12} {'us/reserve':>11}")
+    for size in (s for s in SIZES if s <= limit):
+        for kind in STORES:
+            if kind == "inmemory" and size > INMEMORY_MAX_SIZE and not include_all:
+                continue
+            result = subprocess.run(
+                [sys.executable, __file__, "--child", kind, str(size)],
+                check=True,
+                capture_output=True,
+                text=True,
+            )
+            per_entry, per_call = result.stdout.split()
+            print(f"{kind:>10} {size:>12,} {float(per_entry):>12.1f} {float(per_call):>11.2f}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
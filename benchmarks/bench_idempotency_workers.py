@@ -0,0 +1,98 @@
+"""Cross-process idempotency throughput: shared memory vs. SQLite.
+
+Simulates ``uvicorn --workers N``: N processes reserve keys against one
+shared backend. A fifth of the keys are reserved by two workers, so the
+backend has to detect cross-worker duplicates. The table reports aggregate
+reservations per second and checks that every duplicate was caught.
+SQLite runs with per-call commits; group commit needs concurrent callers
+inside one process, which these single-threaded workers do not have.
+
+Run with ``python benchmarks/bench_idempotency_workers.py``.
+"""
+from __future__ import annotations
+
+import multiprocessing
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+SRC = str(Path(__file__).resolve().parents[1] / "src")
+sys.path.insert(0, SRC)
+
+from sheratan_core.orchestrator import (  # noqa: E402
+    SharedMemoryIdempotencyStore,
+    SQLiteIdempotencyStore,
+)
+
+WORKERS = (4, 16)
+CALLS_PER_WORKER = 5_000
+DUPLICATE_EVERY = 5
+
+
+def make_store(backend: str, target: str):
+    if backend == "shm":
+        return SharedMemoryIdempotencyStore(target, ttl_seconds=900, slots=1 << 18)
+    return SQLiteIdempotencyStore(Path(target), ttl_seconds=900, purge_interval_s=0)
+
+
+def worker(backend: str, target: str, worker_id: int, workers: int, start, results) -> None:
+    sys.path.insert(0, SRC)
+    store = make_store(backend, target)
+    start.wait()
+    began = time.perf_counter()
+    created = 0
+    for index in range(CALLS_PER_WORKER):
+        if index % DUPLICATE_EVERY == 0:
+            # Workers 2k and 2k+1 reserve the same key.
+            key = f"dup-{worker_id // 2}-{index}"
+        else:
+            key = f"{worker_id}-{index}"
+        created += store.reserve(key, "fp", 1_000).created
+    results.put((time.perf_counter() - began, created))
+    store.close()
+
+
+def run(backend: str, workers: int) -> tuple[float, bool]:
+    ctx = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        if backend == "shm":
+            target = f"sheratan_bench_{uuid.uuid4().hex[:12]}"
+            owner = make_store(backend, target)
+        else:
+            target = str(Path(tmp) / "idem.sqlite")
+            owner = make_store(backend, target)
+        start = ctx.Event()
+        results = ctx.Queue()
+        procs = [
+            ctx.Process(target=worker, args=(backend, target, n, workers, start, results))
+            for n in range(workers)
+        ]
+        for proc in procs:
+            proc.start()
+        time.sleep(1.0 + 0.2 * workers)  # let every worker import and open the store
+        start.set()
+        outcomes = [results.get() for _ in procs]
+        for proc in procs:
+            proc.join()
+        owner.close()
+        if backend == "shm":
+            owner.unlink()
+    elapsed = max(seconds for seconds, _ in outcomes)
+    created = sum(count for _, count in outcomes)
+    duplicates = workers // 2 * len(range(0, CALLS_PER_WORKER, DUPLICATE_EVERY))
+    expected = workers * CALLS_PER_WORKER - duplicates
+    return workers * CALLS_PER_WORKER / elapsed, created == expected
+
+
+def main() -> None:
+    print(f"{'backend':<14} {'workers':>8} {'reserve/s':>12} {'dupes ok':>9}")
+    for workers in WORKERS:
+        for backend in ("shm", "sqlite"):
+            rps, ok = run(backend, workers)
+            print(f"{backend:<14} {workers:>8} {rps:>12,.0f} {str(ok):>9}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Per-request overhead of the API metrics middleware.
+
+Calls a minimal FastAPI app with one parameterised route directly through
+ASGI (no server, no HTTP client) in three setups: without middleware,
+wrapped in ``ApiMetricsMiddleware``, and wrapped in the previous
+``BaseHTTPMiddleware`` implementation, which is reproduced here for
+comparison. The difference to the bare app is the middleware's cost.
+
+Run with ``python benchmarks/bench_metrics_middleware.py [requests]``.
+"""
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from fastapi import FastAPI  # noqa: E402
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+
+from sheratan_core.metrics import (  # noqa: E402
+    METRICS_ENABLED,
+    REQUEST_DURATION,
+    REQUEST_ERRORS,
+    ApiMetricsMiddleware,
+)
+
+
+class DispatchMetricsMiddleware(BaseHTTPMiddleware):
+    """The former ``dispatch``-based implementation."""
+
+    async def dispatch(self, request, call_next):
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            route = request.scope.get("route")
+            labels = (request.method, getattr(route, "path", None) or request.url.path, str(status))
+            REQUEST_DURATION.labels(*labels).observe(time.perf_counter() - start)
+            if status >= 400:
+                REQUEST_ERRORS.labels(*labels).inc()
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: str) -> dict:
+        return {"id": item_id}
+
+    return app
+
+
+async def run(app, count: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        return None
+
+    def scope(index: int) -> dict:
+        path = f"/items/{index % 1000}"
+        return {
+            "type": "http",
+            "http_version": "1.1",
+            "method": "GET",
+            "path": path,
+            "raw_path": path.encode(),
+            "root_path": "",
+            "scheme": "http",
+            "query_string": b"",
+            "headers": [],
+            "client": ("127.0.0.1", 1),
+            "server": ("bench", 80),
+        }
+
+    for index in range(200):
+        await app(scope(index), receive, send)
+    start = time.perf_counter_ns()
+    for index in range(count):
+        await app(scope(index), receive, send)
+    return (time.perf_counter_ns() - start) / count / 1000
+
+
+async def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    if not METRICS_ENABLED:
+        print("metrics are disabled (prometheus_client missing or SHERATAN_METRICS_ENABLED=0)")
+        return
+    bare = await run(build_app(), count)
+    pure = await run(ApiMetricsMiddleware(build_app()), count)
+    dispatch = await run(DispatchMetricsMiddleware(build_app()), count)
+    print(f"{'setup':>28} {'us/request':>11} {'overhead':>9}")
+    print(f"{'no middleware':>28} {bare:>11.2f} {'':>9}")
+    print(f"{'ApiMetricsMiddleware':>28} {pure:>11.2f} {pure - bare:>9.2f}")
+    print(f"{'BaseHTTPMiddleware dispatch':>28} {dispatch:>11.2f} {dispatch - bare:>9.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,84 @@
+"""Per-event cost of ``/relay/status`` versus ``/relay/batch``.
+
+Posts ``RelayStatus`` events through the full ASGI app (middleware,
+validation, HMAC check, idempotency reservation, job index) with an
+in-process ``httpx.ASGITransport``: once one request per event, then as
+NDJSON batches. There is no TCP or TLS in this setup, so real deployments
+save more per event than shown here.
+
+Run with ``python benchmarks/bench_relay_batch.py [events] [batch_size]``.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+os.environ.setdefault("SHERATAN_HMAC_SECRET", "bench-secret")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import httpx  # noqa: E402
+
+from sheratan_core import api  # noqa: E402
+from sheratan_core.security import IDEMPOTENCY_HEADER, SIGNATURE_HEADER, TIMESTAMP_HEADER  # noqa: E402
+
+SECRET = os.environ["SHERATAN_HMAC_SECRET"].encode("utf-8")
+
+
+def signed(body: bytes, key: str) -> dict[str, str]:
+    timestamp = str(int(time.time()))
+    message = b"|".join([timestamp.encode("utf-8"), key.encode("utf-8"), body])
+    return {
+        TIMESTAMP_HEADER: timestamp,
+        IDEMPOTENCY_HEADER: key,
+        SIGNATURE_HEADER: hmac.new(SECRET, message, hashlib.sha256).hexdigest(),
+        "content-type": "application/json",
+    }
+
+
+def event(index: int) -> dict:
+    return {"job_id": f"job-{index % 500}", "phase": "running", "progress": index % 100}
+
+
+async def singles(client: httpx.AsyncClient, count: int) -> float:
+    start = time.perf_counter()
+    for index in range(count):
+        body = json.dumps(event(index)).encode("utf-8")
+        response = await client.post("/relay/status", content=body, headers=signed(body, f"single-{index}"))
+        assert response.status_code == 200, response.text
+    return time.perf_counter() - start
+
+
+async def batches(client: httpx.AsyncClient, count: int, size: int) -> float:
+    start = time.perf_counter()
+    for first in range(0, count, size):
+        body = b"\n".join(
+            json.dumps({"type": "status", "idempotency_key": f"batch-{i}", "event": event(i)}).encode("utf-8")
+            for i in range(first, min(count, first + size))
+        )
+        response = await client.post("/relay/batch", content=body, headers=signed(body, f"batch-request-{first}"))
+        assert response.status_code == 200 and response.json()["accepted"] == min(size, count - first)
+    return time.perf_counter() - start
+
+
+async def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    api._reset_hmac_state()
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        single_s = await singles(client, count)
+        batch_s = await batches(client, count * 4, size)
+    print(f"{'mode':>22} {'events/s':>10} {'us/event':>10}")
+    print(f"{'single /relay/status':>22} {count / single_s:>10,.0f} {single_s / count * 1e6:>10.1f}")
+    label = f"batch of {size}"
+    print(f"{label:>22} {count * 4 / batch_s:>10,.0f} {batch_s / (count * 4) * 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
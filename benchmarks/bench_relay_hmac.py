@@ -0,0 +1,78 @@
+"""Cost of verifying a relay signature: per-call keying versus the keyring.
+
+``per-call`` is the previous route path: ``hmac.new`` with the secret on
+every request over ``timestamp|idempotency|body`` joined into one buffer,
+then a second pass over the body for the idempotency fingerprint.
+``keyring`` copies a pre-keyed state and feeds it the body chunk by chunk
+together with the fingerprint, as ``RelaySignatureMiddleware`` does.
+``keyring, 2 secrets`` is an unnamed request during a rotation, which is
+checked against the ``default`` secret only and should cost the same.
+
+Run with ``python benchmarks/bench_relay_hmac.py [iterations]``.
+"""
+from __future__ import annotations
+
+import hashlib
+import hmac
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from sheratan_core.security import HmacKeyring, body_fingerprint  # noqa: E402
+
+SECRET = "bench-secret"
+TIMESTAMP = "1750000000"
+IDEMPOTENCY = "bench-key"
+CHUNK = 64 * 1024
+
+
+def per_call(chunks: list[bytes], signature: str) -> None:
+    body = b"".join(chunks)
+    message = b"|".join([TIMESTAMP.encode("utf-8"), IDEMPOTENCY.encode("utf-8"), body])
+    expected = hmac.new(SECRET.encode("utf-8"), message, hashlib.sha256).hexdigest()
+    assert hmac.compare_digest(expected, signature)
+    body_fingerprint(body)
+
+
+def keyring_path(keyring: HmacKeyring, key_id: str | None):
+    def verify(chunks: list[bytes], signature: str) -> None:
+        pending = keyring.start(TIMESTAMP, IDEMPOTENCY, key_id)
+        fingerprint = hashlib.sha256()
+        for chunk in chunks:
+            pending.update(chunk)
+            fingerprint.update(chunk)
+        assert pending.verify(signature) is not None
+        fingerprint.hexdigest()
+
+    return verify
+
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    single = HmacKeyring({"default": SECRET})
+    rotating = HmacKeyring({"default": SECRET, "next": "next-secret"})
+    variants = {
+        "per-call": per_call,
+        "keyring": keyring_path(single, "default"),
+        "keyring, 2 secrets": keyring_path(rotating, None),
+    }
+    print(f"{'body':>8} {'variant':>20} {'us/request':>11}")
+    for size in (256, 4 * 1024, 64 * 1024, 1024 * 1024):
+        body = b"x" * size
+        chunks = [body[i : i + CHUNK] for i in range(0, size, CHUNK)]
+        expected = hmac.new(
+            SECRET.encode("utf-8"), b"|".join([TIMESTAMP.encode(), IDEMPOTENCY.encode(), body]), hashlib.sha256
+        ).hexdigest()
+        rounds = max(20, iterations * 256 // size)
+        for name, verify in variants.items():
+            start = time.perf_counter()
+            for _ in range(rounds):
+                verify(chunks, expected)
+            elapsed = time.perf_counter() - start
+            print(f"{size:>8} {name:>20} {elapsed / rounds * 1e6:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Requests/sec against a local stub router: pooled ``AsyncRouterClient`` vs. a client per call.
+
+Starts a minimal ASGI stub on 127.0.0.1 via uvicorn in a child process and drives it at 1, 64 and
+512 concurrent callers. Run with ``python benchmarks/bench_router_client.py``.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import socket
+import sys
+import multiprocessing
+import time
+from pathlib import Path
+
+import httpx
+import uvicorn
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from sheratan_core.router_client import AsyncRouterClient, RouterClientConfig  # noqa: E402
+
+REQUESTS_PER_LEVEL = 1_000
+CONCURRENCY_LEVELS = (1, 64, 512)
+RESPONSE = json.dumps({"model": "stub", "output": "ok", "usage": {}}).encode()
+
+
+async def stub_app(scope, receive, send):  # type: ignore[no-untyped-def]
+    if scope["type"] != "http":
+        return
+    more = True
+    while more:
+        message = await receive()
+        more = message.get("more_body", False)
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": RESPONSE})
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _serve(port: int) -> None:
+    uvicorn.run(stub_app, host="127.0.0.1", port=port, log_level="error", backlog=4096)
+
+
+def start_stub() -> tuple[multiprocessing.Process, str]:
+    port = _free_port()
+    server = multiprocessing.Process(target=_serve, args=(port,), daemon=True)
+    server.start()
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            break
+        except OSError:
+            time.sleep(0.05)
+    return server, f"http://127.0.0.1:{port}"
+
+
+async def drive(call, concurrency: int, total: int) -> float:  # type: ignore[no-untyped-def]
+    remaining = total
+
+    async def worker() -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            await call()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return total / (time.perf_counter() - start)
+
+
+async def bench(base_url: str) -> None:
+    config = RouterClientConfig(
+        base_url=base_url, timeout_s=60.0, max_connections=64, max_keepalive_connections=64
+    )
+    print(f"{'callers':>8} {'pooled req/s':>14} {'per-call req/s':>16}")
+    for concurrency in CONCURRENCY_LEVELS:
+        async with AsyncRouterClient(config=config) as pooled:
+            pooled_rps = await drive(lambda: pooled.complete("hi"), concurrency, REQUESTS_PER_LEVEL)
+
+        async def fresh_client() -> None:
+            async with httpx.AsyncClient(base_url=base_url, timeout=60.0) as client:
+                r = await client.post("/complete", json={"prompt": "hi", "max_tokens": 128})
+                r.raise_for_status()
+
+        fresh_rps = await drive(fresh_client, concurrency, REQUESTS_PER_LEVEL)
+        print(f"{concurrency:>8} {pooled_rps:>14.0f} {fresh_rps:>16.0f}", flush=True)
+
+
+def main() -> None:
+    server, base_url = start_stub()
+    try:
+        asyncio.run(bench(base_url))
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
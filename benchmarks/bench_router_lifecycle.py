@@ -0,0 +1,69 @@
+"""Per-request router acquisition cost: ``load_router()`` vs. ``RouterManager.lease()``.
+
+Run with ``python benchmarks/bench_router_lifecycle.py``.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from sheratan_core.config import reload_settings  # noqa: E402
+from sheratan_core.registry import RouterManager, load_router  # noqa: E402
+
+ITERATIONS = 20_000
+
+
+class BenchRouter:
+    """Router whose constructor allocates a little state, like a real client pool."""
+
+    def __init__(self) -> None:
+        self.pool = [bytearray(256) for _ in range(16)]
+
+    def name(self) -> str:
+        return "bench"
+
+
+def create_router() -> BenchRouter:
+    return BenchRouter()
+
+
+def bench_load_router(iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        load_router()
+    return (time.perf_counter() - start) / iterations
+
+
+def bench_manager(iterations: int) -> float:
+    manager = RouterManager()
+
+    async def run() -> float:
+        await manager.start()
+        start = time.perf_counter()
+        for _ in range(iterations):
+            async with manager.lease():
+                pass
+        elapsed = time.perf_counter() - start
+        await manager.aclose()
+        return elapsed / iterations
+
+    return asyncio.run(run())
+
+
+def main() -> None:
+    os.environ["SHERATAN_ROUTER"] = "__main__:create_router"
+    reload_settings()
+    before = bench_load_router(ITERATIONS)
+    after = bench_manager(ITERATIONS)
+    print(f"load_router() per request:         {before * 1e6:9.2f} us")
+    print(f"RouterManager.lease() per request: {after * 1e6:9.2f} us")
+    print(f"speedup:                           {before / after:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Overhead of the per-router metrics wrapper around ``complete()``/``stream()``.
+
+Calls a router that answers immediately (with a ``usage`` block) directly
+and through ``InstrumentedRouter``, so the difference is the cost of the
+latency, token and tokens-per-second observations per call.
+
+Run with ``python benchmarks/bench_router_metrics.py [calls]``.
+"""
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from sheratan_core.metrics import METRICS_ENABLED  # noqa: E402
+from sheratan_core.router_metrics import InstrumentedRouter  # noqa: E402
+
+
+class InstantRouter:
+    def name(self) -> str:
+        return "bench"
+
+    async def complete(self, req):
+        return {"model": req["model"], "output": "ok", "usage": {"prompt_tokens": 12, "completion_tokens": 48}}
+
+    async def stream(self, req):
+        for index in range(7):
+            yield {"delta": "x"}
+        yield {"delta": "", "usage": {"prompt_tokens": 12, "completion_tokens": 48}}
+
+
+async def per_call(router, count: int, streaming: bool) -> float:
+    req = {"model": "gpt-4o-mini", "prompt": "hi"}
+    start = time.perf_counter_ns()
+    for _ in range(count):
+        if streaming:
+            async for _chunk in router.stream(req):
+                pass
+        else:
+            await router.complete(req)
+    return (time.perf_counter_ns() - start) / count / 1000
+
+
+async def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    if not METRICS_ENABLED:
+        print("metrics are disabled (prometheus_client missing or SHERATAN_METRICS_ENABLED=0)")
+        return
+    bare, wrapped = InstantRouter(), InstrumentedRouter(InstantRouter())
+    print(f"{'call':>20} {'bare us':>9} {'wrapped us':>11} {'overhead':>9}")
+    for label, streaming in (("complete", False), ("stream (8 chunks)", True)):
+        plain = await per_call(bare, count, streaming)
+        instrumented = await per_call(wrapped, count, streaming)
+        print(f"{label:>20} {plain:>9.2f} {instrumented:>11.2f} {instrumented - plain:>9.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -2,15 +2,16 @@ from fastapi import FastAPI, HTTPException, Request
 from pydantic import BaseModel, Field
 from typing import Optional, Dict, Any
 from .registry import load_router
-from .security import verify_hmac
+from .security import HMAC_SCOPE_KEY, HmacMiddleware, verify_hmac
 from .idempotency import get_store
 from .metrics import metrics_endpoint, TimingMiddleware, ENABLED as METRICS_ENABLED
 from fastapi import Body, HTTPException
 from .router_client import RouterClient
 
 app = FastAPI(title="Sheratan Core", version="1.1.0")
+app.add_middleware(HmacMiddleware)
 if METRICS_ENABLED:
-    app.middleware("http")(TimingMiddleware(app))
+    app.add_middleware(TimingMiddleware)
 
 class CompleteRequest(BaseModel):
     model: str = Field(default="gpt-4o-mini")
@@ -84,11 +85,13 @@ class RelayFinal(BaseModel):
 _store = get_store()
 
 async def _guard(request: Request, idem_key: Optional[str]) -> None:
-    # HMAC verification
-    ts = request.headers.get("X-Sheratan-Timestamp", "")
-    sig = request.headers.get("X-Sheratan-Signature", "")
-    body = await request.body()
-    ok, why = verify_hmac(ts, sig, body)
+    # HMAC verification: HmacMiddleware already hashed the body as it arrived
+    verdict = request.scope.get(HMAC_SCOPE_KEY)
+    if verdict is None:
+        ts = request.headers.get("X-Sheratan-Timestamp", "")
+        sig = request.headers.get("X-Sheratan-Signature", "")
+        verdict = verify_hmac(ts, sig, await request.body())
+    ok, why = verdict
     if not ok:
         raise HTTPException(status_code=401, detail=f"hmac-{why}")
     # Idempotency
@@ -1,5 +1,6 @@
 from __future__ import annotations
 import os, sqlite3, threading, time
+from collections import OrderedDict
 from typing import Optional
 
 _BACKEND = os.getenv("SHERATAN_IDEMP_BACKEND", "mem").lower()
@@ -10,23 +11,25 @@ class MemStore:
     def __init__(self, ttl=_TTL_SEC, max_size=5000):
         self.ttl = ttl
         self.max = max_size
-        self.data = {}
+        # insertion order == time order, so the oldest entry is always first
+        self.data = OrderedDict()
         self.lock = threading.Lock()
 
     def put_once(self, key: str) -> bool:
-        now = time.time()
+        now = time.monotonic()
         with self.lock:
-            # purge
-            for k, (ts, _) in list(self.data.items()):
-                if now - ts > self.ttl:
-                    self.data.pop(k, None)
+            # purge only the expired prefix
+            while self.data:
+                ts = next(iter(self.data.values()))
+                if now - ts <= self.ttl:
+                    break
+                self.data.popitem(last=False)
             if key in self.data:
                 return False
             if len(self.data) >= self.max:
                 # drop oldest
-                oldest = sorted(self.data.items(), key=lambda kv: kv[1][0])[0][0]
-                self.data.pop(oldest, None)
-            self.data[key] = (now, True)
+                self.data.popitem(last=False)
+            self.data[key] = now
             return True
 
 class SqliteStore:
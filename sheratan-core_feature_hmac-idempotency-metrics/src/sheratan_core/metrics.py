@@ -6,21 +6,41 @@ REQ_LATENCY = Histogram("sheratan_req_latency_seconds", "Request latency", ["pat
 REQ_COUNT   = Counter("sheratan_req_total", "Request count", ["path","method","status"])
 
 ENABLED = os.getenv("SHERATAN_METRICS_ENABLED", "true").lower() == "true"
+MAX_UNMATCHED_PATHS = int(os.getenv("SHERATAN_METRICS_MAX_UNMATCHED_PATHS", "50"))
+UNMATCHED_PATH_LABEL = "__unmatched__"
 
 def metrics_endpoint():
     return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
 
 class TimingMiddleware:
-    def __init__(self, app):
+    """Time requests per route template, not per raw path.
+
+    Unmatched paths keep their own label for the first ``max_unmatched_paths``
+    distinct values and share ``__unmatched__`` afterwards, so scanners
+    cannot grow the series count without bound.
+    """
+    def __init__(self, app, max_unmatched_paths=MAX_UNMATCHED_PATHS):
         self.app = app
+        self.max_unmatched_paths = max_unmatched_paths
+        self.unmatched_paths = set()
+    def path_label(self, scope):
+        path = getattr(scope.get("route"), "path", None)
+        if path:
+            return path
+        path = scope["path"]
+        if path in self.unmatched_paths:
+            return path
+        if len(self.unmatched_paths) < self.max_unmatched_paths:
+            self.unmatched_paths.add(path)
+            return path
+        return UNMATCHED_PATH_LABEL
     async def __call__(self, scope, receive, send):
         if scope["type"] != "http":
             await self.app(scope, receive, send)
             return
-        start = time.time()
+        start = time.perf_counter()
         method = scope["method"]
-        path = scope["path"]
-        status_holder = {"code": "200"}
+        status_holder = {"code": "500"}
         async def send_wrapper(message):
             if message["type"] == "http.response.start":
                 status_holder["code"] = str(message["status"])
@@ -28,7 +48,9 @@ class TimingMiddleware:
         try:
             await self.app(scope, receive, send_wrapper)
         finally:
-            dur = time.time() - start
+            dur = time.perf_counter() - start
             if ENABLED:
+                # The router stored the matched route in the scope on the way in.
+                path = self.path_label(scope)
                 REQ_LATENCY.labels(path, method, status_holder["code"]).observe(dur)
                 REQ_COUNT.labels(path, method, status_holder["code"]).inc()
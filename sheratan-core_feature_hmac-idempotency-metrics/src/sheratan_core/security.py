@@ -1,12 +1,17 @@
 from __future__ import annotations
 import hmac, hashlib, os, time
-from typing import Tuple
+from typing import Optional, Tuple
 
 SKEW = int(os.getenv("SHERATAN_HMAC_SKEW_SEC", "300"))
 SECRET = os.getenv("SHERATAN_HMAC_SECRET", "")
+HMAC_SCOPE_KEY = "sheratan.hmac"
+SIGNED_PATHS = ("/relay/status", "/relay/final")
 
-def verify_hmac(ts: str, signature: str, body_bytes: bytes) -> Tuple[bool,str]:
-    if not SECRET:
+# Keyed once; every request starts from a copy() instead of re-keying.
+_KEYED = hmac.new(SECRET.encode(), digestmod=hashlib.sha256) if SECRET else None
+
+def check_timestamp(ts: str) -> Tuple[bool,str]:
+    if _KEYED is None:
         return False, "secret-missing"
     try:
         t = int(ts)
@@ -15,11 +20,71 @@ def verify_hmac(ts: str, signature: str, body_bytes: bytes) -> Tuple[bool,str]:
     now = int(time.time())
     if abs(now - t) > SKEW:
         return False, "timestamp-skew"
-    msg = ts.encode() + b"." + body_bytes
-    expected = hmac.new(SECRET.encode(), msg, hashlib.sha256).hexdigest()
+    return True, "ok"
+
+def start_hmac(ts: str) -> "hmac.HMAC":
+    """Pre-keyed state fed with ``ts.``; ``update()`` it with the body chunks."""
+    assert _KEYED is not None
+    state = _KEYED.copy()
+    state.update(ts.encode())
+    state.update(b".")
+    return state
+
+def check_signature(state: "hmac.HMAC", signature: str) -> Tuple[bool,str]:
     if not signature.startswith("sha256="):
         return False, "signature-format"
     provided = signature.split("=",1)[1]
-    if not hmac.compare_digest(expected, provided):
+    if not hmac.compare_digest(state.hexdigest(), provided):
         return False, "signature-mismatch"
     return True, "ok"
+
+def verify_hmac(ts: str, signature: str, body_bytes: bytes) -> Tuple[bool,str]:
+    ok, why = check_timestamp(ts)
+    if not ok:
+        return ok, why
+    state = start_hmac(ts)
+    state.update(body_bytes)
+    return check_signature(state, signature)
+
+class HmacMiddleware:
+    """Verify relay signatures while the body streams in (pure ASGI).
+
+    Each chunk feeds the HMAC state; the verdict is stored in
+    ``scope["sheratan.hmac"]`` and the buffered body is handed to the route
+    as one message, so ``_guard`` neither reads nor hashes it again.
+    """
+    def __init__(self, app, paths=SIGNED_PATHS):
+        self.app = app
+        self.paths = frozenset(paths)
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+        headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope["headers"]}
+        ts = headers.get("x-sheratan-timestamp", "")
+        ok, why = check_timestamp(ts)
+        state: Optional["hmac.HMAC"] = start_hmac(ts) if ok else None
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunk = message.get("body", b"")
+            if chunk:
+                if state is not None:
+                    state.update(chunk)
+                chunks.append(chunk)
+            if not message.get("more_body", False):
+                break
+        if state is not None:
+            ok, why = check_signature(state, headers.get("x-sheratan-signature", ""))
+        scope[HMAC_SCOPE_KEY] = (ok, why)
+        body = b"".join(chunks)
+        handed_over = False
+        async def buffered_receive():
+            nonlocal handed_over
+            if handed_over:
+                return await receive()
+            handed_over = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await self.app(scope, buffered_receive, send)
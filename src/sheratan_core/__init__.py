@@ -1,5 +1,5 @@
 """Sheratan Core package initialization."""
-from .config import get_settings, is_feature_enabled, load_environment
+from .config import get_settings, is_feature_enabled, load_environment, reload_settings
 
 # Ensure the configured profile is loaded as soon as the package is imported.
 load_environment()
@@ -8,4 +8,5 @@ __all__ = [
     "get_settings",
     "is_feature_enabled",
     "load_environment",
+    "reload_settings",
 ]
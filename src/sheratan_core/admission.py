@@ -0,0 +1,274 @@
+"""Tenant- and priority-aware admission control in front of the router."""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from .config import is_feature_enabled
+from .metrics import counter, gauge, histogram
+
+ADMISSION_FEATURE_FLAG = "admission"
+TENANT_HEADER = "X-Sheratan-Tenant"
+PRIORITY_HEADER = "X-Sheratan-Priority"
+
+DEFAULT_TENANT = "default"
+PRIORITY_HIGH = "high"
+PRIORITY_NORMAL = "normal"
+PRIORITY_LOW = "low"
+PRIORITY_CLASSES = (PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW)
+
+DEFAULT_MAX_CONCURRENCY = int(os.getenv("SHERATAN_ADMISSION_MAX_CONCURRENCY", "32"))
+DEFAULT_MAX_QUEUE = int(os.getenv("SHERATAN_ADMISSION_MAX_QUEUE", "256"))
+DEFAULT_TENANT_MAX_QUEUE = int(os.getenv("SHERATAN_ADMISSION_TENANT_MAX_QUEUE", "64"))
+DEFAULT_MAX_WAIT_SECONDS = float(os.getenv("SHERATAN_ADMISSION_MAX_WAIT_SECONDS", "30"))
+
+QUEUE_WAIT = histogram(
+    "sheratan_admission_queue_wait_seconds",
+    "Time requests spent queued before admission",
+    ("priority",),
+)
+QUEUE_DEPTH = gauge(
+    "sheratan_admission_queue_depth",
+    "Requests waiting for admission",
+    ("priority",),
+)
+IN_FLIGHT = gauge(
+    "sheratan_admission_in_flight",
+    "Requests currently admitted to the router",
+)
+REJECTIONS = counter(
+    "sheratan_admission_rejections_total",
+    "Requests rejected by admission control",
+    ("reason",),
+)
+
+
+class AdmissionRejectedError(RuntimeError):
+    """Raised when a request cannot be queued or waited too long."""
+
+    def __init__(self, status_code: int, reason: str, retry_after: float) -> None:
+        super().__init__(f"Request rejected by admission control ({reason})")
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    __slots__ = ("tenant", "priority", "future", "enqueued")
+
+    def __init__(self, tenant: str, priority: str, future: "asyncio.Future[None]") -> None:
+        self.tenant = tenant
+        self.priority = priority
+        self.future = future
+        self.enqueued = time.perf_counter()
+
+
+class AdmissionTicket:
+    """An admitted request; ``release()`` hands the slot to the next waiter."""
+
+    __slots__ = ("_controller", "_admitted", "_released")
+
+    def __init__(self, controller: "AdmissionController") -> None:
+        self._controller = controller
+        self._admitted = time.perf_counter()
+        self._released = False
+
+    def release(self) -> None:
+        if self._released:
+            return
+        self._released = True
+        self._controller._release(time.perf_counter() - self._admitted)
+
+
+class AdmissionController:
+    """Global concurrency limit with strict priorities and weighted fair queues.
+
+    Up to ``max_concurrency`` requests run at once. Everything else waits in
+    one queue per priority class; higher classes are always served first.
+    Within a class, tenants share the freed slots in proportion to their
+    weight (self-clocked fair queueing over virtual finish tags). A full
+    global queue rejects with 503, a tenant that already has
+    ``tenant_max_queue`` requests waiting gets 429, and a request that waits
+    longer than ``max_wait_s`` is rejected with 503. Each rejection carries a
+    ``retry_after`` estimated from the observed service time.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        tenant_max_queue: int = DEFAULT_TENANT_MAX_QUEUE,
+        tenant_weights: Optional[Dict[str, float]] = None,
+        max_wait_s: float = DEFAULT_MAX_WAIT_SECONDS,
+    ) -> None:
+        self._max_concurrency = max(1, max_concurrency)
+        self._max_queue = max(0, max_queue)
+        self._tenant_max_queue = max(0, tenant_max_queue)
+        self._weights = dict(tenant_weights or {})
+        self._max_wait_s = max_wait_s
+        self._active = 0
+        self._queued = 0
+        self._tenant_queued: Dict[str, int] = {}
+        self._class_queued = {name: 0 for name in PRIORITY_CLASSES}
+        self._heaps: Dict[str, List[Tuple[float, int, _Waiter]]] = {
+            name: [] for name in PRIORITY_CLASSES
+        }
+        self._vtime = {name: 0.0 for name in PRIORITY_CLASSES}
+        self._last_tag: Dict[Tuple[str, str], float] = {}
+        self._seq = itertools.count()
+        self._service_s = 0.0
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def queued(self) -> int:
+        return self._queued
+
+    @staticmethod
+    def classify(priority: Optional[str]) -> str:
+        value = (priority or "").strip().lower()
+        return value if value in PRIORITY_CLASSES else PRIORITY_NORMAL
+
+    def _weight(self, tenant: str) -> float:
+        return max(self._weights.get(tenant, 1.0), 1e-6)
+
+    def retry_after(self) -> float:
+        per_slot = self._service_s or 1.0
+        return max(1.0, per_slot * (self._queued + 1) / self._max_concurrency)
+
+    def _reject(self, status_code: int, reason: str) -> AdmissionRejectedError:
+        REJECTIONS.labels(reason).inc()
+        return AdmissionRejectedError(status_code, reason, self.retry_after())
+
+    def _grant(self) -> AdmissionTicket:
+        self._active += 1
+        IN_FLIGHT.set(self._active)
+        return AdmissionTicket(self)
+
+    async def acquire(self, tenant: Optional[str] = None, priority: Optional[str] = None) -> AdmissionTicket:
+        tenant = tenant or DEFAULT_TENANT
+        klass = self.classify(priority)
+        if self._active < self._max_concurrency and not self._queued:
+            QUEUE_WAIT.labels(klass).observe(0.0)
+            return self._grant()
+        if self._queued >= self._max_queue:
+            raise self._reject(503, "queue_full")
+        if self._tenant_queued.get(tenant, 0) >= self._tenant_max_queue:
+            raise self._reject(429, "tenant_queue_full")
+
+        waiter = _Waiter(tenant, klass, asyncio.get_running_loop().create_future())
+        self._enqueue(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self._max_wait_s)
+        except asyncio.TimeoutError:
+            if self._abandon(waiter):
+                raise self._reject(503, "queue_timeout") from None
+        except asyncio.CancelledError:
+            if not self._abandon(waiter):
+                # The slot was handed over just as the caller went away.
+                self._release(None)
+            raise
+        QUEUE_WAIT.labels(klass).observe(time.perf_counter() - waiter.enqueued)
+        return AdmissionTicket(self)
+
+    @asynccontextmanager
+    async def slot(self, tenant: Optional[str] = None, priority: Optional[str] = None) -> AsyncIterator[None]:
+        ticket = await self.acquire(tenant, priority)
+        try:
+            yield
+        finally:
+            ticket.release()
+
+    def _enqueue(self, waiter: _Waiter) -> None:
+        key = (waiter.priority, waiter.tenant)
+        start = max(self._vtime[waiter.priority], self._last_tag.get(key, 0.0))
+        tag = start + 1.0 / self._weight(waiter.tenant)
+        self._last_tag[key] = tag
+        heapq.heappush(self._heaps[waiter.priority], (tag, next(self._seq), waiter))
+        self._count(waiter, 1)
+
+    def _count(self, waiter: _Waiter, delta: int) -> None:
+        self._queued += delta
+        remaining = self._tenant_queued.get(waiter.tenant, 0) + delta
+        if remaining > 0:
+            self._tenant_queued[waiter.tenant] = remaining
+        else:
+            self._tenant_queued.pop(waiter.tenant, None)
+            self._last_tag.pop((waiter.priority, waiter.tenant), None)
+        self._class_queued[waiter.priority] += delta
+        QUEUE_DEPTH.labels(waiter.priority).set(self._class_queued[waiter.priority])
+
+    def _abandon(self, waiter: _Waiter) -> bool:
+        """Withdraw a queued waiter; ``False`` if it had already been admitted."""
+
+        if waiter.future.done():
+            return False
+        waiter.future.cancel()
+        self._count(waiter, -1)
+        return True
+
+    def _release(self, service_s: Optional[float]) -> None:
+        if service_s is not None:
+            if self._service_s:
+                self._service_s += 0.2 * (service_s - self._service_s)
+            else:
+                self._service_s = service_s
+        self._active -= 1
+        self._dispatch()
+        IN_FLIGHT.set(self._active)
+
+    def _dispatch(self) -> None:
+        for klass in PRIORITY_CLASSES:
+            heap = self._heaps[klass]
+            while heap and self._active < self._max_concurrency:
+                tag, _, waiter = heapq.heappop(heap)
+                if waiter.future.done():
+                    continue
+                self._vtime[klass] = tag
+                self._count(waiter, -1)
+                self._active += 1
+                waiter.future.set_result(None)
+            if self._active >= self._max_concurrency:
+                return
+
+
+def _parse_weights(raw: str) -> Dict[str, float]:
+    """Parse ``tenant=weight`` entries separated by commas."""
+
+    weights: Dict[str, float] = {}
+    for item in (part.strip() for part in raw.split(",")):
+        tenant, sep, weight = item.partition("=")
+        if sep and tenant.strip():
+            weights[tenant.strip()] = float(weight)
+    return weights
+
+
+def create_admission_controller() -> Optional[AdmissionController]:
+    """Create the admission controller if the ``admission`` feature is enabled."""
+
+    if not is_feature_enabled(ADMISSION_FEATURE_FLAG):
+        return None
+    return AdmissionController(
+        max_concurrency=int(os.getenv("SHERATAN_ADMISSION_MAX_CONCURRENCY", str(DEFAULT_MAX_CONCURRENCY))),
+        max_queue=int(os.getenv("SHERATAN_ADMISSION_MAX_QUEUE", str(DEFAULT_MAX_QUEUE))),
+        tenant_max_queue=int(os.getenv("SHERATAN_ADMISSION_TENANT_MAX_QUEUE", str(DEFAULT_TENANT_MAX_QUEUE))),
+        tenant_weights=_parse_weights(os.getenv("SHERATAN_ADMISSION_TENANT_WEIGHTS", "")),
+        max_wait_s=float(os.getenv("SHERATAN_ADMISSION_MAX_WAIT_SECONDS", str(DEFAULT_MAX_WAIT_SECONDS))),
+    )
+
+
+__all__ = [
+    "AdmissionController",
+    "AdmissionRejectedError",
+    "AdmissionTicket",
+    "PRIORITY_HEADER",
+    "TENANT_HEADER",
+    "create_admission_controller",
+]
@@ -1,36 +1,148 @@
-from fastapi import FastAPI, HTTPException
+import json
+import math
+import os
+import re
+import time
+from contextlib import asynccontextmanager
+from typing import (
+    Any,
+    AsyncGenerator,
+    AsyncIterator,
+    Callable,
+    Coroutine,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Union,
+)
+
+from fastapi import APIRouter, FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from fastapi.routing import APIRoute
+from pydantic import TypeAdapter, ValidationError
+from starlette.background import BackgroundTask
 
-from .registry import load_router
+from .admission import (
+    PRIORITY_HEADER,
+    TENANT_HEADER,
+    AdmissionRejectedError,
+    create_admission_controller,
+)
+from .batching import create_batcher
+from .cache import completion_key, create_completion_cache
+from .coalescing import create_status_coalescer
+from .config import SettingsWatcher, get_settings, is_feature_enabled, reload_settings
+from .eventlog import JobEventLog, create_event_log
+from .jobs import create_job_index
+from .metrics import (
+    CONTENT_TYPE_LATEST,
+    LLM_STREAM_TTFB,
+    METRICS_ENABLED,
+    ApiMetricsMiddleware,
+    generate_latest,
+)
+from .orchestrator import (
+    AsyncIdempotencyStore,
+    IdempotencyConflictError,
+    as_async_store,
+    create_idempotency_store,
+)
+from .orchestrator.replay import (
+    REPLAY_HEADER,
+    ResponseReplayCache,
+    StoredResponse,
+    create_response_replay_cache,
+)
+from .registry import router_manager
+from .relay_auth import VERIFIED_SCOPE_KEY, RelaySignatureMiddleware, VerifiedRelayRequest
+from .resilience import CircuitOpenError
+from .security import (
+    DEFAULT_MAX_SKEW_SECONDS,
+    IDEMPOTENCY_HEADER,
+    KEY_ID_HEADER,
+    SIGNATURE_HEADER,
+    TIMESTAMP_HEADER,
+    HmacKeyring,
+    SignatureError,
+    body_fingerprint,
+    check_timestamp,
+)
+from .singleflight import SingleFlight
+from .streaming import DEFAULT_STREAM_BUFFER_CHUNKS, ENCODERS, relay_stream
 from .types import LLMRouter
 from .schemas import (
     AckResponse,
     CompleteRequest,
     CompleteResponse,
+    JobListResponse,
+    JobStateResponse,
+    RelayBatchFinal,
+    RelayBatchItem,
+    RelayBatchResponse,
+    RelayBatchStatus,
     RouterHealthResponse,
     RouterModelsResponse,
     RelayFinal,
     RelayStatus,
 )
 
-app = FastAPI(title="Sheratan Core", version="1.0.0")
+
+@asynccontextmanager
+async def _lifespan(_: FastAPI) -> AsyncIterator[None]:
+    interval = get_settings().settings_watch_interval
+    watcher = SettingsWatcher(interval).start() if interval > 0 else None
+    _open_event_log()
+    await router_manager.start()
+    try:
+        yield
+    finally:
+        if watcher is not None:
+            watcher.stop()
+        await router_manager.aclose()
+        if completion_cache is not None:
+            completion_cache.close()
+        if status_coalescer is not None:
+            status_coalescer.close()
+        _close_event_log()
+        _close_relay_store()
 
 
-def _require_router() -> LLMRouter:
-    router = load_router()
-    if not router:
-        raise HTTPException(status_code=501, detail="No router configured")
-    return router
+app = FastAPI(title="Sheratan Core", version="1.0.0", lifespan=_lifespan)
+RELAY_SIGNED_PATHS = ("/relay/status", "/relay/final", "/relay/batch")
+# Added before the metrics middleware so rejected callbacks are still timed.
+app.add_middleware(RelaySignatureMiddleware, paths=RELAY_SIGNED_PATHS, keyring=lambda: _relay_keyring())
+if METRICS_ENABLED:
+    app.add_middleware(ApiMetricsMiddleware)
+
+completion_cache = create_completion_cache()
+completion_flights: Optional[SingleFlight[Dict[str, Any]]] = (
+    SingleFlight() if is_feature_enabled("singleflight") else None
+)
+completion_batcher = create_batcher()
+# Opened per lifespan, so a restarted app appends to a fresh handle.
+event_log: Optional[JobEventLog] = None
+job_index = create_job_index()
+admission = create_admission_controller()
+
+
+@asynccontextmanager
+async def _require_router() -> AsyncIterator[LLMRouter]:
+    async with router_manager.lease() as router:
+        if not router:
+            raise HTTPException(status_code=501, detail="No router configured")
+        yield router
 
 
 @app.get("/health")
 async def health():
-    r = load_router()
     router_health = {}
-    if r:
-        try:
-            router_health = await r.health()
-        except Exception as _:
-            router_health = {"router": "error"}
+    async with router_manager.lease() as r:
+        if r:
+            try:
+                router_health = await r.health()
+            except Exception as _:
+                router_health = {"router": "error"}
     return {"status": "ok", "router": router_health}
 
 @app.get("/version")
@@ -46,53 +158,537 @@ async def metrics() -> Response:
     payload = generate_latest()
     return Response(content=payload, media_type=CONTENT_TYPE_LATEST)
 
+def _retry_after(seconds: float) -> Dict[str, str]:
+    return {"Retry-After": str(max(1, math.ceil(seconds)))}
+
+
+def _cache_directives(cache_control: Optional[str]) -> set[str]:
+    if not cache_control:
+        return set()
+    return {item.strip().lower() for item in cache_control.split(",")}
+
+
+async def _router_complete(
+    payload: Dict[str, Any], tenant: Optional[str] = None, priority: Optional[str] = None
+) -> Dict[str, Any]:
+    if admission is not None:
+        async with admission.slot(tenant, priority):
+            return await _dispatch_complete(payload)
+    return await _dispatch_complete(payload)
+
+
+async def _dispatch_complete(payload: Dict[str, Any]) -> Dict[str, Any]:
+    async with _require_router() as r:
+        batcher = completion_batcher
+        if batcher is not None:
+            return await batcher.submit(r, payload)
+        return await r.complete(payload)
+
+
 @app.post("/api/v1/llm/complete", response_model=CompleteResponse)
-async def llm_complete(req: CompleteRequest):
-    r = _require_router()
+async def llm_complete(
+    req: CompleteRequest,
+    cache_control: Optional[str] = Header(None, alias="Cache-Control"),
+    tenant: Optional[str] = Header(None, alias=TENANT_HEADER),
+    priority: Optional[str] = Header(None, alias=PRIORITY_HEADER),
+):
+    payload = req.model_dump()
+    cache = completion_cache
+    flights = completion_flights
+    # ``no-cache`` skips the lookup, ``no-store`` skips storing the result.
+    directives = _cache_directives(cache_control) if cache is not None else set()
+    key = completion_key(payload) if cache is not None or flights is not None else ""
+    if cache is not None and "no-cache" not in directives:
+        cached = await cache.aget(key)
+        if cached is not None:
+            return CompleteResponse(**cached)
+
     try:
-        result = await r.complete(req.model_dump())
-        return CompleteResponse(**result)
+        if flights is not None:
+            result = await flights.do(key, lambda: _router_complete(payload, tenant, priority))
+        else:
+            result = await _router_complete(payload, tenant, priority)
+        response = CompleteResponse(**result)
+    except HTTPException:
+        raise
+    except AdmissionRejectedError as e:
+        raise HTTPException(
+            status_code=e.status_code, detail=str(e), headers=_retry_after(e.retry_after)
+        ) from e
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers=_retry_after(e.retry_after)) from e
     except Exception as e:
-        raise HTTPException(status_code=502, detail=f"Router error: {e}")
+        raise HTTPException(status_code=502, detail=f"Router error: {e}") from e
+
+    if cache is not None and "no-store" not in directives:
+        cache.put(key, response.model_dump())
+    return response
+
+
+@app.post("/api/v1/llm/stream")
+async def llm_stream(
+    req: CompleteRequest,
+    fmt: str = Query("sse", alias="format", pattern="^(sse|ndjson)$"),
+    tenant: Optional[str] = Header(None, alias=TENANT_HEADER),
+    priority: Optional[str] = Header(None, alias=PRIORITY_HEADER),
+) -> StreamingResponse:
+    if router_manager.current() is None:
+        raise HTTPException(status_code=501, detail="No router configured")
+    # Streams hold their admission slot until the body is fully sent.
+    ticket = None
+    if admission is not None:
+        try:
+            ticket = await admission.acquire(tenant, priority)
+        except AdmissionRejectedError as e:
+            raise HTTPException(
+                status_code=e.status_code, detail=str(e), headers=_retry_after(e.retry_after)
+            ) from e
+    encoder = ENCODERS[fmt]
+    payload = req.model_dump()
+    accepted = time.perf_counter()
+
+    def first_chunk() -> None:
+        LLM_STREAM_TTFB.labels(fmt).observe(time.perf_counter() - accepted)
+
+    async def body() -> AsyncGenerator[bytes, None]:
+        # The lease lives as long as the response body, not the handler.
+        try:
+            async with router_manager.lease() as r:
+                if r is None:
+                    yield encoder.error("No router configured")
+                    return
+                async for frame in relay_stream(
+                    r.stream(payload),
+                    encoder,
+                    buffer_size=DEFAULT_STREAM_BUFFER_CHUNKS,
+                    on_first_chunk=first_chunk,
+                ):
+                    yield frame
+        finally:
+            if ticket is not None:
+                ticket.release()
+
+    stream = body()
+
+    async def close_body() -> None:
+        # A disconnect can leave the body parked at a yield; closing it runs
+        # the finally above, which is the only place the ticket is released.
+        await stream.aclose()
+
+    return StreamingResponse(
+        stream,
+        media_type=encoder.media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(close_body),
+    )
 
 
 @app.get("/api/v1/router/health", response_model=RouterHealthResponse)
 async def router_health() -> RouterHealthResponse:
-    r = _require_router()
-    try:
-        status = await r.health()
-    except Exception as e:
-        raise HTTPException(status_code=502, detail=f"Router error: {e}")
+    async with _require_router() as r:
+        try:
+            status = await r.health()
+        except Exception as e:
+            raise HTTPException(status_code=502, detail=f"Router error: {e}") from e
 
-    try:
-        metadata = r.metadata()
-    except Exception as e:
-        raise HTTPException(status_code=502, detail=f"Router metadata error: {e}")
+        try:
+            metadata = r.metadata()
+        except Exception as e:
+            raise HTTPException(status_code=502, detail=f"Router metadata error: {e}") from e
 
-    return RouterHealthResponse(name=r.name(), status=status, metadata=metadata)
+        return RouterHealthResponse(name=r.name(), status=status, metadata=metadata)
 
 
 @app.get("/api/v1/router/models", response_model=RouterModelsResponse)
 async def router_models() -> RouterModelsResponse:
-    r = _require_router()
+    async with _require_router() as r:
+        try:
+            models = r.models()
+        except Exception as e:
+            raise HTTPException(status_code=502, detail=f"Router error: {e}") from e
+
+        try:
+            metadata = r.metadata()
+        except Exception as e:
+            raise HTTPException(status_code=502, detail=f"Router metadata error: {e}") from e
+
+        return RouterModelsResponse(name=r.name(), models=models, metadata=metadata)
+
+
+@app.get("/api/v1/jobs/{job_id}", response_model=JobStateResponse)
+async def job_status(job_id: str) -> JobStateResponse:
+    state = job_index.get(job_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return JobStateResponse(**state.to_dict())
+
+
+@app.get("/api/v1/jobs", response_model=JobListResponse)
+async def list_jobs(
+    status: Optional[str] = Query(None),
+    tenant: Optional[str] = Query(None),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+) -> JobListResponse:
+    page, next_offset = job_index.query(status=status, tenant=tenant, offset=offset, limit=limit)
+    return JobListResponse(items=[JobStateResponse(**state.to_dict()) for state in page], next_offset=next_offset)
+
+
+_hmac_keyring: Optional[HmacKeyring] = None
+_idempotency_store: Optional[AsyncIdempotencyStore] = None
+_replay_cache: Optional[ResponseReplayCache] = None
+_replay_configured = False
+
+
+def _reset_hmac_state() -> None:
+    """Drop the cached keyring, idempotency store and replay cache (used by tests)."""
+
+    global _hmac_keyring, _replay_cache, _replay_configured
+    _hmac_keyring = None
+    _close_relay_store()
+    if _replay_cache is not None:
+        _replay_cache.clear()
+    _replay_cache = None
+    _replay_configured = False
+    reload_settings()
+
+
+def _close_relay_store() -> None:
+    global _idempotency_store
+    if _idempotency_store is not None:
+        _idempotency_store.close()
+        _idempotency_store = None
+
+
+def _open_event_log() -> None:
+    """Open the event log and rebuild the job index from it."""
+
+    global event_log, job_index
+    if event_log is None:
+        event_log = create_event_log()
+        if event_log is not None:
+            job_index = create_job_index(event_log)
+
+
+def _close_event_log() -> None:
+    global event_log
+    if event_log is not None:
+        event_log.close()
+        event_log = None
+
+
+def _relay_keyring() -> Optional[HmacKeyring]:
+    global _hmac_keyring
+    if _hmac_keyring is None:
+        secrets = get_settings().hmac_secrets
+        if secrets:
+            _hmac_keyring = HmacKeyring(secrets)
+    return _hmac_keyring
+
+
+def _relay_store() -> AsyncIdempotencyStore:
+    global _idempotency_store
+    if _idempotency_store is None:
+        _idempotency_store = as_async_store(create_idempotency_store())
+    return _idempotency_store
+
+
+def _relay_replay() -> Optional[ResponseReplayCache]:
+    global _replay_cache, _replay_configured
+    if not _replay_configured:
+        _replay_cache = create_response_replay_cache()
+        _replay_configured = True
+    return _replay_cache
+
+
+async def _authenticate_relay(
+    request: Request,
+    timestamp: str,
+    idempotency: str,
+    signature: Optional[str],
+    body: Optional[bytes] = None,
+) -> VerifiedRelayRequest:
+    """Return the middleware's verdict, or check skew and signature here.
+
+    Requests normally arrive verified by :class:`RelaySignatureMiddleware`;
+    the fallback covers handlers called without it and signs ``body`` if
+    the caller already read it.
+    """
+
+    verified = request.scope.get(VERIFIED_SCOPE_KEY)
+    if verified is not None:
+        return verified
+    keyring = _relay_keyring()
+    if keyring is None:
+        raise HTTPException(status_code=401, detail="HMAC secret not configured")
+    now = int(time.time())
     try:
-        models = r.models()
-    except Exception as e:
-        raise HTTPException(status_code=502, detail=f"Router error: {e}")
+        check_timestamp(timestamp, now, DEFAULT_MAX_SKEW_SECONDS)
+    except SignatureError as e:
+        raise HTTPException(status_code=401, detail=str(e)) from e
+    if body is None:
+        body = await request.body()
+    key_id = keyring.verify(timestamp, idempotency, body, signature, request.headers.get(KEY_ID_HEADER))
+    if key_id is None:
+        raise HTTPException(status_code=401, detail="Invalid signature")
+    return VerifiedRelayRequest(timestamp, idempotency, key_id, body_fingerprint(body), now)
+
 
+async def _verify_relay_request(
+    request: Request, timestamp: str, idempotency: str, signature: Optional[str]
+) -> None:
+    verified = await _authenticate_relay(request, timestamp, idempotency, signature)
     try:
-        metadata = r.metadata()
-    except Exception as e:
-        raise HTTPException(status_code=502, detail=f"Router metadata error: {e}")
+        reservation = await _relay_store().reserve(idempotency, verified.fingerprint, verified.verified_at)
+    except IdempotencyConflictError:
+        raise HTTPException(status_code=409, detail="Idempotency key reused with different payload") from None
+    if not reservation.created:
+        raise HTTPException(status_code=401, detail="Replay detected")
+
+
+def _replayable(response: Response) -> Optional[StoredResponse]:
+    if not 200 <= response.status_code < 300 or isinstance(response, StreamingResponse):
+        return None
+    return StoredResponse(response.status_code, tuple(response.raw_headers), bytes(response.body))
+
+
+class _ReplayingRelayRoute(APIRoute):
+    """Answer duplicate relay callbacks from the replay cache.
+
+    The lookup runs before body parsing and validation, so a retried
+    callback costs the middleware's HMAC check and a dict lookup. A duplicate that
+    arrives while the first request is still running waits for it and gets
+    the same response.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+
+        async def replaying_handler(request: Request) -> Response:
+            replay = _relay_replay()
+            timestamp = request.headers.get(TIMESTAMP_HEADER)
+            idempotency = request.headers.get(IDEMPOTENCY_HEADER)
+            if replay is None or timestamp is None or not idempotency:
+                return await handler(request)
+
+            verified = await _authenticate_relay(
+                request, timestamp, idempotency, request.headers.get(SIGNATURE_HEADER)
+            )
+            now = verified.verified_at
+            try:
+                stored = await replay.claim(idempotency, verified.fingerprint, now)
+            except IdempotencyConflictError:
+                raise HTTPException(status_code=409, detail="Idempotency key reused with different payload") from None
+            if stored is not None:
+                replayed = Response(content=stored.body, status_code=stored.status_code)
+                replayed.raw_headers = [*stored.headers, (REPLAY_HEADER.lower().encode("latin-1"), b"true")]
+                return replayed
+
+            try:
+                response = await handler(request)
+            except BaseException:
+                replay.abandon(idempotency)
+                raise
+            replay.complete(idempotency, _replayable(response), now)
+            return response
+
+        return replaying_handler
+
+
+relay_router = APIRouter(route_class=_ReplayingRelayRoute)
+
+
+def _persist_status(evt: RelayStatus, tenant: Optional[str]) -> None:
+    if event_log is not None:
+        event_log.append_status(evt, tenant)
+
+
+# Progress ticks are coalesced per job before they are persisted; the job
+# index is a latest-state map already and is updated on every tick.
+status_coalescer = create_status_coalescer(_persist_status)
+
+
+def _record_status(evt: RelayStatus, tenant: Optional[str]) -> None:
+    job_index.apply_status(evt, tenant)
+    if status_coalescer is not None:
+        status_coalescer.submit(evt, tenant)
+    else:
+        _persist_status(evt, tenant)
 
-    return RouterModelsResponse(name=r.name(), models=models, metadata=metadata)
 
-@app.post("/relay/status", response_model=AckResponse)
-async def relay_status(evt: RelayStatus) -> AckResponse:
-    # TODO: Auth/HMAC prüfen & persistieren
+def _record_final(evt: RelayFinal, tenant: Optional[str]) -> None:
+    if status_coalescer is not None:
+        status_coalescer.supersede(evt.job_id)
+    job_index.apply_final(evt, tenant)
+    if event_log is not None:
+        event_log.append_final(evt, tenant)
+
+
+@relay_router.post("/relay/status", response_model=AckResponse)
+async def relay_status(
+    request: Request,
+    evt: RelayStatus,
+    timestamp: str = Header(..., alias=TIMESTAMP_HEADER),
+    idempotency: str = Header(..., alias=IDEMPOTENCY_HEADER),
+    signature: Optional[str] = Header(None, alias=SIGNATURE_HEADER),
+) -> AckResponse:
+    await _verify_relay_request(request, timestamp, idempotency, signature)
+    _record_status(evt, request.headers.get(TENANT_HEADER))
     return AckResponse()
 
-@app.post("/relay/final", response_model=AckResponse)
-async def relay_final(evt: RelayFinal) -> AckResponse:
-    # TODO: Auth/HMAC prüfen & persistieren
+@relay_router.post("/relay/final", response_model=AckResponse)
+async def relay_final(
+    request: Request,
+    evt: RelayFinal,
+    timestamp: str = Header(..., alias=TIMESTAMP_HEADER),
+    idempotency: str = Header(..., alias=IDEMPOTENCY_HEADER),
+    signature: Optional[str] = Header(None, alias=SIGNATURE_HEADER),
+) -> AckResponse:
+    await _verify_relay_request(request, timestamp, idempotency, signature)
+    _record_final(evt, request.headers.get(TENANT_HEADER))
     return AckResponse()
+
+
+
+RELAY_BATCH_MAX_EVENTS = int(os.getenv("SHERATAN_RELAY_BATCH_MAX_EVENTS", "1000"))
+RELAY_BATCH_MAX_BYTES = int(os.getenv("SHERATAN_RELAY_BATCH_MAX_BYTES", str(4 * 1024 * 1024)))
+_batch_item: TypeAdapter[RelayBatchItem] = TypeAdapter(RelayBatchItem)
+_json_decoder = json.JSONDecoder()
+_JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def _validation_message(error: ValidationError) -> str:
+    first = error.errors()[0]
+    location = ".".join(str(part) for part in first["loc"])
+    return f"{location}: {first['msg']}" if location else first["msg"]
+
+
+async def _read_batch_body(request: Request) -> bytes:
+    """Read the request body, answering ``413`` once it exceeds the batch cap."""
+
+    too_large = HTTPException(status_code=413, detail=f"Batch exceeds {RELAY_BATCH_MAX_BYTES} bytes")
+    length = request.headers.get("content-length", "")
+    if length.isdigit() and int(length) > RELAY_BATCH_MAX_BYTES:
+        raise too_large
+    chunks: List[bytes] = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > RELAY_BATCH_MAX_BYTES:
+            raise too_large
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def _skip_ws(text: str, index: int) -> int:
+    """Index of the first non-whitespace character at or after ``index``."""
+
+    match = _JSON_WHITESPACE.match(text, index)
+    return match.end() if match is not None else index
+
+
+def _json_array_items(text: str) -> Iterator[Any]:
+    """Decode the elements of the JSON array ``text`` one at a time."""
+
+    index = _skip_ws(text, 1)
+    if text.startswith("]", index):
+        index += 1
+    else:
+        while True:
+            item, index = _json_decoder.raw_decode(text, index)
+            yield item
+            index = _skip_ws(text, index)
+            if text.startswith("]", index):
+                index += 1
+                break
+            if not text.startswith(",", index):
+                raise ValueError(f"Expecting ',' delimiter: char {index}")
+            index = _skip_ws(text, index + 1)
+    if _skip_ws(text, index) != len(text):
+        raise ValueError(f"Extra data: char {index}")
+
+
+def _batch_items(body: bytes) -> Iterator[Union[RelayBatchStatus, RelayBatchFinal, str]]:
+    """Validate a JSON array or NDJSON batch one item at a time.
+
+    Invalid items yield their error message instead of stopping the batch.
+    JSON arrays are decoded element by element, so a caller that stops
+    early never parses the rest.
+    """
+
+    text = body.strip()
+    if text.startswith(b"["):
+        try:
+            for item in _json_array_items(text.decode("utf-8")):
+                try:
+                    yield _batch_item.validate_python(item)
+                except ValidationError as e:
+                    yield _validation_message(e)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON array: {e}") from e
+        return
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        try:
+            yield _batch_item.validate_json(line)
+        except ValidationError as e:
+            yield _validation_message(e)
+
+
+@relay_router.post("/relay/batch", response_model=RelayBatchResponse)
+async def relay_batch(
+    request: Request,
+    timestamp: str = Header(..., alias=TIMESTAMP_HEADER),
+    idempotency: str = Header(..., alias=IDEMPOTENCY_HEADER),
+    signature: Optional[str] = Header(None, alias=SIGNATURE_HEADER),
+) -> RelayBatchResponse:
+    """Ingest many status/final events signed once as a whole.
+
+    Each item carries its own idempotency key; the request key only takes
+    part in the signature. Results are reported per item, in order.
+    """
+
+    body = await _read_batch_body(request)
+    now = (await _authenticate_relay(request, timestamp, idempotency, signature, body)).verified_at
+
+    results: List[str] = []
+    errors: Dict[int, str] = {}
+    valid: List[Union[RelayBatchStatus, RelayBatchFinal]] = []
+    positions: List[int] = []
+    for position, item in enumerate(_batch_items(body)):
+        if position >= RELAY_BATCH_MAX_EVENTS:
+            raise HTTPException(status_code=413, detail=f"Batch exceeds {RELAY_BATCH_MAX_EVENTS} events")
+        if isinstance(item, str):
+            results.append("invalid")
+            errors[position] = item
+            continue
+        results.append("accepted")
+        valid.append(item)
+        positions.append(position)
+
+    reservations = await _relay_store().reserve_many(
+        [
+            (item.idempotency_key, body_fingerprint(item.event.model_dump_json().encode("utf-8")), now)
+            for item in valid
+        ]
+    )
+    tenant = request.headers.get(TENANT_HEADER)
+    accepted = 0
+    for position, item, reservation in zip(positions, valid, reservations, strict=True):
+        if isinstance(reservation, IdempotencyConflictError):
+            results[position] = "conflict"
+        elif isinstance(reservation, Exception):
+            raise reservation
+        elif not reservation.created:
+            results[position] = "duplicate"
+        else:
+            if isinstance(item, RelayBatchStatus):
+                _record_status(item.event, tenant)
+            else:
+                _record_final(item.event, tenant)
+            accepted += 1
+    return RelayBatchResponse(accepted=accepted, results=results, errors=errors)
+
+
+app.include_router(relay_router)
@@ -0,0 +1,117 @@
+"""Micro-batching of completion requests for routers with ``complete_batch``."""
+from __future__ import annotations
+
+import asyncio
+import os
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .config import is_feature_enabled
+from .metrics import histogram
+
+BATCHING_FEATURE_FLAG = "batching"
+DEFAULT_BATCH_MAX_SIZE = int(os.getenv("SHERATAN_BATCH_MAX_SIZE", "8"))
+DEFAULT_BATCH_MAX_WAIT_MS = float(os.getenv("SHERATAN_BATCH_MAX_WAIT_MS", "5"))
+
+BATCH_SIZE = histogram(
+    "sheratan_completion_batch_size",
+    "Requests per upstream complete_batch call",
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+
+
+def supports_batch(router: Any) -> bool:
+    return callable(getattr(router, "complete_batch", None))
+
+
+_Item = Tuple[Dict[str, Any], "asyncio.Future[Dict[str, Any]]"]
+
+
+class _Batch:
+    __slots__ = ("router", "items", "timer")
+
+    def __init__(self, router: Any) -> None:
+        self.router = router
+        self.items: List[_Item] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class MicroBatcher:
+    """Gather requests per router and model into ``complete_batch`` calls.
+
+    A batch is dispatched once it holds ``max_batch_size`` requests or
+    ``max_wait_ms`` after its first request arrived, whichever comes first.
+    Routers without ``complete_batch`` are called directly, without waiting.
+    """
+
+    def __init__(
+        self,
+        max_batch_size: int = DEFAULT_BATCH_MAX_SIZE,
+        max_wait_ms: float = DEFAULT_BATCH_MAX_WAIT_MS,
+    ) -> None:
+        self._max_batch_size = max(1, max_batch_size)
+        self._max_wait_s = max(0.0, max_wait_ms) / 1000.0
+        self._open: Dict[Tuple[int, str], _Batch] = {}
+        self._running: Set["asyncio.Task[None]"] = set()
+
+    async def submit(self, router: Any, req: Dict[str, Any]) -> Dict[str, Any]:
+        if not supports_batch(router):
+            return await router.complete(req)
+
+        loop = asyncio.get_running_loop()
+        key = (id(router), str(req.get("model", "")))
+        batch = self._open.get(key)
+        if batch is None:
+            batch = _Batch(router)
+            self._open[key] = batch
+            batch.timer = loop.call_later(self._max_wait_s, self._flush, key, batch)
+
+        future: "asyncio.Future[Dict[str, Any]]" = loop.create_future()
+        batch.items.append((req, future))
+        if len(batch.items) >= self._max_batch_size:
+            self._flush(key, batch)
+        return await future
+
+    def _flush(self, key: Tuple[int, str], batch: _Batch) -> None:
+        if self._open.get(key) is batch:
+            del self._open[key]
+        if batch.timer is not None:
+            batch.timer.cancel()
+            batch.timer = None
+        items = [item for item in batch.items if not item[1].done()]
+        batch.items = []
+        if not items:
+            return
+        task = asyncio.get_running_loop().create_task(self._dispatch(batch.router, items))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _dispatch(self, router: Any, items: List[_Item]) -> None:
+        BATCH_SIZE.observe(len(items))
+        try:
+            results = await router.complete_batch([req for req, _ in items])
+            if len(results) != len(items):
+                raise RuntimeError(
+                    f"complete_batch returned {len(results)} results for {len(items)} requests"
+                )
+        except Exception as e:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(items, results, strict=True):
+            if not future.done():
+                future.set_result(result)
+
+
+def create_batcher() -> Optional[MicroBatcher]:
+    """Create the micro-batcher if the ``batching`` feature is enabled."""
+
+    if not is_feature_enabled(BATCHING_FEATURE_FLAG):
+        return None
+    return MicroBatcher(
+        max_batch_size=int(os.getenv("SHERATAN_BATCH_MAX_SIZE", str(DEFAULT_BATCH_MAX_SIZE))),
+        max_wait_ms=float(os.getenv("SHERATAN_BATCH_MAX_WAIT_MS", str(DEFAULT_BATCH_MAX_WAIT_MS))),
+    )
+
+
+__all__ = ["MicroBatcher", "create_batcher", "supports_batch"]
@@ -0,0 +1,310 @@
+"""Response cache for ``LLMRouter.complete`` results."""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Mapping, Optional
+
+from .config import is_feature_enabled
+from .metrics import counter, gauge
+
+CACHE_FEATURE_FLAG = "completion_cache"
+DEFAULT_CACHE_TTL_SECONDS = int(os.getenv("SHERATAN_COMPLETION_CACHE_TTL_SECONDS", "300"))
+DEFAULT_CACHE_MAX_BYTES = int(os.getenv("SHERATAN_COMPLETION_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+CACHE_SQLITE_PATH_ENV = "SHERATAN_COMPLETION_CACHE_SQLITE_PATH"
+DEFAULT_CACHE_SQLITE_MAX_ROWS = int(os.getenv("SHERATAN_COMPLETION_CACHE_SQLITE_MAX_ROWS", "100000"))
+DEFAULT_CACHE_PURGE_INTERVAL_SECONDS = float(os.getenv("SHERATAN_COMPLETION_CACHE_PURGE_INTERVAL_SECONDS", "60"))
+
+# Rough per-entry bookkeeping cost (OrderedDict node, tuple, key object).
+_ENTRY_OVERHEAD_BYTES = 160
+
+CACHE_LOOKUPS = counter(
+    "sheratan_completion_cache_lookups_total",
+    "Completion cache lookups by result and tier",
+    ("result", "tier"),
+)
+CACHE_EVICTIONS = counter(
+    "sheratan_completion_cache_evictions_total",
+    "Completion cache entries removed from memory",
+    ("reason",),
+)
+CACHE_DISK_EVICTIONS = counter(
+    "sheratan_completion_cache_disk_evictions_total",
+    "Completion cache rows removed from the SQLite tier",
+    ("reason",),
+)
+CACHE_BYTES = gauge(
+    "sheratan_completion_cache_bytes",
+    "Approximate bytes held by the in-memory completion cache",
+)
+
+
+def completion_key(payload: Mapping[str, Any]) -> str:
+    """Hash of the canonical JSON form of a completion request."""
+
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class CompletionCache:
+    """LRU cache bounded by TTL and total bytes, with an optional SQLite tier.
+
+    Values are stored as encoded JSON so their size is known exactly. Entries
+    that fall out of memory remain in the SQLite tier (if configured) until
+    they expire, and are promoted back on the next hit.
+
+    The SQLite tier lives on one dedicated thread that owns the connection:
+    writes are queued to it without waiting, and async callers use
+    :meth:`aget`, which only leaves the event loop on a memory miss. Expired
+    rows are purged every ``purge_interval_seconds`` and the oldest rows are
+    dropped once the table holds more than ``sqlite_max_rows``.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int = DEFAULT_CACHE_TTL_SECONDS,
+        max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+        sqlite_path: Optional[Path] = None,
+        clock: Callable[[], float] = time.time,
+        sqlite_max_rows: int = DEFAULT_CACHE_SQLITE_MAX_ROWS,
+        purge_interval_seconds: float = DEFAULT_CACHE_PURGE_INTERVAL_SECONDS,
+    ) -> None:
+        self._ttl_seconds = ttl_seconds
+        self._max_bytes = max_bytes
+        self._clock = clock
+        self._entries: "OrderedDict[str, tuple[bytes, float]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._sqlite_max_rows = max(1, sqlite_max_rows)
+        self._purge_interval_seconds = purge_interval_seconds
+        self._conn: Optional[sqlite3.Connection] = None
+        self._rows = 0
+        self._next_purge = 0.0
+        self._disk: Optional[ThreadPoolExecutor] = None
+        if sqlite_path is not None:
+            self._disk = ThreadPoolExecutor(max_workers=1, thread_name_prefix="completion-cache")
+            self._disk.submit(self._open, sqlite_path).result()
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _cost(key: str, value: bytes) -> int:
+        return len(key) + len(value) + _ENTRY_OVERHEAD_BYTES
+
+    def _drop(self, key: str, reason: str) -> None:
+        value, _ = self._entries.pop(key)
+        self._bytes -= self._cost(key, value)
+        CACHE_EVICTIONS.labels(reason).inc()
+
+    def _insert(self, key: str, value: bytes, expires_at: float) -> None:
+        if key in self._entries:
+            old, _ = self._entries.pop(key)
+            self._bytes -= self._cost(key, old)
+        cost = self._cost(key, value)
+        if cost > self._max_bytes:
+            CACHE_BYTES.set(self._bytes)
+            return
+        self._entries[key] = (value, expires_at)
+        self._bytes += cost
+        while self._bytes > self._max_bytes:
+            oldest = next(iter(self._entries))
+            self._drop(oldest, "lru")
+        CACHE_BYTES.set(self._bytes)
+
+    # Memory tier (called on the caller's thread, usually the event loop).
+
+    def _memory_get(self, key: str, now: float) -> Optional[bytes]:
+        with self._lock:
+            record = self._entries.get(key)
+            if record is None:
+                return None
+            value, expires_at = record
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                return value
+            self._drop(key, "expired")
+            CACHE_BYTES.set(self._bytes)
+            return None
+
+    def _promote(self, key: str, row: Optional[tuple[bytes, float]]) -> Optional[Dict[str, Any]]:
+        if row is None:
+            CACHE_LOOKUPS.labels("miss", "none").inc()
+            return None
+        value, expires_at = row
+        with self._lock:
+            self._insert(key, value, expires_at)
+        CACHE_LOOKUPS.labels("hit", "sqlite").inc()
+        return json.loads(value)
+
+    # SQLite tier (only ever runs on the ``completion-cache`` thread).
+
+    def _open(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(path)
+        conn.execute("PRAGMA journal_mode=WAL;")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS completion_cache (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                expires_at REAL NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS completion_cache_expires ON completion_cache(expires_at)")
+        self._conn = conn
+        self._purge(self._clock())
+
+    def _purge(self, now: float) -> None:
+        conn = self._conn
+        if conn is None:
+            return
+        expired = conn.execute("DELETE FROM completion_cache WHERE expires_at <= ?", (now,)).rowcount
+        if expired > 0:
+            CACHE_DISK_EVICTIONS.labels("expired").inc(expired)
+        self._rows = conn.execute("SELECT COUNT(*) FROM completion_cache").fetchone()[0]
+        excess = self._rows - self._sqlite_max_rows
+        if excess > 0:
+            # Every row gets the same TTL, so the soonest to expire are the oldest.
+            conn.execute(
+                "DELETE FROM completion_cache WHERE key IN "
+                "(SELECT key FROM completion_cache ORDER BY expires_at LIMIT ?)",
+                (excess,),
+            )
+            CACHE_DISK_EVICTIONS.labels("max_rows").inc(excess)
+            self._rows -= excess
+        conn.commit()
+        self._next_purge = now + self._purge_interval_seconds
+
+    def _disk_get(self, key: str, now: float) -> Optional[tuple[bytes, float]]:
+        conn = self._conn
+        if conn is None:
+            return None
+        row = conn.execute("SELECT value, expires_at FROM completion_cache WHERE key = ?", (key,)).fetchone()
+        if row is None or row[1] <= now:
+            return None
+        return bytes(row[0]), row[1]
+
+    def _disk_put(self, key: str, value: bytes, expires_at: float) -> None:
+        conn = self._conn
+        if conn is None:
+            return
+        conn.execute(
+            "INSERT OR REPLACE INTO completion_cache(key, value, expires_at) VALUES (?, ?, ?)",
+            (key, value, expires_at),
+        )
+        conn.commit()
+        self._rows += 1
+        now = self._clock()
+        if now >= self._next_purge or self._rows > self._sqlite_max_rows:
+            self._purge(now)
+
+    def _disk_clear(self) -> None:
+        if self._conn is not None:
+            self._conn.execute("DELETE FROM completion_cache")
+            self._conn.commit()
+            self._rows = 0
+
+    def _disk_close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    # Public API.
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Blocking lookup; async code should use :meth:`aget`."""
+
+        now = self._clock()
+        value = self._memory_get(key, now)
+        if value is not None:
+            CACHE_LOOKUPS.labels("hit", "memory").inc()
+            return json.loads(value)
+        if self._disk is None:
+            CACHE_LOOKUPS.labels("miss", "none").inc()
+            return None
+        return self._promote(key, self._disk.submit(self._disk_get, key, now).result())
+
+    async def aget(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up ``key`` without blocking the event loop on the SQLite tier."""
+
+        now = self._clock()
+        value = self._memory_get(key, now)
+        if value is not None:
+            CACHE_LOOKUPS.labels("hit", "memory").inc()
+            return json.loads(value)
+        if self._disk is None:
+            CACHE_LOOKUPS.labels("miss", "none").inc()
+            return None
+        row = await asyncio.get_running_loop().run_in_executor(self._disk, self._disk_get, key, now)
+        return self._promote(key, row)
+
+    def put(self, key: str, value: Mapping[str, Any]) -> None:
+        """Store ``value``; the SQLite write is queued and not waited for."""
+
+        encoded = json.dumps(value, separators=(",", ":")).encode("utf-8")
+        expires_at = self._clock() + self._ttl_seconds
+        with self._lock:
+            self._insert(key, encoded, expires_at)
+        if self._disk is not None:
+            self._disk.submit(self._disk_put, key, encoded, expires_at)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            CACHE_BYTES.set(0)
+        if self._disk is not None:
+            self._disk.submit(self._disk_clear).result()
+
+    def close(self) -> None:
+        """Flush queued writes and close the SQLite tier."""
+
+        disk, self._disk = self._disk, None
+        if disk is not None:
+            disk.submit(self._disk_close)
+            disk.shutdown(wait=True)
+
+
+def create_completion_cache() -> Optional[CompletionCache]:
+    """Create the completion cache if the ``completion_cache`` feature is enabled."""
+
+    if not is_feature_enabled(CACHE_FEATURE_FLAG):
+        return None
+    ttl_seconds = int(os.getenv("SHERATAN_COMPLETION_CACHE_TTL_SECONDS", str(DEFAULT_CACHE_TTL_SECONDS)))
+    max_bytes = int(os.getenv("SHERATAN_COMPLETION_CACHE_MAX_BYTES", str(DEFAULT_CACHE_MAX_BYTES)))
+    sqlite_path = os.getenv(CACHE_SQLITE_PATH_ENV, "").strip()
+    return CompletionCache(
+        ttl_seconds=ttl_seconds,
+        max_bytes=max_bytes,
+        sqlite_path=Path(sqlite_path) if sqlite_path else None,
+        sqlite_max_rows=int(
+            os.getenv("SHERATAN_COMPLETION_CACHE_SQLITE_MAX_ROWS", str(DEFAULT_CACHE_SQLITE_MAX_ROWS))
+        ),
+        purge_interval_seconds=float(
+            os.getenv(
+                "SHERATAN_COMPLETION_CACHE_PURGE_INTERVAL_SECONDS", str(DEFAULT_CACHE_PURGE_INTERVAL_SECONDS)
+            )
+        ),
+    )
+
+
+__all__ = [
+    "CACHE_FEATURE_FLAG",
+    "CompletionCache",
+    "completion_key",
+    "create_completion_cache",
+]
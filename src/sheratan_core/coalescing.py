@@ -0,0 +1,102 @@
+"""Coalescing of high-frequency relay status updates per job."""
+from __future__ import annotations
+
+import asyncio
+import os
+from typing import Callable, Dict, Optional, Tuple
+
+from .metrics import counter, gauge
+from .schemas import RelayStatus
+
+COALESCE_WINDOW_ENV = "SHERATAN_RELAY_COALESCE_MS"
+
+StatusSink = Callable[[RelayStatus, Optional[str]], None]
+
+STATUS_COALESCED = counter(
+    "sheratan_relay_status_coalesced_total",
+    "Relay status events replaced by a newer event for the same job before being processed",
+)
+STATUS_FLUSHED = counter(
+    "sheratan_relay_status_flushed_total",
+    "Relay status events passed on after their coalescing window",
+)
+STATUS_PENDING_JOBS = gauge(
+    "sheratan_relay_status_pending_jobs",
+    "Jobs with a status event waiting in the coalescing window",
+)
+
+
+class StatusCoalescer:
+    """Keep only the newest ``RelayStatus`` per job for ``window_s`` seconds.
+
+    The first pending event arms a timer on the running loop; when it
+    fires, the newest event of every pending job goes to ``sink`` in one
+    pass, so downstream work per window scales with the number of active
+    jobs, not with the event rate. ``supersede()`` drops a job's pending
+    status when its final callback arrives.
+    """
+
+    def __init__(self, window_s: float, sink: StatusSink) -> None:
+        self._window_s = window_s
+        self._sink = sink
+        self._pending: Dict[str, Tuple[RelayStatus, Optional[str]]] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._timer_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def submit(self, event: RelayStatus, tenant: Optional[str] = None) -> None:
+        if self._timer_loop is not None and self._timer_loop.is_closed():
+            # The loop that armed the timer is gone; do not strand its events.
+            self.flush()
+        if event.job_id in self._pending:
+            STATUS_COALESCED.inc()
+        self._pending[event.job_id] = (event, tenant)
+        if self._timer is None:
+            loop = asyncio.get_running_loop()
+            self._timer = loop.call_later(self._window_s, self.flush)
+            self._timer_loop = loop
+        STATUS_PENDING_JOBS.set(len(self._pending))
+
+    def supersede(self, job_id: str) -> bool:
+        """Drop the pending status of ``job_id``; ``True`` if there was one."""
+
+        if self._pending.pop(job_id, None) is None:
+            return False
+        STATUS_COALESCED.inc()
+        STATUS_PENDING_JOBS.set(len(self._pending))
+        return True
+
+    def flush(self) -> int:
+        """Hand every pending status to the sink now; returns how many."""
+
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = None
+        self._timer_loop = None
+        pending, self._pending = self._pending, {}
+        STATUS_PENDING_JOBS.set(0)
+        for event, tenant in pending.values():
+            self._sink(event, tenant)
+        STATUS_FLUSHED.inc(len(pending))
+        return len(pending)
+
+    def close(self) -> None:
+        self.flush()
+
+
+def create_status_coalescer(sink: StatusSink) -> Optional[StatusCoalescer]:
+    """Create a coalescer if ``SHERATAN_RELAY_COALESCE_MS`` is positive."""
+
+    window_ms = float(os.getenv(COALESCE_WINDOW_ENV, "0") or 0)
+    if window_ms <= 0:
+        return None
+    return StatusCoalescer(window_ms / 1000.0, sink)
+
+
+__all__ = [
+    "COALESCE_WINDOW_ENV",
+    "StatusCoalescer",
+    "create_status_coalescer",
+]
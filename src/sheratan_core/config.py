@@ -2,9 +2,13 @@
 from __future__ import annotations
 
 import os
-from dataclasses import dataclass
+import threading
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict
+from types import MappingProxyType
+from typing import Dict, Mapping
+
+from .security import DEFAULT_KEY_ID
 
 PROFILE_ENV_VAR = "SHERATAN_PROFILE"
 DEFAULT_PROFILE = "dev"
@@ -14,6 +18,13 @@ ENV_DIR = BASE_DIR / "ENV"
 BASE_ENV = ENV_DIR / ".env"
 
 _loaded_profile: str | None = None
+# Values this module copied from ``.env`` files; only these may be replaced on
+# a file-triggered refresh so explicitly exported variables keep precedence.
+_file_values: Dict[str, str] = {}
+
+_settings: "Settings | None" = None
+_settings_version = 0
+_settings_lock = threading.Lock()
 
 
 def _parse_env_file(path: Path) -> Dict[str, str]:
@@ -34,7 +45,9 @@ def _parse_env_file(path: Path) -> Dict[str, str]:
     return data
 
 
-def _coerce_bool(value: str | None, default: bool = False) -> bool:
+def coerce_bool(value: str | None, default: bool = False) -> bool:
+    """Parse ``1/true/yes/on`` and ``0/false/no/off``; anything else yields ``default``."""
+
     if value is None:
         return default
     normalized = value.strip().lower()
@@ -58,24 +71,58 @@ def load_environment(profile: str | None = None, *, override: bool = False) -> s
     if _loaded_profile == requested:
         return requested
 
-    for env_path in (BASE_ENV, ENV_DIR / f".env.{requested}"):
-        for key, value in _parse_env_file(env_path).items():
-            if override or key not in os.environ:
-                os.environ[key] = value
+    for key, value in _read_profile_files(requested).items():
+        if override or key not in os.environ:
+            os.environ[key] = value
+            _file_values[key] = value
 
     os.environ.setdefault(PROFILE_ENV_VAR, requested)
     _loaded_profile = requested
+    invalidate_settings()
     return requested
 
 
+def _profile_paths(profile: str) -> tuple[Path, Path]:
+    return BASE_ENV, ENV_DIR / f".env.{profile}"
+
+
+def _read_profile_files(profile: str) -> Dict[str, str]:
+    merged: Dict[str, str] = {}
+    for env_path in _profile_paths(profile):
+        merged.update(_parse_env_file(env_path))
+    return merged
+
+
+def refresh_environment() -> None:
+    """Re-apply the profile ``.env`` files after they changed on disk.
+
+    Keys previously loaded from the files are updated or removed; variables
+    exported by the process environment are left untouched.
+    """
+
+    profile = _loaded_profile or os.getenv(PROFILE_ENV_VAR) or DEFAULT_PROFILE
+    fresh = _read_profile_files(profile)
+    for key in list(_file_values):
+        if key not in fresh and os.environ.get(key) == _file_values[key]:
+            os.environ.pop(key, None)
+            del _file_values[key]
+    for key, value in fresh.items():
+        current = os.environ.get(key)
+        if current is None or current == _file_values.get(key):
+            os.environ[key] = value
+            _file_values[key] = value
+
+
 def reset_environment_state() -> None:
     """Testing helper to clear the cached profile state."""
 
     global _loaded_profile
     _loaded_profile = None
+    _file_values.clear()
+    invalidate_settings()
 
 
-def _collect_feature_flags(env: Dict[str, str]) -> Dict[str, bool]:
+def _collect_feature_flags(env: Mapping[str, str]) -> Dict[str, bool]:
     flags: Dict[str, bool] = {}
     raw_list = env.get("SHERATAN_FEATURE_FLAGS", "")
     for item in raw_list.split(","):
@@ -89,10 +136,27 @@ def _collect_feature_flags(env: Dict[str, str]) -> Dict[str, bool]:
         if not key.startswith(prefix):
             continue
         flag_name = key[len(prefix) :].lower()
-        flags[flag_name] = _coerce_bool(value, default=True)
+        flags[flag_name] = coerce_bool(value, default=True)
     return flags
 
 
+def _collect_hmac_secrets(env: Mapping[str, str], default_secret: str | None) -> Dict[str, str]:
+    """Active relay secrets by key id.
+
+    ``SHERATAN_HMAC_SECRETS`` lists ``key_id:secret`` pairs separated by
+    commas; ``SHERATAN_HMAC_SECRET`` is registered as key id ``default``.
+    """
+
+    secrets: Dict[str, str] = {}
+    if default_secret:
+        secrets[DEFAULT_KEY_ID] = default_secret
+    for item in env.get("SHERATAN_HMAC_SECRETS", "").split(","):
+        key_id, sep, secret = item.strip().partition(":")
+        if sep and key_id.strip() and secret.strip():
+            secrets[key_id.strip()] = secret.strip()
+    return secrets
+
+
 @dataclass(frozen=True)
 class Settings:
     profile: str
@@ -101,25 +165,27 @@ class Settings:
     router_spec: str
     hmac_secret: str | None
     metrics_enabled: bool
-    feature_flags: Dict[str, bool]
+    feature_flags: Mapping[str, bool]
+    settings_watch_interval: float = 0.0
+    hmac_secrets: Mapping[str, str] = field(default_factory=lambda: MappingProxyType({}))
+    version: int = field(default=0, compare=False)
 
     def feature_enabled(self, name: str) -> bool:
         return self.feature_flags.get(name.lower(), False)
 
 
-def get_settings() -> Settings:
-    """Return the current orchestrator settings."""
-
-    load_environment()
-    env = dict(os.environ)
+def _build_settings(version: int) -> Settings:
+    env = os.environ
 
     profile = env.get(PROFILE_ENV_VAR, DEFAULT_PROFILE)
     host = env.get("SHERATAN_HOST", "0.0.0.0")
     port = int(env.get("SHERATAN_PORT", "8000"))
     router_spec = env.get("SHERATAN_ROUTER", "").strip()
     hmac_secret = env.get("SHERATAN_HMAC_SECRET", "").strip() or None
-    metrics_enabled = _coerce_bool(env.get("SHERATAN_METRICS_ENABLED"), default=True)
-    feature_flags = _collect_feature_flags(env)
+    hmac_secrets = MappingProxyType(_collect_hmac_secrets(env, hmac_secret))
+    metrics_enabled = coerce_bool(env.get("SHERATAN_METRICS_ENABLED"), default=True)
+    feature_flags = MappingProxyType(_collect_feature_flags(env))
+    watch_interval = float(env.get("SHERATAN_SETTINGS_WATCH_INTERVAL", "0") or 0)
 
     return Settings(
         profile=profile,
@@ -129,19 +195,117 @@ def get_settings() -> Settings:
         hmac_secret=hmac_secret,
         metrics_enabled=metrics_enabled,
         feature_flags=feature_flags,
+        settings_watch_interval=watch_interval,
+        hmac_secrets=hmac_secrets,
+        version=version,
     )
 
 
+def get_settings() -> Settings:
+    """Return the current orchestrator settings.
+
+    The snapshot is parsed once and cached; call :func:`reload_settings` after
+    changing the environment to publish a new version.
+    """
+
+    settings = _settings
+    if settings is None:
+        return reload_settings()
+    return settings
+
+
+def reload_settings() -> Settings:
+    """Rebuild the settings snapshot from the environment and bump its version."""
+
+    global _settings, _settings_version
+    load_environment()
+    with _settings_lock:
+        _settings_version += 1
+        _settings = _build_settings(_settings_version)
+        return _settings
+
+
+def invalidate_settings() -> None:
+    """Drop the cached snapshot; the next :func:`get_settings` rebuilds it."""
+
+    global _settings
+    _settings = None
+
+
+def settings_version() -> int:
+    """Version of the most recently built settings snapshot."""
+
+    return _settings_version
+
+
 def is_feature_enabled(name: str) -> bool:
     """Convenience helper to query feature toggles."""
 
     return get_settings().feature_enabled(name)
 
 
+class SettingsWatcher:
+    """Poll the profile ``.env`` files and reload settings when they change."""
+
+    def __init__(self, interval: float = 2.0) -> None:
+        self._interval = interval
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._mtimes = self._snapshot()
+
+    def _snapshot(self) -> Dict[Path, float]:
+        profile = _loaded_profile or os.getenv(PROFILE_ENV_VAR) or DEFAULT_PROFILE
+        mtimes: Dict[Path, float] = {}
+        for path in _profile_paths(profile):
+            try:
+                mtimes[path] = path.stat().st_mtime
+            except FileNotFoundError:
+                mtimes[path] = 0.0
+        return mtimes
+
+    def poll(self) -> bool:
+        """Reload if any file changed since the last poll; returns ``True`` on reload."""
+
+        current = self._snapshot()
+        if current == self._mtimes:
+            return False
+        self._mtimes = current
+        refresh_environment()
+        reload_settings()
+        return True
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval):
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"[config] Settings reload failed: {e}")
+
+    def start(self) -> "SettingsWatcher":
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="sheratan-settings-watcher", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self._interval + 1)
+            self._thread = None
+
+
 __all__ = [
     "Settings",
+    "SettingsWatcher",
+    "coerce_bool",
     "get_settings",
+    "invalidate_settings",
     "is_feature_enabled",
     "load_environment",
+    "refresh_environment",
+    "reload_settings",
     "reset_environment_state",
+    "settings_version",
 ]
@@ -0,0 +1,376 @@
+"""Append-only, segmented log of relay job events."""
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from .metrics import counter, gauge, histogram
+from .schemas import RelayFinal, RelayStatus
+
+EVENT_LOG_DIR_ENV = "SHERATAN_EVENT_LOG_DIR"
+DEFAULT_SEGMENT_BYTES = int(os.getenv("SHERATAN_EVENT_LOG_SEGMENT_BYTES", str(64 * 1024 * 1024)))
+DEFAULT_FSYNC_INTERVAL_MS = float(os.getenv("SHERATAN_EVENT_LOG_FSYNC_MS", "50"))
+DEFAULT_RETENTION_SEGMENTS = int(os.getenv("SHERATAN_EVENT_LOG_RETENTION_SEGMENTS", "16"))
+DEFAULT_RETENTION_SECONDS = float(os.getenv("SHERATAN_EVENT_LOG_RETENTION_SECONDS", str(7 * 24 * 3600)))
+
+KIND_STATUS = "status"
+KIND_FINAL = "final"
+_KIND_CODES = {KIND_STATUS: 1, KIND_FINAL: 2}
+_KIND_NAMES = {code: name for name, code in _KIND_CODES.items()}
+
+# payload length, CRC32 of job id + payload, kind, job id length,
+# segment and offset of the job's previous record (-1 if none)
+_RECORD = struct.Struct("<IIBHiI")
+_SEGMENT_SUFFIX = ".seg"
+
+Position = Tuple[int, int]  # (segment id, byte offset)
+
+EVENT_LOG_APPENDS = counter(
+    "sheratan_event_log_appends_total",
+    "Job events appended to the event log",
+    ("kind",),
+)
+EVENT_LOG_FSYNC = histogram(
+    "sheratan_event_log_fsync_seconds",
+    "Duration of event log fsync calls",
+)
+EVENT_LOG_FSYNC_BATCH = histogram(
+    "sheratan_event_log_fsync_batch_size",
+    "Events made durable by one fsync",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096),
+)
+EVENT_LOG_SEGMENTS = gauge(
+    "sheratan_event_log_segments",
+    "Segments currently retained by the event log",
+)
+_APPENDS = {kind: EVENT_LOG_APPENDS.labels(kind) for kind in _KIND_CODES}
+
+
+@dataclass(frozen=True)
+class LoggedEvent:
+    """One record read back from the log; ``payload`` is the event as JSON."""
+
+    segment: int
+    offset: int
+    kind: str
+    job_id: str
+    payload: bytes
+    previous: Optional[Position] = None
+
+    @property
+    def position(self) -> Position:
+        return (self.segment, self.offset)
+
+    def decode(self) -> Dict[str, Any]:
+        return json.loads(self.payload)
+
+
+def _encode(event: Union[RelayStatus, RelayFinal], tenant: Optional[str]) -> bytes:
+    payload = event.model_dump_json(exclude_none=True).encode("utf-8")
+    if tenant:
+        # Kept with the event so the job index can be rebuilt per tenant.
+        payload = payload[:-1] + b',"tenant":' + json.dumps(tenant).encode("utf-8") + b"}"
+    return payload
+
+
+def _segment_path(directory: Path, segment: int) -> Path:
+    return directory / f"{segment:010d}{_SEGMENT_SUFFIX}"
+
+
+def _decode(segment: int, offset: int, header: bytes, data: bytes) -> Optional[LoggedEvent]:
+    length, crc, kind, id_length, prev_segment, prev_offset = _RECORD.unpack(header)
+    if len(data) != id_length + length or kind not in _KIND_NAMES or zlib.crc32(data) != crc:
+        return None
+    return LoggedEvent(
+        segment,
+        offset,
+        _KIND_NAMES[kind],
+        data[:id_length].decode("utf-8"),
+        data[id_length:],
+        (prev_segment, prev_offset) if prev_segment >= 0 else None,
+    )
+
+
+def _read_records(path: Path, segment: int, start: int, end: Optional[int]) -> Iterator[LoggedEvent]:
+    """Decode records of one segment through a read-only memory map.
+
+    Stops at ``end`` (bytes known to be written) or at the first truncated
+    or corrupt record.
+    """
+
+    try:
+        handle = open(path, "rb")
+    except FileNotFoundError:  # removed by retention while we were reading
+        return
+    with handle:
+        size = os.fstat(handle.fileno()).st_size if end is None else end
+        if size <= start:
+            return
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            size = min(size, len(view))
+            offset = start
+            while offset + _RECORD.size <= size:
+                body = offset + _RECORD.size
+                length, _, _, id_length, _, _ = _RECORD.unpack_from(view, offset)
+                record_end = body + id_length + length
+                if record_end > size:
+                    return
+                event = _decode(segment, offset, view[offset:body], view[body:record_end])
+                if event is None:
+                    return
+                yield event
+                offset = record_end
+
+
+class JobEventLog:
+    """Durable job history written as length-prefixed binary records.
+
+    Records go to the active segment file in ``directory``; once it exceeds
+    ``segment_bytes`` a new segment is started and the oldest ones beyond
+    ``retention_segments`` or older than ``retention_seconds`` are deleted.
+    A background thread fsyncs every ``fsync_interval_ms`` so one fsync
+    covers every event appended in that window; with ``0`` each append is
+    fsynced before it returns. Readers scan segments through ``mmap``.
+
+    The in-memory index is sparse: it keeps only the latest position per
+    ``job_id``, and every record points back to the previous record of its
+    job. ``latest()`` is one positioned read and ``events_for()`` follows
+    that chain, so neither touches other jobs' records.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        *,
+        segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+        fsync_interval_ms: float = DEFAULT_FSYNC_INTERVAL_MS,
+        retention_segments: int = DEFAULT_RETENTION_SEGMENTS,
+        retention_seconds: float = DEFAULT_RETENTION_SECONDS,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._directory = Path(directory)
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._segment_bytes = max(_RECORD.size + 1, segment_bytes)
+        self._fsync_interval_s = max(0.0, fsync_interval_ms) / 1000.0
+        self._retention_segments = max(1, retention_segments)
+        self._retention_seconds = retention_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._index: Dict[str, Position] = {}
+        self._read_fds: Dict[int, int] = {}
+        self._segments: List[int] = sorted(
+            int(path.stem) for path in self._directory.glob(f"*{_SEGMENT_SUFFIX}") if path.stem.isdigit()
+        )
+        self._recover()
+        if not self._segments:
+            self._segments.append(0)
+        self._active = self._segments[-1]
+        self._file = open(_segment_path(self._directory, self._active), "ab")
+        self._size = self._file.tell()
+        self._unsynced = 0
+        self._enforce_retention()
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        if self._fsync_interval_s > 0:
+            self._thread = threading.Thread(target=self._run, name="sheratan-event-log-fsync", daemon=True)
+            self._thread.start()
+
+    def _recover(self) -> None:
+        """Rebuild the index and cut a torn record off the last segment."""
+
+        for segment in self._segments:
+            path = _segment_path(self._directory, segment)
+            end = 0
+            for event in _read_records(path, segment, 0, None):
+                self._index[event.job_id] = event.position
+                end = event.offset + _RECORD.size + len(event.job_id.encode("utf-8")) + len(event.payload)
+            if segment == self._segments[-1] and path.stat().st_size > end:
+                with open(path, "r+b") as handle:
+                    handle.truncate(end)
+
+    def __len__(self) -> int:
+        """Number of jobs with at least one retained event."""
+
+        return len(self._index)
+
+    @property
+    def segments(self) -> List[int]:
+        return list(self._segments)
+
+    def append(self, kind: str, job_id: str, payload: bytes) -> Position:
+        job = job_id.encode("utf-8")
+        data = job + payload
+        crc = zlib.crc32(data)
+        code = _KIND_CODES[kind]
+        with self._lock:
+            if self._size and self._size + _RECORD.size + len(data) > self._segment_bytes:
+                self._rotate()
+            prev_segment, prev_offset = self._index.get(job_id, (-1, 0))
+            self._file.write(_RECORD.pack(len(payload), crc, code, len(job), prev_segment, prev_offset) + data)
+            position = (self._active, self._size)
+            self._size += _RECORD.size + len(data)
+            self._unsynced += 1
+            self._index[job_id] = position
+        _APPENDS[kind].inc()
+        if self._thread is None:
+            self.sync()
+        return position
+
+    def append_status(self, event: RelayStatus, tenant: Optional[str] = None) -> Position:
+        return self.append(KIND_STATUS, event.job_id, _encode(event, tenant))
+
+    def append_final(self, event: RelayFinal, tenant: Optional[str] = None) -> Position:
+        return self.append(KIND_FINAL, event.job_id, _encode(event, tenant))
+
+    def sync(self) -> None:
+        """Flush and fsync everything appended so far."""
+
+        with self._lock:
+            if not self._unsynced:
+                return
+            self._file.flush()
+            batch, self._unsynced = self._unsynced, 0
+            # A duplicate descriptor stays valid if a rotation closes the file meanwhile.
+            fd = os.dup(self._file.fileno())
+        try:
+            started = time.perf_counter()
+            os.fsync(fd)
+            EVENT_LOG_FSYNC.observe(time.perf_counter() - started)
+            EVENT_LOG_FSYNC_BATCH.observe(batch)
+        finally:
+            os.close(fd)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._fsync_interval_s):
+            self.sync()
+
+    def _rotate(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        self._unsynced = 0
+        self._active += 1
+        self._segments.append(self._active)
+        self._file = open(_segment_path(self._directory, self._active), "ab")
+        self._size = 0
+        self._enforce_retention()
+
+    def _enforce_retention(self) -> None:
+        cutoff = self._clock() - self._retention_seconds
+        removed = False
+        while len(self._segments) > 1:
+            oldest = self._segments[0]
+            path = _segment_path(self._directory, oldest)
+            try:
+                expired = path.stat().st_mtime < cutoff
+            except FileNotFoundError:
+                expired = True
+            if len(self._segments) <= self._retention_segments and not expired:
+                break
+            path.unlink(missing_ok=True)
+            fd = self._read_fds.pop(self._segments.pop(0), None)
+            if fd is not None:
+                os.close(fd)
+            removed = True
+        if removed:
+            first = self._segments[0]
+            self._index = {job_id: latest for job_id, latest in self._index.items() if latest[0] >= first}
+        EVENT_LOG_SEGMENTS.set(len(self._segments))
+
+    def _readable(self) -> Tuple[List[int], int, int]:
+        with self._lock:
+            self._file.flush()
+            return list(self._segments), self._active, self._size
+
+    def scan(self, start: Optional[Position] = None) -> Iterator[LoggedEvent]:
+        """Yield retained events in append order, optionally from ``start``."""
+
+        segments, active, active_size = self._readable()
+        first_segment, first_offset = start or (segments[0], 0)
+        for segment in segments:
+            if segment < first_segment:
+                continue
+            offset = first_offset if segment == first_segment else 0
+            end = active_size if segment == active else None
+            yield from _read_records(_segment_path(self._directory, segment), segment, offset, end)
+
+    def _read_at(self, position: Position) -> Optional[LoggedEvent]:
+        segment, offset = position
+        with self._lock:
+            if segment < self._segments[0]:
+                return None
+            if segment == self._active:
+                self._file.flush()
+            fd = self._read_fds.get(segment)
+            if fd is None:
+                try:
+                    fd = os.open(_segment_path(self._directory, segment), os.O_RDONLY)
+                except FileNotFoundError:
+                    return None
+                self._read_fds[segment] = fd
+            header = os.pread(fd, _RECORD.size, offset)
+            if len(header) < _RECORD.size:
+                return None
+            length, _, _, id_length, _, _ = _RECORD.unpack(header)
+            data = os.pread(fd, id_length + length, offset + _RECORD.size)
+        return _decode(segment, offset, header, data)
+
+    def latest(self, job_id: str) -> Optional[LoggedEvent]:
+        with self._lock:
+            position = self._index.get(job_id)
+        return None if position is None else self._read_at(position)
+
+    def events_for(self, job_id: str) -> List[LoggedEvent]:
+        """Retained events of ``job_id``, oldest first."""
+
+        events: List[LoggedEvent] = []
+        event = self.latest(job_id)
+        while event is not None and event.job_id == job_id:
+            events.append(event)
+            event = self._read_at(event.previous) if event.previous is not None else None
+        events.reverse()
+        return events
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.sync()
+        with self._lock:
+            self._file.close()
+            for fd in self._read_fds.values():
+                os.close(fd)
+            self._read_fds.clear()
+
+
+def create_event_log() -> Optional[JobEventLog]:
+    """Open the job event log if ``SHERATAN_EVENT_LOG_DIR`` is configured."""
+
+    directory = os.getenv(EVENT_LOG_DIR_ENV, "").strip()
+    if not directory:
+        return None
+    return JobEventLog(
+        Path(directory),
+        segment_bytes=int(os.getenv("SHERATAN_EVENT_LOG_SEGMENT_BYTES", str(DEFAULT_SEGMENT_BYTES))),
+        fsync_interval_ms=float(os.getenv("SHERATAN_EVENT_LOG_FSYNC_MS", str(DEFAULT_FSYNC_INTERVAL_MS))),
+        retention_segments=int(os.getenv("SHERATAN_EVENT_LOG_RETENTION_SEGMENTS", str(DEFAULT_RETENTION_SEGMENTS))),
+        retention_seconds=float(os.getenv("SHERATAN_EVENT_LOG_RETENTION_SECONDS", str(DEFAULT_RETENTION_SECONDS))),
+    )
+
+
+__all__ = [
+    "EVENT_LOG_DIR_ENV",
+    "JobEventLog",
+    "LoggedEvent",
+    "create_event_log",
+]
@@ -0,0 +1,196 @@
+"""Latest known state of relay jobs, kept in memory for status queries."""
+from __future__ import annotations
+
+import os
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .eventlog import KIND_FINAL, JobEventLog, LoggedEvent
+from .metrics import counter, gauge
+from .schemas import RelayFinal, RelayStatus
+
+JOB_STATUS_RUNNING = "running"
+DEFAULT_JOB_INDEX_MAX_ENTRIES = int(os.getenv("SHERATAN_JOB_INDEX_MAX_ENTRIES", "100000"))
+DEFAULT_JOB_INDEX_MAX_AGE_SECONDS = float(os.getenv("SHERATAN_JOB_INDEX_MAX_AGE_SECONDS", str(24 * 3600)))
+
+JOB_INDEX_ENTRIES = gauge(
+    "sheratan_job_index_entries",
+    "Jobs currently held in the in-memory status index",
+)
+JOB_INDEX_EVICTIONS = counter(
+    "sheratan_job_index_evictions_total",
+    "Jobs removed from the status index",
+    ("reason",),
+)
+_EVICTED_LRU = JOB_INDEX_EVICTIONS.labels("lru")
+_EVICTED_EXPIRED = JOB_INDEX_EVICTIONS.labels("expired")
+
+
+@dataclass
+class JobState:
+    """Latest phase, progress and status reported for a job."""
+
+    job_id: str
+    tenant: Optional[str] = None
+    trace_id: Optional[str] = None
+    phase: Optional[str] = None
+    progress: Optional[int] = None
+    status: str = JOB_STATUS_RUNNING
+    ts: Optional[str] = None
+    updated_at: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class JobIndex:
+    """LRU map from ``job_id`` to its latest :class:`JobState`.
+
+    Entries are kept in update order, so the least recently updated job is
+    evicted first once ``max_entries`` is reached, and jobs not updated for
+    ``max_age_seconds`` form a prefix that is dropped on the next write.
+    Jobs without a final callback report ``status="running"``; status
+    updates that arrive after the final callback are ignored.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_JOB_INDEX_MAX_ENTRIES,
+        max_age_seconds: float = DEFAULT_JOB_INDEX_MAX_AGE_SECONDS,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._max_entries = max(1, max_entries)
+        self._max_age_seconds = max_age_seconds
+        self._clock = clock
+        self._jobs: "OrderedDict[str, JobState]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def _expire(self, now: float) -> None:
+        cutoff = now - self._max_age_seconds
+        jobs = self._jobs
+        expired = 0
+        while jobs:
+            oldest = next(iter(jobs.values()))
+            if oldest.updated_at >= cutoff:
+                break
+            del jobs[oldest.job_id]
+            expired += 1
+        if expired:
+            _EVICTED_EXPIRED.inc(expired)
+            JOB_INDEX_ENTRIES.set(len(jobs))
+
+    def _touch(self, job_id: str, tenant: Optional[str]) -> JobState:
+        now = self._clock()
+        self._expire(now)
+        state = self._jobs.get(job_id)
+        if state is None:
+            state = JobState(job_id)
+            self._jobs[job_id] = state
+            if len(self._jobs) > self._max_entries:
+                self._jobs.popitem(last=False)
+                _EVICTED_LRU.inc()
+            JOB_INDEX_ENTRIES.set(len(self._jobs))
+        else:
+            self._jobs.move_to_end(job_id)
+        state.updated_at = now
+        if tenant:
+            state.tenant = tenant
+        return state
+
+    def apply_status(self, event: RelayStatus, tenant: Optional[str] = None) -> JobState:
+        known = self._jobs.get(event.job_id)
+        if known is not None and known.status != JOB_STATUS_RUNNING:
+            return known
+        state = self._touch(event.job_id, tenant)
+        state.trace_id = event.trace_id or state.trace_id
+        if event.phase is not None:
+            state.phase = event.phase
+        if event.progress is not None:
+            state.progress = event.progress
+        state.ts = event.ts or state.ts
+        return state
+
+    def apply_final(self, event: RelayFinal, tenant: Optional[str] = None) -> JobState:
+        state = self._touch(event.job_id, tenant)
+        state.trace_id = event.trace_id or state.trace_id
+        state.status = event.status
+        state.ts = event.ts or state.ts
+        return state
+
+    def get(self, job_id: str) -> Optional[JobState]:
+        state = self._jobs.get(job_id)
+        if state is None or state.updated_at < self._clock() - self._max_age_seconds:
+            return None
+        return state
+
+    def query(
+        self,
+        status: Optional[str] = None,
+        tenant: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 50,
+    ) -> Tuple[List[JobState], Optional[int]]:
+        """Page through jobs, most recently updated first.
+
+        Returns the page and the offset of the next page (``None`` at the end).
+        """
+
+        self._expire(self._clock())
+        page: List[JobState] = []
+        skipped = 0
+        for state in reversed(self._jobs.values()):
+            if status is not None and state.status != status:
+                continue
+            if tenant is not None and state.tenant != tenant:
+                continue
+            if skipped < offset:
+                skipped += 1
+                continue
+            if len(page) == limit:
+                return page, offset + limit
+            page.append(state)
+        return page, None
+
+    def rebuild(self, events: Iterable[LoggedEvent]) -> int:
+        """Replay persisted events in log order; returns the number applied."""
+
+        applied = 0
+        for event in events:
+            data = event.decode()
+            tenant = data.pop("tenant", None)
+            if event.kind == KIND_FINAL:
+                self.apply_final(RelayFinal(**data), tenant)
+            else:
+                self.apply_status(RelayStatus(**data), tenant)
+            applied += 1
+        return applied
+
+    def clear(self) -> None:
+        self._jobs.clear()
+        JOB_INDEX_ENTRIES.set(0)
+
+
+def create_job_index(event_log: Optional[JobEventLog] = None) -> JobIndex:
+    """Create the job index and rebuild it from ``event_log`` if one is open."""
+
+    index = JobIndex(
+        max_entries=int(os.getenv("SHERATAN_JOB_INDEX_MAX_ENTRIES", str(DEFAULT_JOB_INDEX_MAX_ENTRIES))),
+        max_age_seconds=float(
+            os.getenv("SHERATAN_JOB_INDEX_MAX_AGE_SECONDS", str(DEFAULT_JOB_INDEX_MAX_AGE_SECONDS))
+        ),
+    )
+    if event_log is not None:
+        index.rebuild(event_log.scan())
+    return index
+
+
+__all__ = [
+    "JOB_STATUS_RUNNING",
+    "JobIndex",
+    "JobState",
+    "create_job_index",
+]
@@ -0,0 +1,188 @@
+"""Prometheus instrumentation for Sheratan Core."""
+from __future__ import annotations
+
+import os
+import time
+from typing import Any, Dict, Set, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import get_settings
+
+try:  # pragma: no cover - exercised implicitly when the dependency is present
+    from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+except ImportError:  # pragma: no cover - metrics are optional
+    CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+    Counter = Gauge = Histogram = None  # type: ignore[assignment,misc]
+    generate_latest = None  # type: ignore[assignment]
+
+METRICS_ENABLED = get_settings().metrics_enabled and generate_latest is not None
+
+
+class _NoopMetric:
+    """Stand-in used when ``prometheus_client`` is unavailable or metrics are disabled."""
+
+    def labels(self, *args: Any, **kwargs: Any) -> "_NoopMetric":
+        return self
+
+    def inc(self, amount: float = 1) -> None:
+        return None
+
+    def dec(self, amount: float = 1) -> None:
+        return None
+
+    def set(self, value: float) -> None:
+        return None
+
+    def observe(self, value: float) -> None:
+        return None
+
+
+def counter(name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Any:
+    """Create a Prometheus counter, or a no-op stand-in when metrics are off."""
+
+    if not METRICS_ENABLED:
+        return _NoopMetric()
+    return Counter(name, documentation, labelnames)
+
+
+def gauge(name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Any:
+    """Create a Prometheus gauge, or a no-op stand-in when metrics are off."""
+
+    if not METRICS_ENABLED:
+        return _NoopMetric()
+    return Gauge(name, documentation, labelnames)
+
+
+def histogram(
+    name: str,
+    documentation: str,
+    labelnames: tuple[str, ...] = (),
+    buckets: tuple[float, ...] | None = None,
+) -> Any:
+    """Create a Prometheus histogram, or a no-op stand-in when metrics are off."""
+
+    if not METRICS_ENABLED:
+        return _NoopMetric()
+    if buckets is None:
+        return Histogram(name, documentation, labelnames)
+    return Histogram(name, documentation, labelnames, buckets=buckets)
+
+
+def buckets_from_env(name: str, default: tuple[float, ...]) -> tuple[float, ...]:
+    """Histogram buckets from a comma-separated env var, e.g. ``0.1,0.5,1,5``."""
+
+    raw = os.getenv(name, "").strip()
+    if not raw:
+        return default
+    try:
+        buckets = tuple(sorted({float(part) for part in raw.split(",") if part.strip()}))
+    except ValueError:
+        return default
+    return buckets or default
+
+
+REQUEST_DURATION = histogram(
+    "sheratan_api_request_duration_seconds",
+    "Latency of API requests",
+    ("method", "path", "status"),
+)
+REQUEST_ERRORS = counter(
+    "sheratan_api_request_errors_total",
+    "API requests answered with a 4xx/5xx status",
+    ("method", "path", "status"),
+)
+
+LLM_STREAM_TTFB = histogram(
+    "sheratan_llm_stream_ttfb_seconds",
+    "Time from accepting a stream request to relaying its first chunk",
+    ("format",),
+)
+
+
+UNMATCHED_PATH_LABEL = "__unmatched__"
+DEFAULT_MAX_UNMATCHED_PATHS = int(os.getenv("SHERATAN_METRICS_MAX_UNMATCHED_PATHS", "50"))
+_KNOWN_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+
+
+class ApiMetricsMiddleware:
+    """Record request latency and error counts per route template.
+
+    A plain ASGI middleware: it only watches ``http.response.start`` for the
+    status, so responses are neither buffered nor run in an extra task.
+    Paths are labelled with the matched route template (``/api/v1/jobs/{job_id}``).
+    Requests that match no route keep their raw path for the first
+    ``max_unmatched_paths`` distinct paths and share ``__unmatched__``
+    afterwards, so scanners cannot grow the series count without bound.
+    Bound label children are cached per ``(method, path, status)``.
+    """
+
+    def __init__(self, app: ASGIApp, max_unmatched_paths: int = DEFAULT_MAX_UNMATCHED_PATHS) -> None:
+        self.app = app
+        self._max_unmatched_paths = max_unmatched_paths
+        self._unmatched_paths: Set[str] = set()
+        self._children: Dict[Tuple[str, str, int], Tuple[Any, Any]] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter_ns()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter_ns() - start
+            duration, errors = self._children_for(scope, status)
+            duration.observe(elapsed / 1e9)
+            if errors is not None:
+                errors.inc()
+
+    def _path_label(self, scope: Scope) -> str:
+        path = getattr(scope.get("route"), "path", None)
+        if path:
+            return path
+        path = scope["path"]
+        if path in self._unmatched_paths:
+            return path
+        if len(self._unmatched_paths) < self._max_unmatched_paths:
+            self._unmatched_paths.add(path)
+            return path
+        return UNMATCHED_PATH_LABEL
+
+    def _children_for(self, scope: Scope, status: int) -> Tuple[Any, Any]:
+        method = scope["method"]
+        if method not in _KNOWN_METHODS:
+            method = "OTHER"
+        key = (method, self._path_label(scope), status)
+        children = self._children.get(key)
+        if children is None:
+            labels = (key[0], key[1], str(status))
+            children = (
+                REQUEST_DURATION.labels(*labels),
+                REQUEST_ERRORS.labels(*labels) if status >= 400 else None,
+            )
+            self._children[key] = children
+        return children
+
+
+__all__ = [
+    "CONTENT_TYPE_LATEST",
+    "METRICS_ENABLED",
+    "UNMATCHED_PATH_LABEL",
+    "ApiMetricsMiddleware",
+    "LLM_STREAM_TTFB",
+    "buckets_from_env",
+    "counter",
+    "gauge",
+    "generate_latest",
+    "histogram",
+]
@@ -1,19 +1,37 @@
 """Orchestrator utilities."""
 
+from .async_idempotency import (
+    AsyncIdempotencyStore,
+    AsyncStoreAdapter,
+    ExecutorIdempotencyStore,
+    WriterThreadIdempotencyStore,
+    as_async_store,
+)
+from .compact_idempotency import CompactIdempotencyStore
 from .idempotency import (
     DEFAULT_IDEMPOTENCY_TTL_SECONDS,
     InMemoryIdempotencyStore,
     SQLiteIdempotencyStore,
+    ShardedIdempotencyStore,
     create_idempotency_store,
     IdempotencyConflictError,
     IdempotencyStore,
 )
+from .shared_idempotency import SharedMemoryIdempotencyStore
 
 __all__ = [
+    "AsyncIdempotencyStore",
+    "AsyncStoreAdapter",
+    "ExecutorIdempotencyStore",
+    "WriterThreadIdempotencyStore",
+    "as_async_store",
+    "CompactIdempotencyStore",
     "DEFAULT_IDEMPOTENCY_TTL_SECONDS",
     "IdempotencyStore",
     "InMemoryIdempotencyStore",
     "SQLiteIdempotencyStore",
+    "ShardedIdempotencyStore",
+    "SharedMemoryIdempotencyStore",
     "IdempotencyConflictError",
     "create_idempotency_store",
 ]
@@ -0,0 +1,165 @@
+"""Async access to idempotency stores without blocking the event loop."""
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Protocol, Sequence, Tuple
+
+from .idempotency import IdempotencyReservation, IdempotencyStore, ReservationResult
+
+
+class AsyncIdempotencyStore(Protocol):
+    """Async counterpart of :class:`~.idempotency.IdempotencyStore`."""
+
+    async def reserve(self, key: str, fingerprint: str, timestamp: int) -> IdempotencyReservation:
+        """Same contract as ``IdempotencyStore.reserve``."""
+
+    async def reserve_many(self, requests: Sequence[Tuple[str, str, int]]) -> List[ReservationResult]:
+        """Reserve ``(key, fingerprint, timestamp)`` tuples in order.
+
+        Each slot holds the reservation or the exception raised for it.
+        """
+
+    def clear(self) -> None:
+        """Remove all stored reservations (used for testing)."""
+
+    def close(self) -> None:
+        """Release threads and connections held by the store."""
+
+
+class AsyncStoreAdapter:
+    """Expose an in-memory store through the async protocol.
+
+    In-memory reservations are a dict lookup under a short lock, so they
+    run inline; the adapter only adds the coroutine frame.
+    """
+
+    def __init__(self, store: IdempotencyStore) -> None:
+        self.store = store
+        self._reserve = store.reserve
+
+    async def reserve(self, key: str, fingerprint: str, timestamp: int) -> IdempotencyReservation:
+        return self._reserve(key, fingerprint, timestamp)
+
+    async def reserve_many(self, requests: Sequence[Tuple[str, str, int]]) -> List[ReservationResult]:
+        results: List[ReservationResult] = []
+        for key, fingerprint, timestamp in requests:
+            try:
+                results.append(self._reserve(key, fingerprint, timestamp))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def clear(self) -> None:
+        self.store.clear()
+
+    def close(self) -> None:
+        close = getattr(self.store, "close", None)
+        if callable(close):
+            close()
+
+
+class ExecutorIdempotencyStore(AsyncStoreAdapter):
+    """Run a blocking store's reservations on a small thread pool.
+
+    For stores whose ``reserve`` can wait on locks held by other processes
+    (the shared-memory table), so contention never stalls the event loop.
+    ``reserve_many`` runs its whole batch in one pool call.
+    """
+
+    def __init__(self, store: IdempotencyStore, max_workers: int = 4) -> None:
+        super().__init__(store)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sheratan-idempotency")
+
+    async def reserve(self, key: str, fingerprint: str, timestamp: int) -> IdempotencyReservation:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._reserve, key, fingerprint, timestamp)
+
+    async def reserve_many(self, requests: Sequence[Tuple[str, str, int]]) -> List[ReservationResult]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._reserve_all, list(requests))
+
+    def _reserve_all(self, requests: Sequence[Tuple[str, str, int]]) -> List[ReservationResult]:
+        results: List[ReservationResult] = []
+        for key, fingerprint, timestamp in requests:
+            try:
+                results.append(self._reserve(key, fingerprint, timestamp))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        super().close()
+
+
+class WriterThreadIdempotencyStore:
+    """Await reservations decided by a store's own writer thread.
+
+    ``store.submit`` queues each request for the thread that owns the
+    store's connection; a burst of callbacks queued back to back shares
+    one transaction there. Results are posted back to the caller's loop
+    with ``call_soon_threadsafe``, so the same code path serves sync
+    ``reserve`` calls and the API without a second thread.
+    """
+
+    def __init__(self, store: Any) -> None:
+        self.store = store
+
+    def _submit(self, key: str, fingerprint: str, timestamp: int) -> "asyncio.Future[ReservationResult]":
+        loop = asyncio.get_running_loop()
+        future: "asyncio.Future[ReservationResult]" = loop.create_future()
+
+        def deliver(result: ReservationResult) -> None:
+            try:
+                loop.call_soon_threadsafe(_resolve, future, result)
+            except RuntimeError:
+                # The caller's loop is closed; nobody is waiting any more.
+                pass
+
+        self.store.submit(key, fingerprint, timestamp, deliver)
+        return future
+
+    async def reserve(self, key: str, fingerprint: str, timestamp: int) -> IdempotencyReservation:
+        result = await self._submit(key, fingerprint, timestamp)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    async def reserve_many(self, requests: Sequence[Tuple[str, str, int]]) -> List[ReservationResult]:
+        futures = [self._submit(key, fingerprint, timestamp) for key, fingerprint, timestamp in requests]
+        return list(await asyncio.gather(*futures))
+
+    def clear(self) -> None:
+        self.store.clear()
+
+    def close(self) -> None:
+        self.store.close()
+
+
+def _resolve(future: "asyncio.Future[ReservationResult]", result: ReservationResult) -> None:
+    if not future.done():
+        future.set_result(result)
+
+
+def as_async_store(store: Any) -> AsyncIdempotencyStore:
+    """Wrap ``store`` for async callers.
+
+    Stores with their own writer thread are awaited via ``submit``, other
+    blocking stores run on a thread pool, and in-memory stores run inline.
+    """
+
+    if not getattr(store, "blocking", False):
+        return AsyncStoreAdapter(store)
+    if callable(getattr(store, "submit", None)):
+        return WriterThreadIdempotencyStore(store)
+    return ExecutorIdempotencyStore(store)
+
+
+__all__ = [
+    "AsyncIdempotencyStore",
+    "AsyncStoreAdapter",
+    "ExecutorIdempotencyStore",
+    "WriterThreadIdempotencyStore",
+    "as_async_store",
+]
@@ -0,0 +1,163 @@
+"""Bloom filters used as a negative cache in front of persistent stores."""
+from __future__ import annotations
+
+import math
+from typing import Tuple
+
+from ..metrics import counter, gauge
+
+BLOOM_CHECKS = counter(
+    "sheratan_idempotency_bloom_checks_total",
+    "Bloom filter lookups by outcome (negative skips the table read)",
+    ("result",),
+)
+BLOOM_FALSE_POSITIVE_RATE = gauge(
+    "sheratan_idempotency_bloom_false_positive_rate",
+    "Observed share of absent keys the Bloom filter reported as present",
+)
+BLOOM_ESTIMATED_FPR = gauge(
+    "sheratan_idempotency_bloom_estimated_fpr",
+    "False-positive rate estimated from the fill ratio of the current filter",
+)
+BLOOM_BYTES = gauge(
+    "sheratan_idempotency_bloom_bytes",
+    "Memory held by the Bloom filter bit arrays",
+)
+_NEGATIVE = BLOOM_CHECKS.labels("negative")
+_TRUE_POSITIVE = BLOOM_CHECKS.labels("true_positive")
+_FALSE_POSITIVE = BLOOM_CHECKS.labels("false_positive")
+# Gauges derived from counts are refreshed every N updates, not per lookup.
+_GAUGE_REFRESH_EVERY = 256
+
+
+_MASK64 = (1 << 64) - 1
+
+
+def _hashes(key: str) -> Tuple[int, int]:
+    # The filters live in one process and are rebuilt at startup, so the
+    # (per-process salted, cached on the str) built-in hash is sufficient.
+    value = hash(key) & _MASK64
+    return value, ((value * 0x9E3779B97F4A7C15) & _MASK64) >> 1 | 1
+
+
+class BloomFilter:
+    """Classic Bloom filter sized for ``capacity`` keys at ``fpr`` false positives."""
+
+    __slots__ = ("_bits", "_size", "_hash_count", "_count")
+
+    def __init__(self, capacity: int, fpr: float = 0.01) -> None:
+        if capacity < 1 or not 0 < fpr < 1:
+            raise ValueError("capacity must be positive and 0 < fpr < 1")
+        size = max(64, math.ceil(-capacity * math.log(fpr) / (math.log(2) ** 2)))
+        self._size = size
+        self._hash_count = max(1, round(size / capacity * math.log(2)))
+        self._bits = bytearray((size + 7) // 8)
+        self._count = 0
+
+    def add(self, key: str) -> None:
+        self.add_hashed(*_hashes(key))
+
+    def add_hashed(self, h: int, step: int) -> None:
+        size, bits = self._size, self._bits
+        for _ in range(self._hash_count):
+            pos = h % size
+            bits[pos >> 3] |= 1 << (pos & 7)
+            h += step
+        self._count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return self.contains_hashed(*_hashes(key))
+
+    def contains_hashed(self, h: int, step: int) -> bool:
+        size, bits = self._size, self._bits
+        for _ in range(self._hash_count):
+            pos = h % size
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+            h += step
+        return True
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._bits)
+
+    def estimated_fpr(self) -> float:
+        # (1 - e^(-k n / m))^k, the standard estimate for n inserted keys.
+        return (1 - math.exp(-self._hash_count * self._count / self._size)) ** self._hash_count
+
+
+class RotatingBloomFilter:
+    """Two Bloom filters covering consecutive TTL-long generations.
+
+    Keys go into the filter of the generation their timestamp falls into;
+    lookups consult the current and the previous generation. A key stays
+    visible for at least ``period`` seconds after its timestamp, after which
+    it has expired anyway, so the filters never need deleting.
+    """
+
+    def __init__(self, capacity: int, fpr: float, period: int, now: int = 0) -> None:
+        self._capacity = capacity
+        self._fpr = fpr
+        self._period = max(1, period)
+        self._generation = now // self._period
+        self._current = BloomFilter(capacity, fpr)
+        self._previous = BloomFilter(capacity, fpr)
+        self._negatives = 0
+        self._false_positives = 0
+        BLOOM_BYTES.set(self.nbytes)
+
+    @property
+    def nbytes(self) -> int:
+        return self._current.nbytes + self._previous.nbytes
+
+    def _advance(self, timestamp: int) -> None:
+        generation = timestamp // self._period
+        if generation <= self._generation:
+            return
+        if generation == self._generation + 1:
+            self._previous = self._current
+        else:
+            self._previous = BloomFilter(self._capacity, self._fpr)
+        self._current = BloomFilter(self._capacity, self._fpr)
+        self._generation = generation
+
+    def add(self, key: str, timestamp: int) -> None:
+        self._advance(timestamp)
+        hashes = _hashes(key)
+        if timestamp // self._period < self._generation:
+            self._previous.add_hashed(*hashes)
+        else:
+            self._current.add_hashed(*hashes)
+            if len(self._current) % _GAUGE_REFRESH_EVERY == 0:
+                BLOOM_ESTIMATED_FPR.set(self._current.estimated_fpr())
+
+    def might_contain(self, key: str, timestamp: int) -> bool:
+        self._advance(timestamp)
+        hashes = _hashes(key)
+        present = self._current.contains_hashed(*hashes) or self._previous.contains_hashed(*hashes)
+        if not present:
+            self._negatives += 1
+            _NEGATIVE.inc()
+            if self._negatives % _GAUGE_REFRESH_EVERY == 0:
+                BLOOM_FALSE_POSITIVE_RATE.set(self.false_positive_rate())
+        return present
+
+    def record_lookup(self, found: bool) -> None:
+        """Report whether a key the filter passed through was really stored."""
+
+        if found:
+            _TRUE_POSITIVE.inc()
+            return
+        self._false_positives += 1
+        _FALSE_POSITIVE.inc()
+        BLOOM_FALSE_POSITIVE_RATE.set(self.false_positive_rate())
+
+    def false_positive_rate(self) -> float:
+        absent = self._negatives + self._false_positives
+        return self._false_positives / absent if absent else 0.0
+
+
+__all__ = ["BloomFilter", "RotatingBloomFilter"]
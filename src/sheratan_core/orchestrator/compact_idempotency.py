@@ -0,0 +1,130 @@
+"""Array-backed idempotency store for millions of keys."""
+from __future__ import annotations
+
+import hashlib
+import math
+import threading
+from array import array
+from typing import Tuple
+
+from .idempotency import (
+    DEFAULT_IDEMPOTENCY_TTL_SECONDS,
+    DEFAULT_MAX_INMEMORY_ENTRIES,
+    IdempotencyConflictError,
+    IdempotencyReservation,
+)
+
+DEFAULT_PROBE_WINDOW = 32
+_LOAD_FACTOR = 0.75
+_MAX_TIMESTAMP = 2**32 - 1
+_MASK64 = (1 << 64) - 1
+# Reservations are immutable, so every call can share these two.
+_CREATED = IdempotencyReservation(created=True)
+_DUPLICATE = IdempotencyReservation(created=False)
+
+
+def _digest(value: str) -> Tuple[int, int]:
+    digest = int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=16).digest(), "little")
+    return digest & _MASK64, digest >> 64
+
+
+class CompactIdempotencyStore:
+    """Open-addressing table of fixed-width digests in preallocated arrays.
+
+    Each slot stores the 16-byte BLAKE2b digest of the key and of the
+    fingerprint as two 64-bit words each plus a 32-bit timestamp, i.e.
+    36 bytes, in five parallel :class:`array.array` columns sized for
+    ``max_entries`` at a 75% load factor (48 bytes per entry). Lookups probe at most
+    ``probe_window`` slots from the key's home slot; expired slots are
+    reused in place and a window holding only live entries overwrites its
+    oldest slot, so capacity pressure evicts the oldest keys like the LRU
+    store does. Conflicts are detected on the fingerprint digests.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int = DEFAULT_IDEMPOTENCY_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_INMEMORY_ENTRIES,
+        probe_window: int = DEFAULT_PROBE_WINDOW,
+    ) -> None:
+        slots = max(1, math.ceil(max_entries / _LOAD_FACTOR))
+        self._ttl_seconds = ttl_seconds
+        self._slots = slots
+        self._window = max(1, min(probe_window, slots))
+        self._key_hi = array("Q", bytes(8 * slots))
+        self._key_lo = array("Q", bytes(8 * slots))
+        self._fp_hi = array("Q", bytes(8 * slots))
+        self._fp_lo = array("Q", bytes(8 * slots))
+        self._timestamps = array("I", bytes(4 * slots))
+        self._occupied = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Slots in use, including expired ones not yet reused."""
+
+        return self._occupied
+
+    @property
+    def capacity(self) -> int:
+        return self._slots
+
+    @property
+    def nbytes(self) -> int:
+        columns = (self._key_hi, self._key_lo, self._fp_hi, self._fp_lo, self._timestamps)
+        return sum(column.itemsize * len(column) for column in columns)
+
+    def reserve(self, key: str, fingerprint: str, timestamp: int) -> IdempotencyReservation:
+        key_hi, key_lo = _digest(key)
+        fp_hi, fp_lo = _digest(fingerprint)
+        if not 0 < timestamp <= _MAX_TIMESTAMP:
+            timestamp = 1 if timestamp <= 0 else _MAX_TIMESTAMP
+        cutoff = timestamp - self._ttl_seconds
+        slots = self._slots
+        keys_hi, keys_lo, timestamps = self._key_hi, self._key_lo, self._timestamps
+        with self._lock:
+            reusable = -1
+            oldest = -1
+            index = key_hi % slots
+            for _ in range(self._window):
+                stored_ts = timestamps[index]
+                if stored_ts == 0:
+                    # Slots are never emptied again, so the chain ends here.
+                    if reusable < 0:
+                        reusable = index
+                        self._occupied += 1
+                    break
+                if keys_hi[index] == key_hi and keys_lo[index] == key_lo:
+                    if stored_ts >= cutoff:
+                        if self._fp_hi[index] != fp_hi or self._fp_lo[index] != fp_lo:
+                            raise IdempotencyConflictError(key)
+                        return _DUPLICATE
+                    if reusable < 0:
+                        reusable = index
+                    break
+                if stored_ts < cutoff:
+                    if reusable < 0:
+                        reusable = index
+                elif oldest < 0 or stored_ts < timestamps[oldest]:
+                    oldest = index
+                index += 1
+                if index == slots:
+                    index = 0
+            if reusable < 0:
+                reusable = oldest
+            keys_hi[reusable] = key_hi
+            keys_lo[reusable] = key_lo
+            self._fp_hi[reusable] = fp_hi
+            self._fp_lo[reusable] = fp_lo
+            timestamps[reusable] = timestamp
+            return _CREATED
+
+    def clear(self) -> None:
+        with self._lock:
+            slots = self.capacity
+            for column in (self._key_hi, self._key_lo, self._fp_hi, self._fp_lo):
+                column[:] = array("Q", bytes(8 * slots))
+            self._timestamps[:] = array("I", bytes(4 * slots))
+            self._occupied = 0
+
+
+__all__ = ["CompactIdempotencyStore"]
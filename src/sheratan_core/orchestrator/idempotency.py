@@ -1,17 +1,35 @@
 """Idempotency storage for relay callbacks."""
 from __future__ import annotations
 
+import heapq
+import math
 import os
+import queue
 import sqlite3
 import threading
+import time
 from collections import OrderedDict
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Protocol
+from typing import Callable, List, Optional, Protocol, Sequence, Tuple, Union
+
+from ..metrics import histogram
+from .bloom import RotatingBloomFilter
 
 DEFAULT_IDEMPOTENCY_TTL_SECONDS = int(os.getenv("SHERATAN_IDEMPOTENCY_TTL_SECONDS", "900"))
 DEFAULT_MAX_INMEMORY_ENTRIES = int(os.getenv("SHERATAN_IDEMPOTENCY_MAX_ENTRIES", "2048"))
+DEFAULT_IDEMPOTENCY_SHARDS = int(os.getenv("SHERATAN_IDEMPOTENCY_SHARDS", "1"))
+DEFAULT_SQLITE_VIEW_MAX_ENTRIES = int(os.getenv("SHERATAN_IDEMPOTENCY_SQLITE_VIEW_MAX_ENTRIES", "65536"))
 SQLITE_PATH_ENV = "SHERATAN_IDEMPOTENCY_SQLITE_PATH"
+SHM_NAME_ENV = "SHERATAN_IDEMPOTENCY_SHM_NAME"
+COMPACT_ENV = "SHERATAN_IDEMPOTENCY_COMPACT"
+_SQLITE_SYNCHRONOUS_MODES = ("OFF", "NORMAL", "FULL", "EXTRA")
+
+COMMIT_BATCH_SIZE = histogram(
+    "sheratan_idempotency_commit_batch_size",
+    "Reservations written per SQLite group commit",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512),
+)
 
 
 class IdempotencyConflictError(RuntimeError):
@@ -29,6 +47,10 @@ class IdempotencyReservation:
     created: bool
 
 
+# A reservation, or the exception ``reserve`` raises for it.
+ReservationResult = Union[IdempotencyReservation, Exception]
+
+
 class IdempotencyStore(Protocol):
     """Storage backend contract for idempotency reservations."""
 
@@ -46,18 +68,39 @@ class IdempotencyStore(Protocol):
 
 
 class InMemoryIdempotencyStore:
-    """LRU idempotency cache backed by an :class:`OrderedDict`."""
+    """LRU idempotency cache backed by an :class:`OrderedDict`.
+
+    Expiry is driven by a min-heap of ``(timestamp, key)`` so ``reserve`` only
+    touches entries that actually expired (amortized ``O(log n)``) instead of
+    scanning the whole cache. Heap items whose entry was evicted or replaced
+    are skipped lazily and the heap is rebuilt once stale items dominate.
+    """
 
     def __init__(self, ttl_seconds: int = DEFAULT_IDEMPOTENCY_TTL_SECONDS, max_entries: int = DEFAULT_MAX_INMEMORY_ENTRIES) -> None:
         self._ttl_seconds = ttl_seconds
         self._max_entries = max_entries
         self._entries: "OrderedDict[str, tuple[str, int]]" = OrderedDict()
+        self._expiry: List[Tuple[int, str]] = []
         self._lock = threading.Lock()
 
+    def __len__(self) -> int:
+        return len(self._entries)
+
     def _evict_expired(self, cutoff: int) -> None:
-        keys_to_delete = [k for k, (_, ts) in self._entries.items() if ts < cutoff]
-        for key in keys_to_delete:
-            self._entries.pop(key, None)
+        expiry = self._expiry
+        entries = self._entries
+        while expiry and expiry[0][0] < cutoff:
+            timestamp, key = heapq.heappop(expiry)
+            record = entries.get(key)
+            if record is not None and record[1] == timestamp:
+                del entries[key]
+
+    def _compact(self) -> None:
+        # Capacity evictions leave stale heap items behind; rebuild before
+        # they outnumber live entries so the heap stays O(max_entries).
+        if len(self._expiry) > 2 * len(self._entries) + 64:
+            self._expiry = [(ts, key) for key, (_, ts) in self._entries.items()]
+            heapq.heapify(self._expiry)
 
     def reserve(self, key: str, fingerprint: str, timestamp: int) -> IdempotencyReservation:
         cutoff = timestamp - self._ttl_seconds
@@ -74,26 +117,152 @@ class InMemoryIdempotencyStore:
                 return IdempotencyReservation(created=False)
 
             self._entries[key] = (fingerprint, timestamp)
-            self._entries.move_to_end(key)
+            heapq.heappush(self._expiry, (timestamp, key))
             while len(self._entries) > self._max_entries:
                 self._entries.popitem(last=False)
+            self._compact()
             return IdempotencyReservation(created=True)
 
     def clear(self) -> None:
         with self._lock:
             self._entries.clear()
+            self._expiry.clear()
+
+
+class ShardedIdempotencyStore:
+    """In-memory store split into independently locked shards.
+
+    Keys are partitioned by hash, so threads reserving different keys rarely
+    wait on the same lock. Each shard is an :class:`InMemoryIdempotencyStore`
+    with its own LRU and expiry heap; ``max_entries`` is divided evenly
+    between them, which makes capacity eviction per shard rather than
+    strictly global LRU.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int = DEFAULT_IDEMPOTENCY_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_INMEMORY_ENTRIES,
+        shards: int = 16,
+    ) -> None:
+        if shards < 1:
+            raise ValueError("shards must be at least 1")
+        per_shard = max(1, -(-max_entries // shards))
+        self._shards = [InMemoryIdempotencyStore(ttl_seconds, per_shard) for _ in range(shards)]
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self._shards)
+
+    def _shard(self, key: str) -> InMemoryIdempotencyStore:
+        return self._shards[hash(key) % len(self._shards)]
+
+    def reserve(self, key: str, fingerprint: str, timestamp: int) -> IdempotencyReservation:
+        return self._shard(key).reserve(key, fingerprint, timestamp)
+
+    def clear(self) -> None:
+        for shard in self._shards:
+            shard.clear()
+
+
+# Inserts a new key or takes over an expired one; leaves live rows alone so
+# concurrent writers (other workers) cannot both win the same key.
+_UPSERT_SQL = """
+    INSERT INTO idempotency_records(key, fingerprint, timestamp) VALUES (?, ?, ?)
+    ON CONFLICT(key) DO UPDATE SET fingerprint = excluded.fingerprint, timestamp = excluded.timestamp
+    WHERE idempotency_records.timestamp < ?
+"""
+
+
+class _Reservation:
+    __slots__ = ("key", "fingerprint", "timestamp", "callback")
+
+    def __init__(
+        self, key: str, fingerprint: str, timestamp: int, callback: Callable[[ReservationResult], None]
+    ) -> None:
+        self.key = key
+        self.fingerprint = fingerprint
+        self.timestamp = timestamp
+        self.callback = callback
+
+
+class _Waiter:
+    """Callback that hands a reservation result to a blocked thread."""
+
+    __slots__ = ("done", "result")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Optional[ReservationResult] = None
+
+    def __call__(self, result: ReservationResult) -> None:
+        self.result = result
+        self.done.set()
+
+    def wait(self) -> ReservationResult:
+        self.done.wait()
+        assert self.result is not None
+        return self.result
+
+
+_QueueItem = Union[_Reservation, Callable[[], None], None]
 
 
 class SQLiteIdempotencyStore:
-    """Persistent idempotency cache backed by SQLite."""
+    """Persistent idempotency cache backed by SQLite.
+
+    One background thread owns the connection: it decides and writes every
+    reservation, purges expired rows and clears the table, so the store
+    never competes with itself for the SQLite write lock. Reservations are
+    queued with :meth:`submit` (``reserve`` and ``reserve_many`` wait on
+    it); the thread drains the queue into one transaction per batch, waiting
+    up to ``group_commit_ms`` after the first request for more, capped at
+    ``group_commit_max`` rows. Callers are answered only after their batch
+    committed, including duplicates of a key that is still pending, which
+    are decided in queue order behind it. The last ``view_max_entries`` keys
+    this store committed are kept in an in-memory view in commit order, so
+    repeats of them are answered without a queue round trip; older keys fall
+    back to the table. Expired rows are purged every ``purge_interval_s``
+    using the ``timestamp`` index rather than on every call, and expired view
+    entries are dropped from its front.
+
+    With ``bloom_capacity > 0`` a :class:`~.bloom.RotatingBloomFilter` sized
+    for that many keys per TTL window is rebuilt from the table at startup.
+    Keys it has never seen skip the ``SELECT`` and go straight to the
+    conditional insert, which still resolves keys written by other workers.
+    """
 
-    def __init__(self, path: Path, ttl_seconds: int = DEFAULT_IDEMPOTENCY_TTL_SECONDS) -> None:
+    # ``reserve`` blocks until the writer thread committed; async callers
+    # should use ``submit`` instead.
+    blocking = True
+
+    def __init__(
+        self,
+        path: Path,
+        ttl_seconds: int = DEFAULT_IDEMPOTENCY_TTL_SECONDS,
+        *,
+        group_commit_ms: float = 0.0,
+        group_commit_max: int = 256,
+        synchronous: str = "FULL",
+        wal_autocheckpoint: int = 1000,
+        purge_interval_s: float = 30.0,
+        bloom_capacity: int = 0,
+        bloom_fpr: float = 0.01,
+        view_max_entries: int = DEFAULT_SQLITE_VIEW_MAX_ENTRIES,
+    ) -> None:
+        synchronous = synchronous.upper()
+        if synchronous not in _SQLITE_SYNCHRONOUS_MODES:
+            raise ValueError(f"Unsupported SQLite synchronous mode '{synchronous}'")
         path.parent.mkdir(parents=True, exist_ok=True)
         self._path = path
         self._ttl_seconds = ttl_seconds
+        self._synchronous = synchronous
+        self._wal_autocheckpoint = wal_autocheckpoint
+        self._group_commit_s = max(0.0, group_commit_ms) / 1000.0
+        self._group_commit_max = max(1, group_commit_max)
+        self._purge_interval_s = purge_interval_s
+        self._view_max_entries = max(0, view_max_entries)
         self._lock = threading.Lock()
-        self._conn = sqlite3.connect(path, check_same_thread=False)
-        self._conn.execute("PRAGMA journal_mode=WAL;")
+        self._conn = self._connect()
         self._conn.execute(
             """
             CREATE TABLE IF NOT EXISTS idempotency_records (
@@ -103,38 +272,244 @@ class SQLiteIdempotencyStore:
             )
             """
         )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idempotency_records_timestamp ON idempotency_records(timestamp)"
+        )
         self._conn.commit()
+        # Committed keys only; written by the writer thread under ``_lock``.
+        self._view: "OrderedDict[str, Tuple[str, int]]" = OrderedDict()
+        self._bloom: Optional[RotatingBloomFilter] = None
+        if bloom_capacity > 0:
+            self._bloom = self._load_bloom(bloom_capacity, bloom_fpr)
+        self._latest_timestamp = 0
+        self._closed = False
+        self._queue: "queue.SimpleQueue[_QueueItem]" = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="sheratan-idempotency-sqlite", daemon=True)
+        self._thread.start()
 
-    def _purge_expired(self, cutoff: int) -> None:
-        if cutoff <= 0:
+    @property
+    def group_commit(self) -> bool:
+        return self._group_commit_s > 0
+
+    @property
+    def group_commit_ms(self) -> float:
+        return self._group_commit_s * 1000.0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self._path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL;")
+        conn.execute(f"PRAGMA synchronous={self._synchronous};")
+        conn.execute(f"PRAGMA wal_autocheckpoint={int(self._wal_autocheckpoint)};")
+        return conn
+
+    def _load_bloom(self, capacity: int, fpr: float) -> RotatingBloomFilter:
+        now = int(time.time())
+        bloom = RotatingBloomFilter(capacity, fpr, self._ttl_seconds, now=now)
+        rows = self._conn.execute(
+            "SELECT key, timestamp FROM idempotency_records WHERE timestamp >= ?",
+            (now - self._ttl_seconds,),
+        )
+        for key, timestamp in rows:
+            bloom.add(key, timestamp)
+        return bloom
+
+    def _put(self, item: _QueueItem) -> None:
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Idempotency store is closed")
+            self._queue.put(item)
+
+    def submit(
+        self, key: str, fingerprint: str, timestamp: int, callback: Callable[[ReservationResult], None]
+    ) -> None:
+        """Queue a reservation; ``callback`` receives its result once committed.
+
+        The result is the reservation or the exception ``reserve`` raises
+        for it. ``callback`` runs on the writer thread, or inline when the
+        key was already committed by this store.
+        """
+
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Idempotency store is closed")
+            record = self._view.get(key)
+        if record is not None and record[1] >= timestamp - self._ttl_seconds:
+            callback(self._result(key, fingerprint, record[0]))
             return
-        self._conn.execute("DELETE FROM idempotency_records WHERE timestamp < ?", (cutoff,))
-        self._conn.commit()
+        self._put(_Reservation(key, fingerprint, timestamp, callback))
 
     def reserve(self, key: str, fingerprint: str, timestamp: int) -> IdempotencyReservation:
-        cutoff = timestamp - self._ttl_seconds
+        waiter = _Waiter()
+        self.submit(key, fingerprint, timestamp, waiter)
+        result = waiter.wait()
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def reserve_many(self, requests: Sequence[Tuple[str, str, int]]) -> List[ReservationResult]:
+        """Reserve several keys; queued back to back, so they share commits.
+
+        Returns one entry per request: the reservation, or the exception
+        that ``reserve`` would have raised for it.
+        """
+
+        waiters = []
+        for key, fingerprint, timestamp in requests:
+            waiter = _Waiter()
+            self.submit(key, fingerprint, timestamp, waiter)
+            waiters.append(waiter)
+        return [waiter.wait() for waiter in waiters]
+
+    def _lookup(self, key: str, timestamp: int, cutoff: int) -> Optional[str]:
+        record = self._view.get(key)
+        if record is not None and record[1] >= cutoff:
+            return record[0]
+        bloom = self._bloom
+        if bloom is not None and not bloom.might_contain(key, timestamp):
+            return None
+        row = self._conn.execute(
+            "SELECT fingerprint FROM idempotency_records WHERE key = ? AND timestamp >= ?",
+            (key, cutoff),
+        ).fetchone()
+        if bloom is not None:
+            bloom.record_lookup(row is not None)
+        return row[0] if row else None
+
+    @staticmethod
+    def _write(conn: sqlite3.Connection, row: Tuple[str, str, int, int]) -> Optional[str]:
+        if conn.execute(_UPSERT_SQL, row).rowcount:
+            return None
+        stored = conn.execute("SELECT fingerprint FROM idempotency_records WHERE key = ?", (row[0],)).fetchone()
+        return stored[0] if stored else None
+
+    @staticmethod
+    def _result(key: str, fingerprint: str, winner: Optional[str]) -> ReservationResult:
+        if winner is None:
+            return IdempotencyReservation(created=True)
+        if winner != fingerprint:
+            return IdempotencyConflictError(key)
+        return IdempotencyReservation(created=False)
+
+    def _drain(self, first: _Reservation) -> Tuple[List[_Reservation], Optional[Callable[[], None]], bool]:
+        """Collect the batch started by ``first``.
+
+        Returns the batch, the non-reservation item that ended it (a task or
+        the ``None`` stop marker) and whether such an item was taken.
+        """
+
+        batch = [first]
+        deadline = time.monotonic() + self._group_commit_s
+        while len(batch) < self._group_commit_max:
+            try:
+                remaining = deadline - time.monotonic()
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if not isinstance(item, _Reservation):
+                return batch, item, True
+            batch.append(item)
+        return batch, None, False
+
+    def _run(self) -> None:
+        next_purge = time.monotonic() + self._purge_interval_s if self._purge_interval_s > 0 else math.inf
+        while True:
+            timeout = None if next_purge == math.inf else max(0.0, next_purge - time.monotonic())
+            try:
+                item: _QueueItem = self._queue.get(timeout=timeout)
+                taken = True
+            except queue.Empty:
+                item, taken = None, False
+            if isinstance(item, _Reservation):
+                batch, item, taken = self._drain(item)
+                self._commit(batch)
+            if taken:
+                if item is None:
+                    return
+                item()
+            if time.monotonic() >= next_purge:
+                self._purge()
+                next_purge = time.monotonic() + self._purge_interval_s
+
+    def _commit(self, batch: List[_Reservation]) -> None:
+        # Runs on the writer thread, so duplicates within the batch see the
+        # uncommitted rows written before them on the same connection.
+        COMMIT_BATCH_SIZE.observe(len(batch))
+        results: List[ReservationResult] = []
+        written: List[_Reservation] = []
+        try:
+            for item in batch:
+                cutoff = item.timestamp - self._ttl_seconds
+                self._latest_timestamp = max(self._latest_timestamp, item.timestamp)
+                winner = self._lookup(item.key, item.timestamp, cutoff)
+                if winner is None:
+                    if self._bloom is not None:
+                        self._bloom.add(item.key, item.timestamp)
+                    winner = self._write(self._conn, (item.key, item.fingerprint, item.timestamp, cutoff))
+                    if winner is None:
+                        written.append(item)
+                results.append(self._result(item.key, item.fingerprint, winner))
+            self._conn.commit()
+        except Exception as e:
+            self._conn.rollback()
+            results = [e] * len(batch)
+            written = []
         with self._lock:
-            self._purge_expired(cutoff)
-            row = self._conn.execute(
-                "SELECT fingerprint FROM idempotency_records WHERE key = ?", (key,)
-            ).fetchone()
-            if row:
-                (stored_fingerprint,) = row
-                if stored_fingerprint != fingerprint:
-                    raise IdempotencyConflictError(key)
-                return IdempotencyReservation(created=False)
+            view = self._view
+            for item in written:
+                # Re-taken keys move to the back, keeping commit order.
+                view.pop(item.key, None)
+                view[item.key] = (item.fingerprint, item.timestamp)
+            while len(view) > self._view_max_entries:
+                view.popitem(last=False)
+        for item, result in zip(batch, results, strict=True):
+            item.callback(result)
 
-            self._conn.execute(
-                "INSERT OR REPLACE INTO idempotency_records(key, fingerprint, timestamp) VALUES (?, ?, ?)",
-                (key, fingerprint, timestamp),
-            )
+    def _purge(self) -> None:
+        cutoff = self._latest_timestamp - self._ttl_seconds
+        if cutoff <= 0:
+            return
+        view = self._view
+        while True:
+            # One entry per lock hold, so ``submit`` never waits for a sweep.
+            # Stopping at the first live entry may leave a few out-of-order
+            # stragglers; ``_lookup`` already ignores expired records.
+            with self._lock:
+                if not view:
+                    break
+                key, (_, ts) = next(iter(view.items()))
+                if ts >= cutoff:
+                    break
+                del view[key]
+        try:
+            self._conn.execute("DELETE FROM idempotency_records WHERE timestamp < ?", (cutoff,))
             self._conn.commit()
-            return IdempotencyReservation(created=True)
+        except sqlite3.Error as e:
+            self._conn.rollback()
+            print(f"[idempotency] purge failed: {e}")
 
     def clear(self) -> None:
+        done = threading.Event()
+
+        def task() -> None:
+            try:
+                with self._lock:
+                    self._view.clear()
+                self._conn.execute("DELETE FROM idempotency_records")
+                self._conn.commit()
+            finally:
+                done.set()
+
+        self._put(task)
+        done.wait()
+
+    def close(self) -> None:
         with self._lock:
-            self._conn.execute("DELETE FROM idempotency_records")
-            self._conn.commit()
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._thread.join()
+        self._conn.close()
 
 
 def create_idempotency_store() -> IdempotencyStore:
@@ -143,6 +518,31 @@ def create_idempotency_store() -> IdempotencyStore:
     sqlite_path = os.getenv(SQLITE_PATH_ENV, "").strip()
     ttl_seconds = int(os.getenv("SHERATAN_IDEMPOTENCY_TTL_SECONDS", str(DEFAULT_IDEMPOTENCY_TTL_SECONDS)))
     if sqlite_path:
-        return SQLiteIdempotencyStore(Path(sqlite_path), ttl_seconds=ttl_seconds)
+        return SQLiteIdempotencyStore(
+            Path(sqlite_path),
+            ttl_seconds=ttl_seconds,
+            group_commit_ms=float(os.getenv("SHERATAN_IDEMPOTENCY_GROUP_COMMIT_MS", "0")),
+            group_commit_max=int(os.getenv("SHERATAN_IDEMPOTENCY_GROUP_COMMIT_MAX", "256")),
+            synchronous=os.getenv("SHERATAN_IDEMPOTENCY_SQLITE_SYNCHRONOUS", "FULL"),
+            wal_autocheckpoint=int(os.getenv("SHERATAN_IDEMPOTENCY_SQLITE_WAL_AUTOCHECKPOINT", "1000")),
+            purge_interval_s=float(os.getenv("SHERATAN_IDEMPOTENCY_PURGE_INTERVAL_SECONDS", "30")),
+            bloom_capacity=int(os.getenv("SHERATAN_IDEMPOTENCY_BLOOM_CAPACITY", "0")),
+            bloom_fpr=float(os.getenv("SHERATAN_IDEMPOTENCY_BLOOM_FPR", "0.01")),
+            view_max_entries=int(
+                os.getenv("SHERATAN_IDEMPOTENCY_SQLITE_VIEW_MAX_ENTRIES", str(DEFAULT_SQLITE_VIEW_MAX_ENTRIES))
+            ),
+        )
+    shm_name = os.getenv(SHM_NAME_ENV, "").strip()
+    if shm_name:
+        from .shared_idempotency import SharedMemoryIdempotencyStore
+
+        return SharedMemoryIdempotencyStore(shm_name, ttl_seconds=ttl_seconds)
     max_entries = int(os.getenv("SHERATAN_IDEMPOTENCY_MAX_ENTRIES", str(DEFAULT_MAX_INMEMORY_ENTRIES)))
+    shards = int(os.getenv("SHERATAN_IDEMPOTENCY_SHARDS", str(DEFAULT_IDEMPOTENCY_SHARDS)))
+    if os.getenv(COMPACT_ENV, "").strip().lower() in {"1", "true", "yes", "on"}:
+        from .compact_idempotency import CompactIdempotencyStore
+
+        return CompactIdempotencyStore(ttl_seconds=ttl_seconds, max_entries=max_entries)
+    if shards > 1:
+        return ShardedIdempotencyStore(ttl_seconds=ttl_seconds, max_entries=max_entries, shards=shards)
     return InMemoryIdempotencyStore(ttl_seconds=ttl_seconds, max_entries=max_entries)
@@ -0,0 +1,153 @@
+"""Replay stored responses for duplicate idempotency keys."""
+from __future__ import annotations
+
+import asyncio
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from ..config import is_feature_enabled
+from ..metrics import counter
+from .idempotency import DEFAULT_IDEMPOTENCY_TTL_SECONDS, IdempotencyConflictError
+
+REPLAY_FEATURE_FLAG = "idempotency_replay"
+REPLAY_HEADER = "X-Sheratan-Idempotent-Replay"
+DEFAULT_REPLAY_MAX_ENTRIES = int(os.getenv("SHERATAN_IDEMPOTENCY_REPLAY_MAX_ENTRIES", "10000"))
+DEFAULT_REPLAY_MAX_BODY_BYTES = int(os.getenv("SHERATAN_IDEMPOTENCY_REPLAY_MAX_BODY_BYTES", "65536"))
+
+REPLAY_LOOKUPS = counter(
+    "sheratan_idempotency_replay_total",
+    "Idempotent requests by replay outcome",
+    ("result",),
+)
+_REPLAYED = REPLAY_LOOKUPS.labels("replayed")
+_WAITED = REPLAY_LOOKUPS.labels("waited")
+_MISS = REPLAY_LOOKUPS.labels("miss")
+_NOT_STORED = REPLAY_LOOKUPS.labels("not_stored")
+
+
+@dataclass(frozen=True)
+class StoredResponse:
+    """A finished response as it went over the wire."""
+
+    status_code: int
+    headers: Tuple[Tuple[bytes, bytes], ...]
+    body: bytes
+
+
+class _Pending:
+    __slots__ = ("fingerprint", "done")
+
+    def __init__(self, fingerprint: str) -> None:
+        self.fingerprint = fingerprint
+        self.done = asyncio.Event()
+
+
+class ResponseReplayCache:
+    """Per-process store of responses keyed by idempotency key.
+
+    ``claim()`` either hands back the response stored for a key, waits for
+    the request that currently owns the key, or makes the caller the owner.
+    The owner must call ``complete()`` with its response (``None`` if it
+    should not be replayed) or ``abandon()`` when it failed, so a waiter can
+    take over. Responses larger than ``max_body_bytes`` are not kept. The
+    cache sits in front of the reservation store and does not replace it:
+    keys it has not seen still go through the regular duplicate check.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int = DEFAULT_IDEMPOTENCY_TTL_SECONDS,
+        max_entries: int = DEFAULT_REPLAY_MAX_ENTRIES,
+        max_body_bytes: int = DEFAULT_REPLAY_MAX_BODY_BYTES,
+    ) -> None:
+        self._ttl_seconds = ttl_seconds
+        self._max_entries = max(1, max_entries)
+        self._max_body_bytes = max(0, max_body_bytes)
+        # key -> (fingerprint, stored at, response), oldest first.
+        self._responses: "OrderedDict[str, Tuple[str, int, StoredResponse]]" = OrderedDict()
+        self._pending: Dict[str, _Pending] = {}
+
+    def __len__(self) -> int:
+        return len(self._responses)
+
+    def _evict_expired(self, cutoff: int) -> None:
+        responses = self._responses
+        # Responses are appended as they finish, so expired ones form a prefix.
+        while responses:
+            key, (_, stored_at, _) = next(iter(responses.items()))
+            if stored_at >= cutoff:
+                return
+            del responses[key]
+
+    async def claim(self, key: str, fingerprint: str, timestamp: int) -> Optional[StoredResponse]:
+        """Return the stored response, or ``None`` if the caller now owns ``key``."""
+
+        self._evict_expired(timestamp - self._ttl_seconds)
+        waited = False
+        while True:
+            stored = self._responses.get(key)
+            if stored is not None:
+                if stored[0] != fingerprint:
+                    raise IdempotencyConflictError(key)
+                (_WAITED if waited else _REPLAYED).inc()
+                return stored[2]
+            pending = self._pending.get(key)
+            if pending is None:
+                self._pending[key] = _Pending(fingerprint)
+                _MISS.inc()
+                return None
+            if pending.fingerprint != fingerprint:
+                raise IdempotencyConflictError(key)
+            waited = True
+            await pending.done.wait()
+
+    def complete(self, key: str, response: Optional[StoredResponse], timestamp: int) -> None:
+        """Publish the owner's response to waiters and later duplicates."""
+
+        pending = self._pending.pop(key, None)
+        if pending is None:
+            return
+        if response is None or len(response.body) > self._max_body_bytes:
+            _NOT_STORED.inc()
+        else:
+            self._responses[key] = (pending.fingerprint, timestamp, response)
+            if len(self._responses) > self._max_entries:
+                self._responses.popitem(last=False)
+        pending.done.set()
+
+    def abandon(self, key: str) -> None:
+        """Release ``key`` without a response; the next waiter becomes the owner."""
+
+        pending = self._pending.pop(key, None)
+        if pending is not None:
+            pending.done.set()
+
+    def clear(self) -> None:
+        for pending in self._pending.values():
+            pending.done.set()
+        self._pending.clear()
+        self._responses.clear()
+
+
+def create_response_replay_cache() -> Optional[ResponseReplayCache]:
+    """Create the replay cache if the ``idempotency_replay`` feature is enabled."""
+
+    if not is_feature_enabled(REPLAY_FEATURE_FLAG):
+        return None
+    return ResponseReplayCache(
+        ttl_seconds=int(os.getenv("SHERATAN_IDEMPOTENCY_TTL_SECONDS", str(DEFAULT_IDEMPOTENCY_TTL_SECONDS))),
+        max_entries=int(os.getenv("SHERATAN_IDEMPOTENCY_REPLAY_MAX_ENTRIES", str(DEFAULT_REPLAY_MAX_ENTRIES))),
+        max_body_bytes=int(
+            os.getenv("SHERATAN_IDEMPOTENCY_REPLAY_MAX_BODY_BYTES", str(DEFAULT_REPLAY_MAX_BODY_BYTES))
+        ),
+    )
+
+
+__all__ = [
+    "REPLAY_HEADER",
+    "ResponseReplayCache",
+    "StoredResponse",
+    "create_response_replay_cache",
+]
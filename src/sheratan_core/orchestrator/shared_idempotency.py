@@ -0,0 +1,196 @@
+"""Idempotency store shared by worker processes through shared memory."""
+from __future__ import annotations
+
+import hashlib
+import os
+import struct
+import tempfile
+import threading
+from contextlib import contextmanager
+from multiprocessing import resource_tracker, shared_memory
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+try:  # pragma: no cover - platform dependent
+    import _posixshmem
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    _posixshmem = None
+    fcntl = None  # type: ignore[assignment]
+
+from ..metrics import counter
+from .idempotency import (
+    DEFAULT_IDEMPOTENCY_TTL_SECONDS,
+    IdempotencyConflictError,
+    IdempotencyReservation,
+)
+
+DEFAULT_SHM_SLOTS = int(os.getenv("SHERATAN_IDEMPOTENCY_SHM_SLOTS", str(1 << 18)))
+DEFAULT_SHM_STRIPES = 64
+DEFAULT_SHM_PROBE_WINDOW = 32
+
+_MAGIC = b"SHIDEMP1"
+_HEADER = struct.Struct("<8sQQ")  # magic, slots, stripes
+_SLOT = struct.Struct("<16s16sq")  # key digest, fingerprint digest, timestamp (0 = empty)
+_DIGEST_SIZE = 16
+
+SHM_EVICTIONS = counter(
+    "sheratan_idempotency_shm_evictions_total",
+    "Live shared-memory reservations overwritten because their probe window was full",
+)
+
+
+def _digest(value: str) -> bytes:
+    return hashlib.blake2b(value.encode("utf-8"), digest_size=_DIGEST_SIZE).digest()
+
+
+def _open_segment(name: str, size: int) -> shared_memory.SharedMemory:
+    try:
+        segment = shared_memory.SharedMemory(name=name, create=True, size=size)
+    except FileExistsError:
+        segment = shared_memory.SharedMemory(name=name)
+    # The table outlives individual workers; only ``unlink()`` removes it.
+    # Without this, the resource tracker of the first worker to exit would
+    # unlink the segment underneath the others (Python < 3.13).
+    resource_tracker.unregister(segment._name, "shared_memory")  # type: ignore[attr-defined]
+    return segment
+
+
+class SharedMemoryIdempotencyStore:
+    """Fixed-capacity open-addressing hash table in ``multiprocessing.shared_memory``.
+
+    Every worker that opens the same ``name`` sees the same reservations.
+    Slots hold 16-byte BLAKE2b digests of the key and fingerprint plus the
+    timestamp. The table is split into ``stripes`` regions and a key only
+    probes ``probe_window`` slots inside its own region, so one stripe lock
+    covers a reservation: a thread lock inside the process plus an
+    ``fcntl`` byte-range lock on ``<tmp>/<name>.lock`` across processes.
+    Expired slots are reused in place. If a window holds only live entries,
+    the oldest one is overwritten, which bounds memory like the LRU limit
+    of the in-memory store but silently admits a later duplicate of that
+    key, so size ``slots`` well above the live keys per TTL window.
+    """
+
+    # The stripe lock may wait on other worker processes; async callers
+    # should off-load ``reserve``.
+    blocking = True
+
+    def __init__(
+        self,
+        name: str,
+        ttl_seconds: int = DEFAULT_IDEMPOTENCY_TTL_SECONDS,
+        slots: int = DEFAULT_SHM_SLOTS,
+        *,
+        stripes: int = DEFAULT_SHM_STRIPES,
+        probe_window: int = DEFAULT_SHM_PROBE_WINDOW,
+        lock_path: Optional[Path] = None,
+    ) -> None:
+        if fcntl is None:
+            raise RuntimeError("SharedMemoryIdempotencyStore requires fcntl (POSIX)")
+        if stripes < 1 or slots < stripes:
+            raise ValueError("slots must be at least the number of stripes")
+        self._name = name
+        self._ttl_seconds = ttl_seconds
+        self._segment = _open_segment(name, _HEADER.size + slots * _SLOT.size)
+        buf = self._segment.buf
+        if buf is None:
+            raise RuntimeError(f"Shared memory segment '{name}' is not mapped")
+        self._buf: memoryview = buf
+        self._slots, self._stripes = self._attach_header(slots, stripes)
+        self._region = self._slots // self._stripes
+        self._window = max(1, min(probe_window, self._region))
+        self._thread_locks = [threading.Lock() for _ in range(self._stripes)]
+        self._lock_path = lock_path or Path(tempfile.gettempdir()) / f"{name}.lock"
+        self._lock_fd = os.open(self._lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+
+    def _attach_header(self, slots: int, stripes: int) -> tuple[int, int]:
+        magic, stored_slots, stored_stripes = _HEADER.unpack_from(self._buf, 0)
+        if magic == _MAGIC:
+            return stored_slots, stored_stripes
+        if magic == bytes(len(_MAGIC)) and self._segment.size >= _HEADER.size + slots * _SLOT.size:
+            # Fresh segment; racing creators write identical headers.
+            _HEADER.pack_into(self._buf, 0, _MAGIC, slots, stripes)
+            return slots, stripes
+        raise RuntimeError(f"Shared memory segment '{self._name}' is not an idempotency table")
+
+    @contextmanager
+    def _stripe(self, stripe: int) -> Iterator[None]:
+        with self._thread_locks[stripe]:
+            fcntl.lockf(self._lock_fd, fcntl.LOCK_EX, 1, stripe)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self._lock_fd, fcntl.LOCK_UN, 1, stripe)
+
+    def _offsets(self, key_digest: bytes) -> tuple[int, List[int]]:
+        h = int.from_bytes(key_digest[:8], "little")
+        stripe = h % self._stripes
+        base = stripe * self._region
+        start = (h // self._stripes) % self._region
+        return stripe, [
+            _HEADER.size + (base + (start + i) % self._region) * _SLOT.size for i in range(self._window)
+        ]
+
+    def reserve(self, key: str, fingerprint: str, timestamp: int) -> IdempotencyReservation:
+        key_digest = _digest(key)
+        fingerprint_digest = _digest(fingerprint)
+        cutoff = timestamp - self._ttl_seconds
+        stripe, offsets = self._offsets(key_digest)
+        buf = self._buf
+        with self._stripe(stripe):
+            reusable: Optional[int] = None
+            oldest: Optional[tuple[int, int]] = None
+            for offset in offsets:
+                stored_key, stored_fingerprint, stored_ts = _SLOT.unpack_from(buf, offset)
+                if stored_ts == 0:
+                    # Slots are never emptied again, so the chain ends here.
+                    if reusable is None:
+                        reusable = offset
+                    break
+                if stored_key == key_digest:
+                    if stored_ts >= cutoff:
+                        if stored_fingerprint != fingerprint_digest:
+                            raise IdempotencyConflictError(key)
+                        return IdempotencyReservation(created=False)
+                    if reusable is None:
+                        reusable = offset
+                    break
+                if stored_ts < cutoff:
+                    if reusable is None:
+                        reusable = offset
+                elif oldest is None or stored_ts < oldest[0]:
+                    oldest = (stored_ts, offset)
+            if reusable is None:
+                assert oldest is not None
+                reusable = oldest[1]
+                SHM_EVICTIONS.inc()
+            _SLOT.pack_into(buf, reusable, key_digest, fingerprint_digest, max(1, timestamp))
+            return IdempotencyReservation(created=True)
+
+    def clear(self) -> None:
+        for stripe in range(self._stripes):
+            with self._stripe(stripe):
+                start = _HEADER.size + stripe * self._region * _SLOT.size
+                end = start + self._region * _SLOT.size
+                self._buf[start:end] = bytes(end - start)
+
+    def close(self) -> None:
+        if self._lock_fd >= 0:
+            os.close(self._lock_fd)
+            self._lock_fd = -1
+        # Releases ``self._buf`` too: it is the segment's own memoryview.
+        self._segment.close()
+
+    def unlink(self) -> None:
+        """Remove the shared segment; call once when no worker uses it any more."""
+
+        # Not ``SharedMemory.unlink()``: the segment was unregistered from the
+        # resource tracker on open, and unregistering twice makes it complain.
+        _posixshmem.shm_unlink(self._segment._name)  # type: ignore[attr-defined]
+        try:
+            self._lock_path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+__all__ = ["SharedMemoryIdempotencyStore"]
@@ -0,0 +1,256 @@
+"""Load-balanced pool of routers that itself satisfies the router protocol."""
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from .metrics import counter, gauge
+from .registry import build_router, close_router
+from .resilience import STATE_CLOSED, CircuitBreaker, CircuitOpenError
+
+POOL_ENV_VAR = "SHERATAN_ROUTER_POOL"
+POOL_MODELS_ENV_VAR = "SHERATAN_ROUTER_POOL_MODELS"
+POOL_STRATEGY_ENV_VAR = "SHERATAN_ROUTER_POOL_STRATEGY"
+
+STRATEGY_EWMA = "ewma"
+STRATEGY_LEAST_OUTSTANDING = "least_outstanding"
+
+DEFAULT_EWMA_ALPHA = 0.3
+DEFAULT_EJECT_AFTER_ERRORS = int(os.getenv("SHERATAN_ROUTER_POOL_EJECT_AFTER", "3"))
+DEFAULT_EJECT_SECONDS = float(os.getenv("SHERATAN_ROUTER_POOL_EJECT_SECONDS", "30"))
+
+POOL_REQUESTS = counter(
+    "sheratan_router_pool_requests_total",
+    "Requests dispatched to pool members by outcome",
+    ("member", "outcome"),
+)
+POOL_OUTSTANDING = gauge(
+    "sheratan_router_pool_outstanding",
+    "In-flight requests per pool member",
+    ("member",),
+)
+
+
+@dataclass
+class PoolMember:
+    """A router in the pool plus the statistics used to balance traffic."""
+
+    name: str
+    router: Any
+    weight: float = 1.0
+    outstanding: int = 0
+    ewma_latency: float = 0.0
+    samples: int = 0
+    breaker: Optional[CircuitBreaker] = None
+
+
+class RouterPool:
+    """Spread requests across several routers.
+
+    ``ewma`` picks the member with the lowest latency EWMA scaled by its
+    in-flight requests and weight; ``least_outstanding`` only looks at
+    in-flight requests per unit of weight. Each member has its own
+    :class:`~sheratan_core.resilience.CircuitBreaker`: after
+    ``eject_after_errors`` failures in a row the member is ejected for
+    ``eject_seconds`` and then re-admitted through a half-open probe. If no
+    candidate is admitted, :class:`~sheratan_core.resilience.CircuitOpenError`
+    is raised instead of queueing onto a failing upstream.
+    """
+
+    manages_breakers = True
+    # Members come from ``build_router`` and carry their own router metrics.
+    instruments_members = True
+
+    def __init__(
+        self,
+        members: List[PoolMember],
+        *,
+        strategy: str = STRATEGY_EWMA,
+        model_routes: Optional[Dict[str, List[str]]] = None,
+        ewma_alpha: float = DEFAULT_EWMA_ALPHA,
+        eject_after_errors: int = DEFAULT_EJECT_AFTER_ERRORS,
+        eject_seconds: float = DEFAULT_EJECT_SECONDS,
+    ) -> None:
+        if not members:
+            raise ValueError("RouterPool needs at least one member")
+        if strategy not in (STRATEGY_EWMA, STRATEGY_LEAST_OUTSTANDING):
+            raise ValueError(f"Unknown pool strategy '{strategy}'")
+        self._members = list(members)
+        self._by_name = {m.name: m for m in self._members}
+        self._strategy = strategy
+        self._model_routes: Dict[str, List[PoolMember]] = {}
+        for model, names in (model_routes or {}).items():
+            unknown = [n for n in names if n not in self._by_name]
+            if unknown:
+                raise ValueError(f"Model '{model}' routed to unknown pool members {unknown}")
+            self._model_routes[model] = [self._by_name[n] for n in names]
+        self._alpha = ewma_alpha
+        for member in self._members:
+            if member.breaker is None:
+                member.breaker = CircuitBreaker(
+                    f"pool:{member.name}",
+                    failure_threshold=eject_after_errors,
+                    reset_timeout_s=eject_seconds,
+                )
+
+    @property
+    def members(self) -> List[PoolMember]:
+        return list(self._members)
+
+    def _candidates(self, req: Dict[str, Any]) -> List[PoolMember]:
+        return self._model_routes.get(str(req.get("model", "")), self._members)
+
+    def _score(self, member: PoolMember) -> float:
+        load = (member.outstanding + 1) / member.weight
+        if self._strategy == STRATEGY_LEAST_OUTSTANDING:
+            return load
+        return member.ewma_latency * load
+
+    def pick(self, req: Dict[str, Any]) -> PoolMember:
+        candidates = self._candidates(req)
+        for member in sorted(candidates, key=self._score):
+            if member.breaker is None or member.breaker.allow():
+                return member
+        retry_after = min(m.breaker.retry_after() for m in candidates if m.breaker is not None)
+        raise CircuitOpenError(self.name(), retry_after)
+
+    def _begin(self, member: PoolMember) -> float:
+        member.outstanding += 1
+        POOL_OUTSTANDING.labels(member.name).set(member.outstanding)
+        return time.perf_counter()
+
+    def _end(self, member: PoolMember, started: float, error: Optional[BaseException]) -> None:
+        member.outstanding -= 1
+        POOL_OUTSTANDING.labels(member.name).set(member.outstanding)
+        breaker = member.breaker
+        if isinstance(error, (asyncio.CancelledError, GeneratorExit)):
+            if breaker is not None:
+                breaker.record_cancelled()
+            return
+        if error is None:
+            latency = time.perf_counter() - started
+            if member.samples:
+                member.ewma_latency += self._alpha * (latency - member.ewma_latency)
+            else:
+                member.ewma_latency = latency
+            member.samples += 1
+            if breaker is not None:
+                breaker.record_success()
+            POOL_REQUESTS.labels(member.name, "ok").inc()
+            return
+        POOL_REQUESTS.labels(member.name, "error").inc()
+        if breaker is not None:
+            breaker.record_failure()
+
+    def name(self) -> str:
+        return "pool"
+
+    async def health(self) -> dict:
+        statuses: Dict[str, Any] = {}
+        for member in self._members:
+            try:
+                statuses[member.name] = await member.router.health()
+            except Exception as e:
+                statuses[member.name] = {"router": "error", "detail": str(e)}
+        return statuses
+
+    def models(self) -> List[str]:
+        seen: Dict[str, None] = {}
+        for member in self._members:
+            try:
+                for model in member.router.models():
+                    seen.setdefault(model, None)
+            except Exception:
+                continue
+        return list(seen)
+
+    def metadata(self) -> Dict[str, Any]:
+        return {
+            "strategy": self._strategy,
+            "members": [
+                {
+                    "name": m.name,
+                    "router": m.router.name(),
+                    "weight": m.weight,
+                    "outstanding": m.outstanding,
+                    "ewma_latency_s": round(m.ewma_latency, 6),
+                    "breaker": m.breaker.state if m.breaker is not None else STATE_CLOSED,
+                }
+                for m in self._members
+            ],
+        }
+
+    async def complete(self, req: Dict[str, Any]) -> Dict[str, Any]:
+        member = self.pick(req)
+        started = self._begin(member)
+        error: Optional[BaseException] = None
+        try:
+            return await member.router.complete(req)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._end(member, started, error)
+
+    async def stream(self, req: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        member = self.pick(req)
+        started = self._begin(member)
+        error: Optional[BaseException] = None
+        try:
+            async for chunk in member.router.stream(req):
+                yield chunk
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._end(member, started, error)
+
+    async def aclose(self) -> None:
+        for member in self._members:
+            await close_router(member.router)
+
+
+def _parse_members(raw: str) -> List[PoolMember]:
+    """Parse ``name=module:factory@weight`` entries separated by commas."""
+
+    members: List[PoolMember] = []
+    for index, item in enumerate(part.strip() for part in raw.split(",")):
+        if not item:
+            continue
+        name, sep, spec = item.partition("=")
+        if not sep:
+            name, spec = f"router{index}", item
+        spec, _, weight = spec.partition("@")
+        router = build_router(spec.strip())
+        if router is None:
+            continue
+        members.append(PoolMember(name=name.strip(), router=router, weight=float(weight or 1)))
+    return members
+
+
+def _parse_model_routes(raw: str) -> Dict[str, List[str]]:
+    """Parse ``model=member|member`` entries separated by commas."""
+
+    routes: Dict[str, List[str]] = {}
+    for item in (part.strip() for part in raw.split(",")):
+        model, sep, names = item.partition("=")
+        if sep:
+            routes[model.strip()] = [n.strip() for n in names.split("|") if n.strip()]
+    return routes
+
+
+def create_router() -> RouterPool:
+    """Factory for ``SHERATAN_ROUTER=sheratan_core.pool:create_router``."""
+
+    members = _parse_members(os.getenv(POOL_ENV_VAR, ""))
+    return RouterPool(
+        members,
+        strategy=os.getenv(POOL_STRATEGY_ENV_VAR, STRATEGY_EWMA).strip() or STRATEGY_EWMA,
+        model_routes=_parse_model_routes(os.getenv(POOL_MODELS_ENV_VAR, "")),
+    )
+
+
+__all__ = ["PoolMember", "RouterPool", "create_router"]
@@ -1,18 +1,163 @@
+import asyncio
 import importlib
-from typing import Any, Callable, Optional
+import inspect
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Set
 
 from .config import get_settings
+from .resilience import wrap_router
+from .router_metrics import instrument_router
+
+def build_router(spec: str) -> Optional[Any]:
+    """Import ``module:factory`` and return a fresh, instrumented router instance."""
 
-def load_router() -> Optional[Any]:
-    spec = get_settings().router_spec
     if not spec:
         return None
     try:
         mod_name, factory_name = spec.split(":", 1)
         mod = importlib.import_module(mod_name)
         factory: Callable[[], Any] = getattr(mod, factory_name)
-        return factory()
+        return instrument_router(factory())
     except Exception as e:
         # Fail-soft: kein Router geladen
         print(f"[registry] Router load failed: {e}")
         return None
+
+
+def load_configured_router(spec: str) -> Optional[Any]:
+    """Build the router for ``spec`` and apply the configured resilience wrappers."""
+
+    return wrap_router(build_router(spec))
+
+
+def load_router() -> Optional[Any]:
+    """Build a new router from the configured ``SHERATAN_ROUTER`` spec.
+
+    Every call constructs a new instance; request handlers should go through
+    :data:`router_manager` instead.
+    """
+
+    return build_router(get_settings().router_spec)
+
+
+async def close_router(router: Any) -> None:
+    """Release resources held by ``router`` via ``aclose()``/``close()`` if present."""
+
+    closer = getattr(router, "aclose", None) or getattr(router, "close", None)
+    if closer is None:
+        return
+    try:
+        result = closer()
+        if inspect.isawaitable(result):
+            await result
+    except Exception as e:
+        print(f"[registry] Router close failed: {e}")
+
+
+def _configured_spec() -> str:
+    return get_settings().router_spec
+
+
+class RouterManager:
+    """Owns the process-wide router instance.
+
+    The router is built once and shared by all requests. When the configured
+    spec changes (i.e. a reloaded settings snapshot carries a different
+    ``router_spec``), the next :meth:`lease` builds a replacement and swaps it in;
+    requests still holding the previous instance finish on it and the old
+    router is closed once its last lease is released.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[str], Optional[Any]] = load_configured_router,
+        spec_provider: Callable[[], str] = _configured_spec,
+    ) -> None:
+        self._loader = loader
+        self._spec_provider = spec_provider
+        self._spec: Optional[str] = None
+        self._router: Optional[Any] = None
+        self._leases: Dict[int, int] = {}
+        self._retired: Dict[int, Any] = {}
+        self._pending_closes: Set["asyncio.Task[None]"] = set()
+
+    @property
+    def spec(self) -> Optional[str]:
+        return self._spec
+
+    def current(self) -> Optional[Any]:
+        """Return the active router, swapping it first if the spec changed."""
+
+        spec = self._spec_provider()
+        if spec != self._spec:
+            self._swap(spec)
+        return self._router
+
+    def _swap(self, spec: str) -> None:
+        previous = self._router
+        self._router = self._loader(spec) if spec else None
+        self._spec = spec
+        if previous is not None and previous is not self._router:
+            self._retire(previous)
+
+    def _retire(self, router: Any) -> None:
+        key = id(router)
+        if self._leases.get(key):
+            self._retired[key] = router
+        else:
+            self._schedule_close(router)
+
+    def _schedule_close(self, router: Any) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            asyncio.run(close_router(router))
+            return
+        task = loop.create_task(close_router(router))
+        self._pending_closes.add(task)
+        task.add_done_callback(self._pending_closes.discard)
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator[Optional[Any]]:
+        """Borrow the active router for the duration of a request."""
+
+        router = self.current()
+        if router is None:
+            yield None
+            return
+        key = id(router)
+        self._leases[key] = self._leases.get(key, 0) + 1
+        try:
+            yield router
+        finally:
+            remaining = self._leases.get(key, 1) - 1
+            if remaining:
+                self._leases[key] = remaining
+            else:
+                self._leases.pop(key, None)
+                retired = self._retired.pop(key, None)
+                if retired is not None:
+                    self._schedule_close(retired)
+
+    async def start(self) -> None:
+        """Eagerly build the configured router (called from the app lifespan)."""
+
+        self.current()
+
+    async def aclose(self) -> None:
+        """Close the active and any retired routers."""
+
+        routers = list(self._retired.values())
+        if self._router is not None:
+            routers.append(self._router)
+        self._router = None
+        self._spec = None
+        self._retired.clear()
+        self._leases.clear()
+        for router in routers:
+            await close_router(router)
+        if self._pending_closes:
+            await asyncio.gather(*self._pending_closes, return_exceptions=True)
+
+
+router_manager = RouterManager()
@@ -0,0 +1,142 @@
+"""ASGI verification of signed relay callbacks while their body streams in."""
+from __future__ import annotations
+
+import hashlib
+import os
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional
+
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .security import (
+    DEFAULT_MAX_SKEW_SECONDS,
+    IDEMPOTENCY_HEADER,
+    KEY_ID_HEADER,
+    SIGNATURE_HEADER,
+    TIMESTAMP_HEADER,
+    HmacKeyring,
+    SignatureError,
+    check_timestamp,
+)
+
+VERIFIED_SCOPE_KEY = "sheratan.relay_auth"
+DEFAULT_RELAY_MAX_BODY_BYTES = int(os.getenv("SHERATAN_RELAY_MAX_BODY_BYTES", str(4 * 1024 * 1024)))
+
+
+@dataclass(frozen=True)
+class VerifiedRelayRequest:
+    """Outcome of a successful check, stored in the ASGI scope for the route."""
+
+    timestamp: str
+    idempotency: str
+    key_id: str
+    fingerprint: str
+    verified_at: int
+
+
+class RelaySignatureMiddleware:
+    """Check relay HMAC signatures before the route runs.
+
+    Each body chunk feeds the HMAC state(s) from ``keyring`` and the
+    SHA-256 idempotency fingerprint in the same pass, so the body is never
+    concatenated with the signed prefix or hashed twice. Bad requests get a
+    401 without reaching the route; good ones continue with the buffered
+    body handed over as a single ``http.request`` message and a
+    :class:`VerifiedRelayRequest` under ``scope["sheratan.relay_auth"]``.
+    Requests without the signing headers, or arriving while no secret is
+    configured, pass through so the route reports them as before. Bodies
+    above ``max_body_bytes`` get a 413, by ``Content-Length`` or as soon as
+    the received chunks exceed it.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        paths: Iterable[str],
+        keyring: Callable[[], Optional[HmacKeyring]],
+        max_skew_seconds: int = DEFAULT_MAX_SKEW_SECONDS,
+        clock: Callable[[], float] = time.time,
+        max_body_bytes: int = DEFAULT_RELAY_MAX_BODY_BYTES,
+    ) -> None:
+        self.app = app
+        self._paths = frozenset(paths)
+        self._keyring = keyring
+        self._max_skew_seconds = max_skew_seconds
+        self._max_body_bytes = max_body_bytes
+        self._clock = clock
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] not in self._paths:
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        timestamp = headers.get(TIMESTAMP_HEADER)
+        idempotency = headers.get(IDEMPOTENCY_HEADER)
+        keyring = self._keyring() if timestamp is not None and idempotency else None
+        if keyring is None or timestamp is None or not idempotency:
+            await self.app(scope, receive, send)
+            return
+
+        now = int(self._clock())
+        try:
+            check_timestamp(timestamp, now, self._max_skew_seconds)
+        except SignatureError as e:
+            await JSONResponse({"detail": str(e)}, status_code=401)(scope, receive, send)
+            return
+
+        too_large = JSONResponse({"detail": "Request body too large"}, status_code=413)
+        length = headers.get("content-length", "")
+        if length.isdigit() and int(length) > self._max_body_bytes:
+            await too_large(scope, receive, send)
+            return
+
+        pending = keyring.start(timestamp, idempotency, headers.get(KEY_ID_HEADER))
+        fingerprint = hashlib.sha256()
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunk = message.get("body", b"")
+            if chunk:
+                size += len(chunk)
+                if size > self._max_body_bytes:
+                    await too_large(scope, receive, send)
+                    return
+                pending.update(chunk)
+                fingerprint.update(chunk)
+                chunks.append(chunk)
+            if not message.get("more_body", False):
+                break
+
+        key_id = pending.verify(headers.get(SIGNATURE_HEADER))
+        if key_id is None:
+            await JSONResponse({"detail": "Invalid signature"}, status_code=401)(scope, receive, send)
+            return
+        scope[VERIFIED_SCOPE_KEY] = VerifiedRelayRequest(
+            timestamp, idempotency, key_id, fingerprint.hexdigest(), now
+        )
+
+        body = chunks[0] if len(chunks) == 1 else b"".join(chunks)
+        handed_over = False
+
+        async def buffered_receive() -> Message:
+            nonlocal handed_over
+            if handed_over:
+                return await receive()
+            handed_over = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        await self.app(scope, buffered_receive, send)
+
+
+__all__ = [
+    "DEFAULT_RELAY_MAX_BODY_BYTES",
+    "VERIFIED_SCOPE_KEY",
+    "RelaySignatureMiddleware",
+    "VerifiedRelayRequest",
+]
@@ -0,0 +1,355 @@
+"""Circuit breaking and request hedging for router calls."""
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, TypeVar
+
+from .config import is_feature_enabled
+from .metrics import counter, gauge
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+_STATE_VALUES = {STATE_CLOSED: 0, STATE_OPEN: 1, STATE_HALF_OPEN: 2}
+
+DEFAULT_BREAKER_FAILURES = int(os.getenv("SHERATAN_BREAKER_FAILURES", "5"))
+DEFAULT_BREAKER_RESET_SECONDS = float(os.getenv("SHERATAN_BREAKER_RESET_SECONDS", "30"))
+DEFAULT_HEDGE_QUANTILE = float(os.getenv("SHERATAN_HEDGE_QUANTILE", "0.95"))
+DEFAULT_HEDGE_BUDGET = float(os.getenv("SHERATAN_HEDGE_BUDGET", "0.1"))
+DEFAULT_HEDGE_MIN_DELAY_MS = float(os.getenv("SHERATAN_HEDGE_MIN_DELAY_MS", "10"))
+
+BREAKER_STATE = gauge(
+    "sheratan_router_breaker_state",
+    "Circuit breaker state per router (0=closed, 1=open, 2=half_open)",
+    ("router",),
+)
+BREAKER_TRANSITIONS = counter(
+    "sheratan_router_breaker_transitions_total",
+    "Circuit breaker state changes",
+    ("router", "state"),
+)
+BREAKER_REJECTIONS = counter(
+    "sheratan_router_breaker_rejections_total",
+    "Calls rejected because the circuit was open",
+    ("router",),
+)
+_T = TypeVar("_T")
+
+HEDGES = counter(
+    "sheratan_router_hedges_total",
+    "Hedged router calls by outcome",
+    ("router", "outcome"),
+)
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a router whose circuit is open."""
+
+    def __init__(self, router: str, retry_after: float) -> None:
+        super().__init__(f"Circuit open for router '{router}'")
+        self.router = router
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker driven by consecutive failures.
+
+    After ``failure_threshold`` failures in a row the circuit opens and calls
+    are refused for ``reset_timeout_s``. It then lets ``half_open_max_calls``
+    probes through: a success closes the circuit, a failure reopens it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = DEFAULT_BREAKER_FAILURES,
+        reset_timeout_s: float = DEFAULT_BREAKER_RESET_SECONDS,
+        half_open_max_calls: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self._failure_threshold = max(1, failure_threshold)
+        self._reset_timeout_s = reset_timeout_s
+        self._half_open_max_calls = max(1, half_open_max_calls)
+        self._clock = clock
+        self._state = STATE_CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        BREAKER_STATE.labels(name).set(0)
+
+    def _transition(self, state: str) -> None:
+        self._state = state
+        if state == STATE_OPEN:
+            self._opened_at = self._clock()
+        self._probes = 0
+        self._failures = 0
+        BREAKER_STATE.labels(self.name).set(_STATE_VALUES[state])
+        BREAKER_TRANSITIONS.labels(self.name, state).inc()
+
+    @property
+    def state(self) -> str:
+        if self._state == STATE_OPEN and self._clock() - self._opened_at >= self._reset_timeout_s:
+            self._transition(STATE_HALF_OPEN)
+        return self._state
+
+    def retry_after(self) -> float:
+        if self._state != STATE_OPEN:
+            return 0.0
+        return max(0.0, self._reset_timeout_s - (self._clock() - self._opened_at))
+
+    def allow(self) -> bool:
+        """Claim permission for one call; must be followed by a ``record_*``."""
+
+        state = self.state
+        if state == STATE_CLOSED:
+            return True
+        if state == STATE_HALF_OPEN and self._probes < self._half_open_max_calls:
+            self._probes += 1
+            return True
+        BREAKER_REJECTIONS.labels(self.name).inc()
+        return False
+
+    def record_success(self) -> None:
+        if self._state == STATE_HALF_OPEN:
+            self._transition(STATE_CLOSED)
+        else:
+            self._failures = 0
+
+    def record_failure(self) -> None:
+        if self._state == STATE_HALF_OPEN:
+            self._transition(STATE_OPEN)
+            return
+        self._failures += 1
+        if self._state == STATE_CLOSED and self._failures >= self._failure_threshold:
+            self._transition(STATE_OPEN)
+
+    def record_cancelled(self) -> None:
+        if self._state == STATE_HALF_OPEN and self._probes:
+            self._probes -= 1
+
+    def open_error(self) -> CircuitOpenError:
+        return CircuitOpenError(self.name, self.retry_after())
+
+
+class LatencyTracker:
+    """Sliding window of recent latencies with a periodically refreshed quantile."""
+
+    def __init__(self, quantile: float, window: int = 512, refresh_every: int = 32) -> None:
+        self._quantile = quantile
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._refresh_every = refresh_every
+        self._since_refresh = 0
+        self._value: Optional[float] = None
+
+    def observe(self, latency: float) -> None:
+        self._samples.append(latency)
+        self._since_refresh += 1
+        if self._value is None or self._since_refresh >= self._refresh_every:
+            ordered = sorted(self._samples)
+            index = min(len(ordered) - 1, math.ceil(self._quantile * len(ordered)) - 1)
+            self._value = ordered[max(0, index)]
+            self._since_refresh = 0
+
+    @property
+    def value(self) -> Optional[float]:
+        return self._value
+
+
+class HedgeBudget:
+    """Token bucket capping hedges to a fraction of total requests."""
+
+    def __init__(self, ratio: float, burst: float = 10.0) -> None:
+        self._ratio = ratio
+        self._burst = burst
+        self._tokens = burst
+
+    def deposit(self) -> None:
+        self._tokens = min(self._burst, self._tokens + self._ratio)
+
+    def try_spend(self) -> bool:
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return True
+        return False
+
+
+class ResilientRouter:
+    """Wrap a router with an optional circuit breaker and optional hedging.
+
+    With hedging enabled, a ``complete()`` that has not answered within the
+    observed latency quantile triggers a second, identical call; the first
+    successful answer wins and the other call is cancelled. Wrapping a pool
+    lets the hedge land on a different member. Attributes the wrapper does
+    not define are delegated to the inner router, except ``complete_batch``:
+    batch-capable routers are wrapped in :class:`ResilientBatchRouter` so
+    batched calls go through the breaker as well.
+    """
+
+    def __init__(
+        self,
+        inner: Any,
+        *,
+        breaker: Optional[CircuitBreaker] = None,
+        hedge_quantile: Optional[float] = None,
+        hedge_budget: float = DEFAULT_HEDGE_BUDGET,
+        hedge_min_delay_ms: float = DEFAULT_HEDGE_MIN_DELAY_MS,
+    ) -> None:
+        self.inner = inner
+        self.breaker = breaker
+        self._latency = LatencyTracker(hedge_quantile) if hedge_quantile else None
+        self._budget = HedgeBudget(hedge_budget)
+        self._min_delay_s = hedge_min_delay_ms / 1000.0
+        self._label = str(inner.name())
+
+    def __getattr__(self, item: str) -> Any:
+        inner = self.__dict__.get("inner")
+        if inner is None or item == "complete_batch":
+            raise AttributeError(item)
+        return getattr(inner, item)
+
+    def name(self) -> str:
+        return self.inner.name()
+
+    async def health(self) -> dict:
+        return await self.inner.health()
+
+    def models(self) -> List[str]:
+        return self.inner.models()
+
+    def metadata(self) -> Dict[str, Any]:
+        metadata = dict(self.inner.metadata())
+        if self.breaker is not None:
+            metadata["breaker"] = self.breaker.state
+        return metadata
+
+    async def _through_breaker(self, call: Callable[[], Awaitable[_T]]) -> _T:
+        breaker = self.breaker
+        if breaker is not None and not breaker.allow():
+            raise breaker.open_error()
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            if breaker is not None:
+                breaker.record_cancelled()
+            raise
+        except Exception:
+            if breaker is not None:
+                breaker.record_failure()
+            raise
+        if breaker is not None:
+            breaker.record_success()
+        return result
+
+    async def _guarded(self, req: Dict[str, Any]) -> Dict[str, Any]:
+        started = time.perf_counter()
+        result = await self._through_breaker(lambda: self.inner.complete(req))
+        if self._latency is not None:
+            self._latency.observe(time.perf_counter() - started)
+        return result
+
+    def _hedge_delay(self) -> Optional[float]:
+        if self._latency is None or self._latency.value is None:
+            return None
+        return max(self._min_delay_s, self._latency.value)
+
+    async def complete(self, req: Dict[str, Any]) -> Dict[str, Any]:
+        delay = self._hedge_delay()
+        if delay is None:
+            if self._latency is not None:
+                self._budget.deposit()
+            return await self._guarded(req)
+
+        self._budget.deposit()
+        primary = asyncio.ensure_future(self._guarded(req))
+        pending = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return primary.result()
+            if not self._budget.try_spend():
+                HEDGES.labels(self._label, "budget_exhausted").inc()
+                return await primary
+            HEDGES.labels(self._label, "sent").inc()
+            hedge = asyncio.ensure_future(self._guarded(req))
+            pending.add(hedge)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winner = None
+                for task in done:
+                    failure = task.exception()
+                    if failure is not None:
+                        error = failure
+                    elif winner is None:
+                        winner = task
+                if winner is not None:
+                    HEDGES.labels(self._label, "won" if winner is hedge else "lost").inc()
+                    return winner.result()
+            raise error if error is not None else RuntimeError("Hedged call produced no result")
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def stream(self, req: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        breaker = self.breaker
+        if breaker is not None and not breaker.allow():
+            raise breaker.open_error()
+        try:
+            async for chunk in self.inner.stream(req):
+                yield chunk
+        except (asyncio.CancelledError, GeneratorExit):
+            if breaker is not None:
+                breaker.record_cancelled()
+            raise
+        except Exception:
+            if breaker is not None:
+                breaker.record_failure()
+            raise
+        if breaker is not None:
+            breaker.record_success()
+
+
+class ResilientBatchRouter(ResilientRouter):
+    """:class:`ResilientRouter` for routers that implement ``complete_batch``.
+
+    Batched calls share the breaker with single calls; they are not hedged
+    and do not feed the hedging latency quantile.
+    """
+
+    async def complete_batch(self, reqs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return await self._through_breaker(lambda: self.inner.complete_batch(reqs))
+
+
+def wrap_router(router: Optional[Any]) -> Optional[Any]:
+    """Apply breaker/hedging according to the ``circuit_breaker`` and ``hedging`` flags.
+
+    Routers that manage per-member breakers themselves (the router pool) are
+    not given an extra breaker.
+    """
+
+    if router is None:
+        return None
+    use_breaker = is_feature_enabled("circuit_breaker") and not getattr(router, "manages_breakers", False)
+    use_hedging = is_feature_enabled("hedging")
+    if not use_breaker and not use_hedging:
+        return router
+    wrapper = ResilientBatchRouter if callable(getattr(router, "complete_batch", None)) else ResilientRouter
+    return wrapper(
+        router,
+        breaker=CircuitBreaker(str(router.name())) if use_breaker else None,
+        hedge_quantile=DEFAULT_HEDGE_QUANTILE if use_hedging else None,
+    )
+
+
+__all__ = [
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "ResilientBatchRouter",
+    "ResilientRouter",
+    "wrap_router",
+]
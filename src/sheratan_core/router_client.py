@@ -1,27 +1,277 @@
 from __future__ import annotations
-import os, httpx
-from typing import Any, Dict
 
-class RouterClient:
-    def __init__(self, base_url: str | None = None, timeout_s: float = 30.0):
-        self.base = (base_url or os.getenv("SHERATAN_ROUTER_BASE") or "").rstrip("/")
-        if not self.base:
+import asyncio
+import importlib.util
+import os
+import threading
+import weakref
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Coroutine, Dict, List, TypeVar
+
+import httpx
+
+from .config import coerce_bool
+
+_T = TypeVar("_T")
+
+
+@dataclass(frozen=True)
+class RouterClientConfig:
+    """Connection settings shared by the sync and async router clients."""
+
+    base_url: str
+    timeout_s: float = 30.0
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry_s: float = 30.0
+    http2: bool = False
+
+    @classmethod
+    def from_env(cls, base_url: str | None = None, timeout_s: float | None = None) -> "RouterClientConfig":
+        base = (base_url or os.getenv("SHERATAN_ROUTER_BASE") or "").rstrip("/")
+        if not base:
             raise RuntimeError("SHERATAN_ROUTER_BASE missing")
-        self.client = httpx.Client(timeout=timeout_s)
+        return cls(
+            base_url=base,
+            timeout_s=timeout_s if timeout_s is not None else float(os.getenv("SHERATAN_ROUTER_TIMEOUT_S", "30")),
+            max_connections=int(os.getenv("SHERATAN_ROUTER_MAX_CONNECTIONS", "100")),
+            max_keepalive_connections=int(os.getenv("SHERATAN_ROUTER_MAX_KEEPALIVE", "20")),
+            keepalive_expiry_s=float(os.getenv("SHERATAN_ROUTER_KEEPALIVE_EXPIRY_S", "30")),
+            http2=coerce_bool(os.getenv("SHERATAN_ROUTER_HTTP2"), default=False),
+        )
+
+    def client_kwargs(self) -> Dict[str, Any]:
+        if self.http2 and importlib.util.find_spec("h2") is None:
+            raise RuntimeError("HTTP/2 requires the 'h2' package (pip install 'httpx[http2]')")
+        return {
+            "base_url": self.base_url,
+            "timeout": httpx.Timeout(self.timeout_s),
+            "limits": httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry_s,
+            ),
+            "http2": self.http2,
+        }
+
+
+def _complete_payload(prompt: str, max_tokens: int, model: str | None) -> Dict[str, Any]:
+    payload: Dict[str, Any] = {"prompt": prompt, "max_tokens": max_tokens}
+    if model:
+        payload["model"] = model
+    return payload
+
+
+def _timeout(timeout_s: float | None) -> Any:
+    return httpx.USE_CLIENT_DEFAULT if timeout_s is None else httpx.Timeout(timeout_s)
+
+
+class AsyncRouterClient:
+    """Non-blocking router client with a shared keep-alive connection pool.
 
-    def health(self) -> Dict[str, Any]:
-        r = self.client.get(f"{self.base}/health")
+    The underlying :class:`httpx.AsyncClient` is created on :meth:`start` (or on
+    first use) and reused for every call until :meth:`aclose`.
+    """
+
+    def __init__(
+        self,
+        base_url: str | None = None,
+        timeout_s: float | None = None,
+        *,
+        config: RouterClientConfig | None = None,
+    ) -> None:
+        self.config = config or RouterClientConfig.from_env(base_url, timeout_s)
+        self.base = self.config.base_url
+        self._client: httpx.AsyncClient | None = None
+
+    async def start(self) -> None:
+        if self._client is None:
+            self._client = httpx.AsyncClient(**self.config.client_kwargs())
+
+    async def aclose(self) -> None:
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+    async def __aenter__(self) -> "AsyncRouterClient":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        await self.aclose()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(**self.config.client_kwargs())
+        return self._client
+
+    async def health(self, timeout_s: float | None = None) -> Dict[str, Any]:
+        r = await self.client.get("/health", timeout=_timeout(timeout_s))
         r.raise_for_status()
         return r.json()
 
-    def models(self) -> list[str]:
-        r = self.client.get(f"{self.base}/models")
+    async def models(self, timeout_s: float | None = None) -> List[str]:
+        r = await self.client.get("/models", timeout=_timeout(timeout_s))
         r.raise_for_status()
         return r.json()
 
-    def complete(self, prompt: str, max_tokens: int = 128, model: str | None = None) -> Dict[str, Any]:
-        payload = {"prompt": prompt, "max_tokens": max_tokens}
-        if model: payload["model"] = model
-        r = self.client.post(f"{self.base}/complete", json=payload)
+    async def complete(
+        self,
+        prompt: str,
+        max_tokens: int = 128,
+        model: str | None = None,
+        timeout_s: float | None = None,
+    ) -> Dict[str, Any]:
+        payload = _complete_payload(prompt, max_tokens, model)
+        r = await self.client.post("/complete", json=payload, timeout=_timeout(timeout_s))
         r.raise_for_status()
         return r.json()
+
+
+_background_loop: asyncio.AbstractEventLoop | None = None
+_background_lock = threading.Lock()
+
+
+def _shared_loop() -> asyncio.AbstractEventLoop:
+    """Event loop in one daemon thread, shared by every :class:`RouterClient`."""
+
+    global _background_loop
+    with _background_lock:
+        if _background_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="router-client", daemon=True).start()
+            _background_loop = loop
+        return _background_loop
+
+
+def _close_in_background(client: AsyncRouterClient) -> None:
+    # Finalizer path: nobody waits for it, so only schedule the close.
+    asyncio.run_coroutine_threadsafe(client.aclose(), _shared_loop())
+
+
+class RouterClient:
+    """Blocking facade over :class:`AsyncRouterClient`.
+
+    Calls run on one background event loop shared by all instances, so the
+    request and response handling and the connection pool settings are
+    those of the async client, and the facade also works from code that
+    already runs inside an event loop. Use it as a context manager or call
+    ``close()``; an instance that is garbage-collected unclosed still has its
+    connection pool closed in the background.
+    """
+
+    def __init__(
+        self,
+        base_url: str | None = None,
+        timeout_s: float = 30.0,
+        *,
+        config: RouterClientConfig | None = None,
+    ) -> None:
+        self._async = AsyncRouterClient(config=config or RouterClientConfig.from_env(base_url, timeout_s))
+        self.config = self._async.config
+        self.base = self._async.base
+        self._loop = _shared_loop()
+        self._finalizer = weakref.finalize(self, _close_in_background, self._async)
+
+    def __enter__(self) -> "RouterClient":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def _run(self, coro: Coroutine[Any, Any, _T]) -> _T:
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def close(self) -> None:
+        if self._finalizer.detach() is not None:
+            self._run(self._async.aclose())
+
+    def health(self, timeout_s: float | None = None) -> Dict[str, Any]:
+        return self._run(self._async.health(timeout_s))
+
+    def models(self, timeout_s: float | None = None) -> List[str]:
+        return self._run(self._async.models(timeout_s))
+
+    def complete(
+        self,
+        prompt: str,
+        max_tokens: int = 128,
+        model: str | None = None,
+        timeout_s: float | None = None,
+    ) -> Dict[str, Any]:
+        return self._run(self._async.complete(prompt, max_tokens, model, timeout_s))
+
+
+class HttpRouter:
+    """:class:`~sheratan_core.types.LLMRouter` backed by an :class:`AsyncRouterClient`.
+
+    Use ``SHERATAN_ROUTER=sheratan_core.router_client:create_router`` to route
+    completions to ``SHERATAN_ROUTER_BASE``; the registry closes the pool on
+    shutdown.
+    """
+
+    def __init__(self, client: AsyncRouterClient | None = None) -> None:
+        self._client = client or AsyncRouterClient()
+        self._models: List[str] = []
+        self._models_fetched = False
+        self._models_task: asyncio.Task[None] | None = None
+
+    def name(self) -> str:
+        return "http"
+
+    async def health(self) -> dict:
+        status = await self._client.health()
+        await self._refresh_models()
+        return status
+
+    async def _refresh_models(self) -> None:
+        try:
+            self._models = await self._client.models()
+            self._models_fetched = True
+        except httpx.HTTPError:
+            pass
+
+    def models(self) -> List[str]:
+        """Models reported by the router as of the last fetch.
+
+        ``models()`` is synchronous in the router protocol, so it never waits
+        on the network: ``health()`` refreshes the list, and a call before
+        any successful fetch starts one in the background and returns ``[]``.
+        """
+
+        if not self._models_fetched and self._models_task is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                loop = None
+            if loop is not None:
+                self._models_task = loop.create_task(self._refresh_models())
+                self._models_task.add_done_callback(self._models_fetch_done)
+        return list(self._models)
+
+    def _models_fetch_done(self, _: "asyncio.Task[None]") -> None:
+        self._models_task = None
+
+    def metadata(self) -> Dict[str, Any]:
+        return {"base_url": self._client.base, "http2": self._client.config.http2}
+
+    async def complete(self, req: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._client.complete(
+            prompt=req["prompt"],
+            max_tokens=req.get("max_tokens", 128),
+            model=req.get("model"),
+        )
+
+    async def stream(self, req: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        # The upstream HTTP API has no streaming endpoint; emit the full result.
+        yield await self.complete(req)
+
+    async def aclose(self) -> None:
+        if self._models_task is not None:
+            self._models_task.cancel()
+        await self._client.aclose()
+
+
+def create_router() -> HttpRouter:
+    return HttpRouter()
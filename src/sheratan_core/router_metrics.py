@@ -0,0 +1,212 @@
+"""Latency and token-throughput metrics per router and model."""
+from __future__ import annotations
+
+import os
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from .metrics import METRICS_ENABLED, buckets_from_env, counter, histogram
+
+OTHER_MODEL_LABEL = "__other__"
+DEFAULT_MAX_MODELS = int(os.getenv("SHERATAN_ROUTER_METRICS_MAX_MODELS", "50"))
+
+ROUTER_LATENCY = histogram(
+    "sheratan_router_request_duration_seconds",
+    "Duration of upstream router calls",
+    ("router", "model", "operation"),
+    buckets=buckets_from_env(
+        "SHERATAN_ROUTER_LATENCY_BUCKETS", (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120)
+    ),
+)
+ROUTER_ERRORS = counter(
+    "sheratan_router_errors_total",
+    "Upstream router calls that raised",
+    ("router", "model", "operation"),
+)
+ROUTER_TTFC = histogram(
+    "sheratan_router_stream_ttfc_seconds",
+    "Time from calling stream() to the first chunk from the router",
+    ("router", "model"),
+    buckets=buckets_from_env("SHERATAN_ROUTER_TTFC_BUCKETS", (0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10)),
+)
+ROUTER_PROMPT_TOKENS = counter(
+    "sheratan_router_prompt_tokens_total",
+    "Prompt tokens reported in router usage",
+    ("router", "model"),
+)
+ROUTER_COMPLETION_TOKENS = counter(
+    "sheratan_router_completion_tokens_total",
+    "Completion tokens reported in router usage",
+    ("router", "model"),
+)
+ROUTER_TOKENS_PER_SECOND = histogram(
+    "sheratan_router_completion_tokens_per_second",
+    "Completion tokens per second of upstream call duration",
+    ("router", "model"),
+    buckets=buckets_from_env("SHERATAN_ROUTER_TPS_BUCKETS", (5, 10, 20, 40, 80, 160, 320, 640, 1280)),
+)
+
+
+def _token_counts(result: Any) -> Tuple[Optional[int], Optional[int]]:
+    """Prompt/completion tokens from ``result["usage"]`` (OpenAI or Anthropic keys)."""
+
+    usage = result.get("usage") if isinstance(result, dict) else None
+    if not isinstance(usage, dict):
+        return None, None
+    prompt = usage.get("prompt_tokens", usage.get("input_tokens"))
+    completion = usage.get("completion_tokens", usage.get("output_tokens"))
+    return (
+        prompt if isinstance(prompt, int) else None,
+        completion if isinstance(completion, int) else None,
+    )
+
+
+class _ModelMetrics:
+    """Bound label children for one ``(router, model)`` pair."""
+
+    __slots__ = ("latency", "errors", "ttfc", "prompt_tokens", "completion_tokens", "tokens_per_second")
+
+    def __init__(self, router: str, model: str) -> None:
+        self.latency = {
+            operation: ROUTER_LATENCY.labels(router, model, operation)
+            for operation in ("complete", "complete_batch", "stream")
+        }
+        self.errors = {
+            operation: ROUTER_ERRORS.labels(router, model, operation)
+            for operation in ("complete", "complete_batch", "stream")
+        }
+        self.ttfc = ROUTER_TTFC.labels(router, model)
+        self.prompt_tokens = ROUTER_PROMPT_TOKENS.labels(router, model)
+        self.completion_tokens = ROUTER_COMPLETION_TOKENS.labels(router, model)
+        self.tokens_per_second = ROUTER_TOKENS_PER_SECOND.labels(router, model)
+
+    def record_usage(self, result: Any, elapsed_s: float) -> None:
+        prompt, completion = _token_counts(result)
+        if prompt:
+            self.prompt_tokens.inc(prompt)
+        if completion:
+            self.completion_tokens.inc(completion)
+            if elapsed_s > 0:
+                self.tokens_per_second.observe(completion / elapsed_s)
+
+
+class InstrumentedRouter:
+    """Record upstream latency, time to first chunk and token usage of a router.
+
+    Metrics are labelled with the router's ``name()`` and the requested
+    model. The first ``max_models`` distinct models keep their own label,
+    later ones share ``__other__``, since the model is chosen by the client.
+    Attributes the wrapper does not define are delegated to the inner router.
+    """
+
+    def __init__(self, inner: Any, max_models: int = DEFAULT_MAX_MODELS) -> None:
+        self.inner = inner
+        self._label = str(inner.name())
+        self._max_models = max_models
+        self._models: Dict[str, _ModelMetrics] = {}
+
+    def __getattr__(self, item: str) -> Any:
+        inner = self.__dict__.get("inner")
+        if inner is None:
+            raise AttributeError(item)
+        return getattr(inner, item)
+
+    def name(self) -> str:
+        return self.inner.name()
+
+    async def health(self) -> dict:
+        return await self.inner.health()
+
+    def models(self) -> List[str]:
+        return self.inner.models()
+
+    def metadata(self) -> Dict[str, Any]:
+        return self.inner.metadata()
+
+    def _metrics(self, req: Dict[str, Any]) -> _ModelMetrics:
+        model = str(req.get("model", ""))
+        metrics = self._models.get(model)
+        if metrics is None:
+            if len(self._models) >= self._max_models:
+                model = OTHER_MODEL_LABEL
+                metrics = self._models.get(model)
+            if metrics is None:
+                metrics = _ModelMetrics(self._label, model)
+                self._models[model] = metrics
+        return metrics
+
+    async def complete(self, req: Dict[str, Any]) -> Dict[str, Any]:
+        metrics = self._metrics(req)
+        start = time.perf_counter()
+        try:
+            result = await self.inner.complete(req)
+        except Exception:
+            metrics.errors["complete"].inc()
+            raise
+        elapsed = time.perf_counter() - start
+        metrics.latency["complete"].observe(elapsed)
+        metrics.record_usage(result, elapsed)
+        return result
+
+    async def stream(self, req: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        metrics = self._metrics(req)
+        start = time.perf_counter()
+        first = True
+        usage_chunk: Optional[Dict[str, Any]] = None
+        try:
+            async for chunk in self.inner.stream(req):
+                if first:
+                    metrics.ttfc.observe(time.perf_counter() - start)
+                    first = False
+                if isinstance(chunk, dict) and "usage" in chunk:
+                    usage_chunk = chunk
+                yield chunk
+        except Exception:
+            metrics.errors["stream"].inc()
+            raise
+        elapsed = time.perf_counter() - start
+        metrics.latency["stream"].observe(elapsed)
+        # Streaming routers report cumulative usage; the last report counts.
+        if usage_chunk is not None:
+            metrics.record_usage(usage_chunk, elapsed)
+
+
+class InstrumentedBatchRouter(InstrumentedRouter):
+    """:class:`InstrumentedRouter` for routers that implement ``complete_batch``."""
+
+    async def complete_batch(self, reqs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # The batcher groups requests by model, so one label set covers the call.
+        metrics = self._metrics(reqs[0] if reqs else {})
+        start = time.perf_counter()
+        try:
+            results = await self.inner.complete_batch(reqs)
+        except Exception:
+            metrics.errors["complete_batch"].inc()
+            raise
+        elapsed = time.perf_counter() - start
+        metrics.latency["complete_batch"].observe(elapsed)
+        for result in results:
+            metrics.record_usage(result, elapsed)
+        return results
+
+
+def instrument_router(router: Optional[Any]) -> Optional[Any]:
+    """Wrap ``router`` in an instrumented router while metrics are enabled.
+
+    Routers that dispatch to separately built members (the router pool)
+    are left alone; their members are instrumented instead.
+    """
+
+    if router is None or not METRICS_ENABLED or getattr(router, "instruments_members", False):
+        return router
+    if callable(getattr(router, "complete_batch", None)):
+        return InstrumentedBatchRouter(router)
+    return InstrumentedRouter(router)
+
+
+__all__ = [
+    "OTHER_MODEL_LABEL",
+    "InstrumentedBatchRouter",
+    "InstrumentedRouter",
+    "instrument_router",
+]
@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from typing import Any, Dict, Optional, List
+from typing import Annotated, Any, Dict, Optional, List, Literal, Union
 
 from pydantic import BaseModel, Field
 
@@ -68,12 +68,65 @@ class RelayFinal(BaseModel):
     ts: Optional[str] = None
 
 
+class RelayBatchStatus(BaseModel):
+    """Status event inside a ``/relay/batch`` body."""
+
+    type: Literal["status"]
+    idempotency_key: str
+    event: RelayStatus
+
+
+class RelayBatchFinal(BaseModel):
+    """Final event inside a ``/relay/batch`` body."""
+
+    type: Literal["final"]
+    idempotency_key: str
+    event: RelayFinal
+
+
+RelayBatchItem = Annotated[Union[RelayBatchStatus, RelayBatchFinal], Field(discriminator="type")]
+
+
+class RelayBatchResponse(BaseModel):
+    """Per-event outcome of a batch: accepted, duplicate, conflict or invalid."""
+
+    accepted: int = 0
+    results: List[str] = Field(default_factory=list)
+    errors: Dict[int, str] = Field(default_factory=dict)
+
+
+class JobStateResponse(BaseModel):
+    """Latest known state of a relay job."""
+
+    job_id: str
+    tenant: Optional[str] = None
+    trace_id: Optional[str] = None
+    phase: Optional[str] = None
+    progress: Optional[int] = None
+    status: str = Field(description="Final status, or 'running' until the final callback arrives")
+    ts: Optional[str] = None
+    updated_at: float
+
+
+class JobListResponse(BaseModel):
+    """One page of jobs, most recently updated first."""
+
+    items: List[JobStateResponse] = Field(default_factory=list)
+    next_offset: Optional[int] = None
+
+
 __all__ = [
     "CompleteRequest",
     "CompleteResponse",
     "RelayStatus",
     "RelayFinal",
+    "RelayBatchFinal",
+    "RelayBatchItem",
+    "RelayBatchResponse",
+    "RelayBatchStatus",
     "AckResponse",
+    "JobListResponse",
+    "JobStateResponse",
     "RouterHealthResponse",
     "RouterModelsResponse",
 ]
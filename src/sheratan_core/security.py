@@ -0,0 +1,138 @@
+"""HMAC signing helpers for relay callbacks."""
+from __future__ import annotations
+
+import hashlib
+import hmac
+import os
+from typing import Iterable, List, Mapping, Optional, Tuple
+
+SIGNATURE_HEADER = "X-Sheratan-Signature"
+TIMESTAMP_HEADER = "X-Sheratan-Timestamp"
+IDEMPOTENCY_HEADER = "X-Sheratan-Idempotency-Key"
+KEY_ID_HEADER = "X-Sheratan-Key-Id"
+DEFAULT_KEY_ID = "default"
+
+DEFAULT_MAX_SKEW_SECONDS = int(os.getenv("SHERATAN_HMAC_MAX_SKEW_SECONDS", "300"))
+
+
+def compute_signature(secret: str, timestamp: str, idempotency: str, body: bytes) -> str:
+    """Return the hex HMAC-SHA256 over ``timestamp|idempotency|body``."""
+
+    message = b"|".join([timestamp.encode("utf-8"), idempotency.encode("utf-8"), body])
+    return hmac.new(secret.encode("utf-8"), message, hashlib.sha256).hexdigest()
+
+
+def verify_signature(
+    secret: str, timestamp: str, idempotency: str, body: bytes, signature: str | None
+) -> bool:
+    """Constant-time comparison of ``signature`` against the expected value."""
+
+    if not signature:
+        return False
+    expected = compute_signature(secret, timestamp, idempotency, body)
+    return hmac.compare_digest(expected, signature.strip().lower())
+
+
+def body_fingerprint(body: bytes) -> str:
+    """Stable fingerprint used for idempotency conflict detection."""
+
+    return hashlib.sha256(body).hexdigest()
+
+
+class SignatureError(ValueError):
+    """A relay request failed timestamp or signature validation."""
+
+
+def check_timestamp(timestamp: str, now: int, max_skew_seconds: int = DEFAULT_MAX_SKEW_SECONDS) -> None:
+    try:
+        sent_at = int(timestamp)
+    except ValueError:
+        raise SignatureError("Invalid timestamp") from None
+    if abs(now - sent_at) > max_skew_seconds:
+        raise SignatureError("Timestamp outside allowed skew")
+
+
+class PendingSignature:
+    """HMAC states of the candidate secrets, fed as the body arrives."""
+
+    __slots__ = ("_states",)
+
+    def __init__(self, states: List[Tuple[str, "hmac.HMAC"]]) -> None:
+        self._states = states
+
+    def update(self, chunk: bytes) -> None:
+        for _, state in self._states:
+            state.update(chunk)
+
+    def verify(self, signature: Optional[str]) -> Optional[str]:
+        """Return the id of the secret that produced ``signature``, if any."""
+
+        if not signature:
+            return None
+        signature = signature.strip().lower()
+        for key_id, state in self._states:
+            if hmac.compare_digest(state.hexdigest(), signature):
+                return key_id
+        return None
+
+
+class HmacKeyring:
+    """Active relay secrets, each kept as a keyed HMAC-SHA256 state.
+
+    Keying HMAC hashes the padded secret twice; that work is done once here
+    and every request starts from a ``copy()`` of the keyed state. Requests
+    that name their secret in ``X-Sheratan-Key-Id`` are checked against that
+    secret only, so rotating in a new secret does not add a hash pass per
+    request. Unnamed requests are checked against the only secret, or
+    against ``default`` while several are active, never against all.
+    """
+
+    def __init__(self, secrets: Mapping[str, str]) -> None:
+        if not secrets:
+            raise ValueError("HmacKeyring needs at least one secret")
+        self._keys = {
+            key_id: hmac.new(secret.encode("utf-8"), digestmod=hashlib.sha256)
+            for key_id, secret in secrets.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def key_ids(self) -> Iterable[str]:
+        return self._keys.keys()
+
+    def start(self, timestamp: str, idempotency: str, key_id: Optional[str] = None) -> PendingSignature:
+        """Begin verifying a request; feed the body with ``update()``."""
+
+        if key_id is None:
+            key_id = next(iter(self._keys)) if len(self._keys) == 1 else DEFAULT_KEY_ID
+        keyed = self._keys.get(key_id)
+        if keyed is None:
+            return PendingSignature([])
+        state = keyed.copy()
+        state.update(b"|".join([timestamp.encode("utf-8"), idempotency.encode("utf-8"), b""]))
+        return PendingSignature([(key_id, state)])
+
+    def verify(
+        self, timestamp: str, idempotency: str, body: bytes, signature: Optional[str], key_id: Optional[str] = None
+    ) -> Optional[str]:
+        pending = self.start(timestamp, idempotency, key_id)
+        pending.update(body)
+        return pending.verify(signature)
+
+
+__all__ = [
+    "DEFAULT_KEY_ID",
+    "DEFAULT_MAX_SKEW_SECONDS",
+    "IDEMPOTENCY_HEADER",
+    "KEY_ID_HEADER",
+    "SIGNATURE_HEADER",
+    "TIMESTAMP_HEADER",
+    "HmacKeyring",
+    "PendingSignature",
+    "SignatureError",
+    "body_fingerprint",
+    "check_timestamp",
+    "compute_signature",
+    "verify_signature",
+]
@@ -0,0 +1,66 @@
+"""Coalesce concurrent identical calls into one upstream request."""
+from __future__ import annotations
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Generic, TypeVar
+
+from .metrics import counter
+
+T = TypeVar("T")
+
+COALESCED_REQUESTS = counter(
+    "sheratan_completion_coalesced_total",
+    "Completion requests that joined an identical in-flight call",
+)
+
+
+class _Call(Generic[T]):
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: "asyncio.Task[T]") -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight(Generic[T]):
+    """Run at most one call per key at a time and share its outcome.
+
+    The shared call runs in its own task, so a waiter that is cancelled (for
+    example because its client disconnected) only stops waiting. The call is
+    cancelled only once every waiter has gone. Exceptions raised by the call
+    are re-raised in every waiter.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[str, _Call[T]] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+        else:
+            COALESCED_REQUESTS.inc()
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if call.task.cancelled():
+                raise
+            call.waiters -= 1
+            if call.waiters == 0:
+                self._forget(key, call)
+                call.task.cancel()
+            raise
+
+    def _forget(self, key: str, call: _Call[T]) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+
+__all__ = ["SingleFlight"]
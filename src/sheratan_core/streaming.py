@@ -0,0 +1,136 @@
+"""Relay router streams to HTTP clients as SSE or NDJSON."""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Union
+
+SSE_MEDIA_TYPE = "text/event-stream"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+DEFAULT_STREAM_BUFFER_CHUNKS = int(os.getenv("SHERATAN_STREAM_BUFFER_CHUNKS", "16"))
+
+_DONE = object()
+
+
+class _StreamFailure:
+    __slots__ = ("error",)
+
+    def __init__(self, error: BaseException) -> None:
+        self.error = error
+
+
+def _dumps(payload: Any) -> bytes:
+    return json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8")
+
+
+class SSEEncoder:
+    """Encode chunks as ``text/event-stream`` frames."""
+
+    media_type = SSE_MEDIA_TYPE
+
+    def chunk(self, chunk: Dict[str, Any]) -> bytes:
+        return b"data: " + _dumps(chunk) + b"\n\n"
+
+    def done(self) -> bytes:
+        return b"event: done\ndata: {}\n\n"
+
+    def error(self, detail: str) -> bytes:
+        return b"event: error\ndata: " + _dumps({"detail": detail}) + b"\n\n"
+
+
+class NDJSONEncoder:
+    """Encode chunks as newline-delimited JSON."""
+
+    media_type = NDJSON_MEDIA_TYPE
+
+    def chunk(self, chunk: Dict[str, Any]) -> bytes:
+        return _dumps(chunk) + b"\n"
+
+    def done(self) -> bytes:
+        return b""
+
+    def error(self, detail: str) -> bytes:
+        return _dumps({"error": detail}) + b"\n"
+
+
+StreamEncoder = Union[SSEEncoder, NDJSONEncoder]
+
+ENCODERS: Dict[str, StreamEncoder] = {"sse": SSEEncoder(), "ndjson": NDJSONEncoder()}
+
+
+async def _close_source(source: AsyncIterator[Dict[str, Any]]) -> None:
+    aclose = getattr(source, "aclose", None)
+    if aclose is not None:
+        try:
+            await aclose()
+        except Exception:
+            pass
+
+
+async def relay_stream(
+    source: AsyncIterator[Dict[str, Any]],
+    encoder: StreamEncoder,
+    *,
+    buffer_size: int = DEFAULT_STREAM_BUFFER_CHUNKS,
+    on_first_chunk: Optional[Callable[[], None]] = None,
+) -> AsyncIterator[bytes]:
+    """Pump ``source`` through a bounded queue and yield encoded frames.
+
+    At most ``buffer_size`` chunks are held per connection: once the client
+    stops reading, the producer blocks on the full queue and stops pulling
+    from the router. Closing this generator (e.g. on client disconnect)
+    cancels the producer and closes the router stream.
+    """
+
+    queue: "asyncio.Queue[Any]" = asyncio.Queue(maxsize=max(1, buffer_size))
+
+    async def produce() -> None:
+        try:
+            async for chunk in source:
+                await queue.put(chunk)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await queue.put(_StreamFailure(e))
+            return
+        finally:
+            await _close_source(source)
+        await queue.put(_DONE)
+
+    producer = asyncio.create_task(produce())
+    first = True
+    try:
+        while True:
+            item = await queue.get()
+            if item is _DONE:
+                done = encoder.done()
+                if done:
+                    yield done
+                return
+            if isinstance(item, _StreamFailure):
+                yield encoder.error(f"Router error: {item.error}")
+                return
+            if first and on_first_chunk is not None:
+                on_first_chunk()
+            first = False
+            yield encoder.chunk(item)
+    finally:
+        if not producer.done():
+            producer.cancel()
+        try:
+            await producer
+        except asyncio.CancelledError:
+            pass
+
+
+__all__ = [
+    "DEFAULT_STREAM_BUFFER_CHUNKS",
+    "ENCODERS",
+    "NDJSONEncoder",
+    "NDJSON_MEDIA_TYPE",
+    "SSEEncoder",
+    "SSE_MEDIA_TYPE",
+    "StreamEncoder",
+    "relay_stream",
+]
@@ -9,3 +9,11 @@ class LLMRouter(Protocol):
     def metadata(self) -> Dict[str, Any]: ...
     async def complete(self, req: Dict[str, Any]) -> Dict[str, Any]: ...
     async def stream(self, req: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]: ...
+
+@runtime_checkable
+class BatchLLMRouter(LLMRouter, Protocol):
+    """Optional capability: complete several requests in one upstream call.
+
+    ``complete_batch`` must return one result per request, in request order.
+    """
+    async def complete_batch(self, reqs: List[Dict[str, Any]]) -> List[Dict[str, Any]]: ...
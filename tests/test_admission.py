@@ -0,0 +1,143 @@
+import asyncio
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+from fastapi import HTTPException
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from sheratan_core import api  # noqa: E402
+from sheratan_core.admission import AdmissionController, AdmissionRejectedError  # noqa: E402
+from sheratan_core.registry import RouterManager  # noqa: E402
+from sheratan_core.schemas import CompleteRequest  # noqa: E402
+
+
+async def _drain(controller: AdmissionController, requests: List[tuple]) -> List[str]:
+    """Queue ``requests`` behind one held slot and record the admission order."""
+
+    order: List[str] = []
+    blocker = await controller.acquire("blocker")
+
+    async def worker(label: str, tenant: str, priority: str) -> None:
+        async with controller.slot(tenant, priority):
+            order.append(label)
+
+    tasks = [asyncio.create_task(worker(*item)) for item in requests]
+    await asyncio.sleep(0)
+    blocker.release()
+    await asyncio.gather(*tasks)
+    return order
+
+
+def test_concurrency_limit_is_enforced():
+    controller = AdmissionController(max_concurrency=2)
+    peak = 0
+
+    async def worker() -> None:
+        nonlocal peak
+        async with controller.slot("t"):
+            peak = max(peak, controller.active)
+            await asyncio.sleep(0.01)
+
+    async def scenario():
+        await asyncio.gather(*(worker() for _ in range(10)))
+
+    asyncio.run(scenario())
+    assert peak == 2
+    assert controller.active == 0 and controller.queued == 0
+
+
+def test_higher_priority_is_admitted_first():
+    controller = AdmissionController(max_concurrency=1)
+    order = asyncio.run(
+        _drain(controller, [("low", "t", "low"), ("normal", "t", "normal"), ("high", "t", "high")])
+    )
+    assert order == ["high", "normal", "low"]
+
+
+def test_tenants_share_slots_by_weight():
+    controller = AdmissionController(max_concurrency=1, tenant_weights={"big": 3, "small": 1})
+    requests = [(f"big{i}", "big", "normal") for i in range(6)]
+    requests += [(f"small{i}", "small", "normal") for i in range(6)]
+    order = asyncio.run(_drain(controller, requests))
+    first_eight = [label.rstrip("0123456789") for label in order[:8]]
+    assert first_eight.count("big") == 6
+    assert first_eight.count("small") == 2
+
+
+def test_full_queues_reject_with_retry_after():
+    controller = AdmissionController(max_concurrency=1, max_queue=2, tenant_max_queue=1)
+
+    async def scenario():
+        held = await controller.acquire("a")
+        queued = asyncio.create_task(controller.acquire("a"))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejectedError) as tenant_full:
+            await controller.acquire("a")
+        other = asyncio.create_task(controller.acquire("b"))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejectedError) as global_full:
+            await controller.acquire("c")
+        held.release()
+        (await queued).release()
+        (await other).release()
+        return tenant_full.value, global_full.value
+
+    tenant_full, global_full = asyncio.run(scenario())
+    assert tenant_full.status_code == 429
+    assert global_full.status_code == 503
+    assert global_full.retry_after >= 1
+
+
+def test_cancelled_and_timed_out_waiters_leave_the_queue():
+    controller = AdmissionController(max_concurrency=1, max_wait_s=0.02)
+
+    async def scenario():
+        held = await controller.acquire("a")
+        waiting = asyncio.create_task(controller.acquire("b"))
+        await asyncio.sleep(0)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        with pytest.raises(AdmissionRejectedError) as timeout:
+            await controller.acquire("c")
+        held.release()
+        return timeout.value
+
+    error = asyncio.run(scenario())
+    assert error.reason == "queue_timeout"
+    assert controller.active == 0 and controller.queued == 0
+
+
+class SlowRouter:
+    def name(self) -> str:
+        return "slow"
+
+    async def complete(self, req: Dict[str, Any]) -> Dict[str, Any]:
+        await asyncio.sleep(0.05)
+        return {"model": req["model"], "output": "ok", "usage": {}}
+
+
+def test_complete_endpoint_maps_rejection_to_429(monkeypatch):
+    router = SlowRouter()
+    monkeypatch.setattr(
+        api, "router_manager", RouterManager(loader=lambda spec: router, spec_provider=lambda: "slow")
+    )
+    monkeypatch.setattr(api, "admission", AdmissionController(max_concurrency=1, tenant_max_queue=0))
+    monkeypatch.setattr(api, "completion_cache", None)
+    monkeypatch.setattr(api, "completion_flights", None)
+    monkeypatch.setattr(api, "completion_batcher", None)
+
+    async def call(prompt: str):
+        return await api.llm_complete(CompleteRequest(prompt=prompt), None, "noisy", None)
+
+    async def scenario():
+        return await asyncio.gather(call("a"), call("b"), return_exceptions=True)
+
+    first, second = asyncio.run(scenario())
+    assert first.output == "ok"
+    assert isinstance(second, HTTPException)
+    assert second.status_code == 429
+    assert int(second.headers["Retry-After"]) >= 1
@@ -0,0 +1,92 @@
+import asyncio
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from sheratan_core.batching import MicroBatcher  # noqa: E402
+
+
+class BatchRouter:
+    def __init__(self, fail: bool = False) -> None:
+        self.batches: List[List[str]] = []
+        self.fail = fail
+
+    async def complete(self, req: Dict[str, Any]) -> Dict[str, Any]:
+        raise AssertionError("batch-capable routers should not be called one by one")
+
+    async def complete_batch(self, reqs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        self.batches.append([r["prompt"] for r in reqs])
+        if self.fail:
+            raise RuntimeError("batch failed")
+        return [{"model": r["model"], "output": r["prompt"].upper(), "usage": {}} for r in reqs]
+
+
+class SingleRouter:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def complete(self, req: Dict[str, Any]) -> Dict[str, Any]:
+        self.calls += 1
+        return {"model": req["model"], "output": req["prompt"], "usage": {}}
+
+
+def _req(prompt: str, model: str = "m") -> Dict[str, Any]:
+    return {"model": model, "prompt": prompt, "max_tokens": 8}
+
+
+def test_requests_are_grouped_by_size_and_model():
+    router = BatchRouter()
+    batcher = MicroBatcher(max_batch_size=3, max_wait_ms=20)
+
+    async def scenario():
+        reqs = [_req("a"), _req("b"), _req("c"), _req("d"), _req("x", model="other")]
+        return await asyncio.gather(*(batcher.submit(router, r) for r in reqs))
+
+    results = asyncio.run(scenario())
+    assert [r["output"] for r in results] == ["A", "B", "C", "D", "X"]
+    assert sorted(router.batches) == [["a", "b", "c"], ["d"], ["x"]]
+
+
+def test_batch_errors_reach_every_waiter():
+    router = BatchRouter(fail=True)
+    batcher = MicroBatcher(max_batch_size=2, max_wait_ms=1)
+
+    async def scenario():
+        return await asyncio.gather(
+            *(batcher.submit(router, _req(p)) for p in "ab"), return_exceptions=True
+        )
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_routers_without_batch_support_are_called_directly():
+    router = SingleRouter()
+    batcher = MicroBatcher(max_batch_size=8, max_wait_ms=1_000)
+
+    async def scenario():
+        return await asyncio.wait_for(batcher.submit(router, _req("solo")), timeout=0.5)
+
+    assert asyncio.run(scenario())["output"] == "solo"
+    assert router.calls == 1
+
+
+def test_cancelled_waiter_is_dropped_from_batch():
+    router = BatchRouter()
+    batcher = MicroBatcher(max_batch_size=8, max_wait_ms=10)
+
+    async def scenario():
+        leaving = asyncio.create_task(batcher.submit(router, _req("gone")))
+        staying = asyncio.create_task(batcher.submit(router, _req("kept")))
+        await asyncio.sleep(0)
+        leaving.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leaving
+        return await staying
+
+    assert asyncio.run(scenario())["output"] == "KEPT"
+    assert router.batches == [["kept"]]
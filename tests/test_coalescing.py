@@ -0,0 +1,47 @@
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from sheratan_core import api  # noqa: E402
+from sheratan_core.coalescing import StatusCoalescer  # noqa: E402
+from sheratan_core.eventlog import JobEventLog  # noqa: E402
+from sheratan_core.jobs import JobIndex  # noqa: E402
+from sheratan_core.schemas import RelayFinal, RelayStatus  # noqa: E402
+
+
+def test_only_the_newest_status_per_job_leaves_the_window():
+    flushed = []
+    coalescer = StatusCoalescer(0.02, lambda event, tenant: flushed.append((event.job_id, event.progress, tenant)))
+
+    async def scenario():
+        for progress in range(50):
+            coalescer.submit(RelayStatus(job_id="a", progress=progress), "t1")
+            coalescer.submit(RelayStatus(job_id="b", progress=progress))
+        assert flushed == []
+        await asyncio.sleep(0.05)
+
+    asyncio.run(scenario())
+    assert sorted(flushed) == [("a", 49, "t1"), ("b", 49, None)]
+    assert len(coalescer) == 0
+
+
+def test_final_supersedes_the_pending_status(monkeypatch, tmp_path):
+    log = JobEventLog(tmp_path, fsync_interval_ms=0)
+    monkeypatch.setattr(api, "event_log", log)
+    monkeypatch.setattr(api, "job_index", JobIndex())
+    coalescer = StatusCoalescer(60, api._persist_status)
+    monkeypatch.setattr(api, "status_coalescer", coalescer)
+
+    async def scenario():
+        for progress in (10, 20, 30):
+            api._record_status(RelayStatus(job_id="j", phase="running", progress=progress), None)
+        assert api.job_index.get("j").progress == 30
+        api._record_final(RelayFinal(job_id="j", status="done"), None)
+
+    asyncio.run(scenario())
+    assert len(coalescer) == 0
+    assert [event.kind for event in log.events_for("j")] == ["final"]
+    coalescer.close()
+    log.close()
@@ -0,0 +1,129 @@
+import asyncio
+import sys
+from pathlib import Path
+from typing import Any, Dict
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from sheratan_core import api  # noqa: E402
+from sheratan_core.cache import CompletionCache, completion_key  # noqa: E402
+from sheratan_core.registry import RouterManager  # noqa: E402
+from sheratan_core.schemas import CompleteRequest  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class CountingRouter:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def complete(self, req: Dict[str, Any]) -> Dict[str, Any]:
+        self.calls += 1
+        return {"model": req["model"], "output": f"answer-{self.calls}", "usage": {}}
+
+
+def test_key_is_independent_of_field_order():
+    assert completion_key({"model": "a", "prompt": "p", "max_tokens": 1}) == completion_key(
+        {"max_tokens": 1, "prompt": "p", "model": "a"}
+    )
+
+
+def test_lru_eviction_respects_byte_budget():
+    cache = CompletionCache(ttl_seconds=60, max_bytes=1_200)
+    value = {"output": "x" * 200}
+    for key in ("a", "b", "c"):
+        cache.put(key, value)
+    cache.get("a")
+    cache.put("d", value)
+
+    assert cache.size_bytes <= 1_200
+    assert cache.get("b") is None
+    assert cache.get("a") == value
+    assert cache.get("d") == value
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = CompletionCache(ttl_seconds=10, max_bytes=10_000, clock=clock)
+    cache.put("k", {"output": "v"})
+    clock.now += 11
+    assert cache.get("k") is None
+    assert len(cache) == 0
+
+
+def test_sqlite_tier_survives_restart(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    first = CompletionCache(ttl_seconds=60, max_bytes=10_000, sqlite_path=path)
+    first.put("k", {"output": "persisted"})
+    first.close()
+
+    second = CompletionCache(ttl_seconds=60, max_bytes=10_000, sqlite_path=path)
+    assert second.get("k") == {"output": "persisted"}
+    second.close()
+
+
+def test_endpoint_serves_repeats_from_cache_with_opt_out(monkeypatch):
+    router = CountingRouter()
+    manager = RouterManager(loader=lambda spec: router, spec_provider=lambda: "c:create")
+    monkeypatch.setattr(api, "router_manager", manager)
+    monkeypatch.setattr(api, "completion_cache", CompletionCache(ttl_seconds=60, max_bytes=10_000))
+    req = CompleteRequest(prompt="templated")
+
+    async def scenario():
+        first = await api.llm_complete(req, cache_control=None)
+        second = await api.llm_complete(req, cache_control=None)
+        bypass = await api.llm_complete(req, cache_control="no-cache, no-store")
+        third = await api.llm_complete(req, cache_control=None)
+        return first, second, bypass, third
+
+    first, second, bypass, third = asyncio.run(scenario())
+    assert first.output == second.output == third.output == "answer-1"
+    assert bypass.output == "answer-2"
+    assert router.calls == 2
+
+
+def test_sqlite_tier_is_purged_and_capped(tmp_path):
+    import sqlite3
+
+    clock = FakeClock()
+    path = tmp_path / "cache.sqlite"
+    cache = CompletionCache(
+        ttl_seconds=10, max_bytes=10_000, sqlite_path=path, clock=clock, sqlite_max_rows=3, purge_interval_seconds=5
+    )
+    cache.put("old", {"output": "expires"})
+    clock.now += 11
+    for index in range(5):
+        cache.put(f"k{index}", {"output": index})
+        clock.now += 0.1
+    cache.close()
+
+    with sqlite3.connect(path) as conn:
+        keys = {row[0] for row in conn.execute("SELECT key FROM completion_cache")}
+    assert keys == {"k2", "k3", "k4"}
+
+
+def test_aget_reads_the_sqlite_tier_off_the_loop(tmp_path):
+    import threading
+
+    cache = CompletionCache(ttl_seconds=60, max_bytes=10_000, sqlite_path=tmp_path / "cache.sqlite")
+    cache.put("k", {"output": "disk"})
+    cache._entries.clear()
+    threads = []
+    disk_get = cache._disk_get
+
+    def recording_get(*args):
+        threads.append(threading.current_thread().name)
+        return disk_get(*args)
+
+    cache._disk_get = recording_get
+
+    assert asyncio.run(cache.aget("k")) == {"output": "disk"}
+    assert asyncio.run(cache.aget("k")) == {"output": "disk"}
+    assert len(threads) == 1 and threads[0].startswith("completion-cache")
+    cache.close()
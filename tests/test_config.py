@@ -82,3 +82,54 @@ def test_existing_env_values_are_preserved(monkeypatch, tmp_path):
 
     # Since the variable was already set the loader should not override it.
     assert settings.port == 9999
+
+
+def test_settings_snapshot_is_cached_until_reload(monkeypatch):
+    monkeypatch.setenv("SHERATAN_FEATURE_GAMMA", "1")
+    first = config.get_settings()
+    assert config.get_settings() is first
+    assert config.is_feature_enabled("gamma") is True
+
+    monkeypatch.setenv("SHERATAN_FEATURE_GAMMA", "0")
+    assert config.is_feature_enabled("gamma") is True
+
+    reloaded = config.reload_settings()
+    assert reloaded.version > first.version
+    assert config.settings_version() == reloaded.version
+    assert config.is_feature_enabled("gamma") is False
+    with pytest.raises(TypeError):
+        reloaded.feature_flags["gamma"] = True  # type: ignore[index]
+
+
+def test_watcher_reloads_changed_env_files(monkeypatch, tmp_path):
+    env_dir = tmp_path / "ENV"
+    env_dir.mkdir()
+    base_env = env_dir / ".env"
+    base_env.write_text("SHERATAN_ROUTER=first.router:create\n")
+    monkeypatch.setattr(config, "ENV_DIR", env_dir, raising=False)
+    monkeypatch.setattr(config, "BASE_ENV", base_env, raising=False)
+    monkeypatch.setenv("SHERATAN_PORT", "7777")
+
+    config.load_environment(profile="dev")
+    assert config.get_settings().router_spec == "first.router:create"
+
+    watcher = config.SettingsWatcher(interval=60)
+    assert watcher.poll() is False
+
+    base_env.write_text("SHERATAN_ROUTER=second.router:create\nSHERATAN_PORT=1\n")
+    os.utime(base_env, (1, 1))
+    assert watcher.poll() is True
+
+    settings = config.get_settings()
+    assert settings.router_spec == "second.router:create"
+    # Explicitly exported variables keep precedence over the files.
+    assert settings.port == 7777
+    monkeypatch.delenv("SHERATAN_ROUTER", raising=False)
+
+
+def test_hmac_secrets_are_collected_by_key_id(monkeypatch):
+    monkeypatch.setenv("SHERATAN_HMAC_SECRET", "current")
+    monkeypatch.setenv("SHERATAN_HMAC_SECRETS", "2025-06:next, broken ,old:previous")
+
+    settings = config.reload_settings()
+    assert dict(settings.hmac_secrets) == {"default": "current", "2025-06": "next", "old": "previous"}
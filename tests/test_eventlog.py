@@ -0,0 +1,71 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from sheratan_core.eventlog import JobEventLog  # noqa: E402
+from sheratan_core.schemas import RelayFinal, RelayStatus  # noqa: E402
+
+
+def test_events_survive_reopen_and_are_indexed_per_job(tmp_path):
+    log = JobEventLog(tmp_path, fsync_interval_ms=5)
+    log.append_status(RelayStatus(job_id="a", phase="running", progress=10))
+    log.append_status(RelayStatus(job_id="b", phase="queued"))
+    log.append_status(RelayStatus(job_id="a", phase="running", progress=90))
+    log.append_final(RelayFinal(job_id="a", status="done", output={"text": "ok"}))
+    log.close()
+
+    reopened = JobEventLog(tmp_path, fsync_interval_ms=0)
+    assert len(reopened) == 2
+    history = reopened.events_for("a")
+    assert [event.kind for event in history] == ["status", "status", "final"]
+    assert history[1].decode() == {"job_id": "a", "phase": "running", "progress": 90}
+    assert reopened.latest("a").decode()["output"] == {"text": "ok"}
+    assert reopened.latest("b").decode()["phase"] == "queued"
+    assert reopened.latest("missing") is None
+    assert [event.job_id for event in reopened.scan()] == ["a", "b", "a", "a"]
+    reopened.close()
+
+
+def test_torn_tail_is_truncated_on_open(tmp_path):
+    log = JobEventLog(tmp_path, fsync_interval_ms=0)
+    log.append("status", "a", b'{"job_id":"a"}')
+    log.append("status", "b", b'{"job_id":"b"}')
+    log.close()
+    segment = tmp_path / "0000000000.seg"
+    intact = segment.stat().st_size
+    with open(segment, "ab") as handle:
+        handle.write(b"\x40\x00\x00\x00garbage")
+
+    reopened = JobEventLog(tmp_path, fsync_interval_ms=0)
+    assert segment.stat().st_size == intact
+    reopened.append("final", "b", b'{"job_id":"b","status":"done"}')
+    assert [event.kind for event in reopened.events_for("b")] == ["status", "final"]
+    reopened.close()
+
+
+def test_segments_rotate_and_old_ones_are_dropped(tmp_path):
+    log = JobEventLog(tmp_path, segment_bytes=256, fsync_interval_ms=0, retention_segments=3)
+    for index in range(100):
+        log.append("status", f"job-{index}", b'{"phase":"running","progress":1}')
+
+    assert len(log.segments) == 3
+    assert len(list(tmp_path.glob("*.seg"))) == 3
+    retained = [event.job_id for event in log.scan()]
+    assert retained[-1] == "job-99"
+    assert len(log) == len(set(retained))
+    assert log.latest("job-0") is None
+    log.close()
+
+
+def test_history_follows_back_pointers_across_segments(tmp_path):
+    log = JobEventLog(tmp_path, segment_bytes=200, fsync_interval_ms=0)
+    for index in range(30):
+        log.append("status", f"job-{index % 3}", b'{"progress":%d}' % index)
+
+    assert len(log.segments) > 3
+    history = log.events_for("job-1")
+    assert [event.decode()["progress"] for event in history] == list(range(1, 30, 3))
+    assert history[0].previous is None
+    assert history[-1].previous == history[-2].position
+    log.close()
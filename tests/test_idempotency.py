@@ -0,0 +1,414 @@
+import asyncio
+import multiprocessing
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from sheratan_core.orchestrator import (  # noqa: E402
+    AsyncStoreAdapter,
+    CompactIdempotencyStore,
+    ExecutorIdempotencyStore,
+    IdempotencyConflictError,
+    InMemoryIdempotencyStore,
+    ShardedIdempotencyStore,
+    SQLiteIdempotencyStore,
+    SharedMemoryIdempotencyStore,
+    WriterThreadIdempotencyStore,
+    as_async_store,
+    create_idempotency_store,
+)
+from sheratan_core.orchestrator.bloom import BloomFilter, RotatingBloomFilter  # noqa: E402
+
+
+def test_duplicate_and_conflicting_reservations():
+    store = InMemoryIdempotencyStore(ttl_seconds=60, max_entries=10)
+
+    assert store.reserve("k", "fp", 1_000).created is True
+    assert store.reserve("k", "fp", 1_001).created is False
+    with pytest.raises(IdempotencyConflictError):
+        store.reserve("k", "other", 1_002)
+
+
+def test_expired_entries_are_dropped_in_timestamp_order():
+    store = InMemoryIdempotencyStore(ttl_seconds=10, max_entries=100)
+    for offset in range(5):
+        store.reserve(f"k{offset}", "fp", 1_000 + offset)
+
+    # cutoff 1_003 drops k0..k2 only
+    store.reserve("new", "fp", 1_013)
+    assert len(store) == 3
+    assert store.reserve("k3", "fp", 1_013).created is False
+    assert store.reserve("k0", "fp", 1_013).created is True
+
+
+def test_capacity_eviction_keeps_expiry_heap_bounded():
+    store = InMemoryIdempotencyStore(ttl_seconds=10_000, max_entries=8)
+    for index in range(1_000):
+        store.reserve(f"k{index}", "fp", 1_000)
+
+    assert len(store) == 8
+    assert len(store._expiry) <= 2 * 8 + 64
+    # An evicted key can be reserved again; a live one is still a duplicate.
+    assert store.reserve("k0", "fp", 1_000).created is True
+    assert store.reserve("k999", "fp", 1_000).created is False
+
+
+def test_sharded_store_keeps_conflict_semantics_and_capacity(monkeypatch):
+    store = ShardedIdempotencyStore(ttl_seconds=60, max_entries=64, shards=4)
+
+    assert store.reserve("k", "fp", 1_000).created is True
+    assert store.reserve("k", "fp", 1_000).created is False
+    with pytest.raises(IdempotencyConflictError):
+        store.reserve("k", "other", 1_000)
+
+    for index in range(1_000):
+        store.reserve(f"key-{index}", "fp", 1_000)
+    assert len(store) <= 64
+
+    monkeypatch.setenv("SHERATAN_IDEMPOTENCY_SHARDS", "8")
+    assert isinstance(create_idempotency_store(), ShardedIdempotencyStore)
+
+
+def test_sharded_store_admits_each_key_once_across_threads():
+    store = ShardedIdempotencyStore(ttl_seconds=60, max_entries=100_000, shards=8)
+    created = []
+
+    def worker() -> None:
+        created.append(sum(store.reserve(f"k{i}", "fp", 1_000).created for i in range(500)))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sum(created) == 500
+
+
+def test_compact_store_detects_duplicates_conflicts_and_expiry(monkeypatch):
+    store = CompactIdempotencyStore(ttl_seconds=10, max_entries=100)
+
+    assert store.reserve("k", "fp", 1_000).created is True
+    assert store.reserve("k", "fp", 1_005).created is False
+    with pytest.raises(IdempotencyConflictError):
+        store.reserve("k", "other", 1_005)
+    # Expired slots are reused in place instead of taking a new one.
+    assert store.reserve("k", "other", 1_011).created is True
+    assert len(store) == 1
+
+    monkeypatch.setenv("SHERATAN_IDEMPOTENCY_COMPACT", "1")
+    assert isinstance(create_idempotency_store(), CompactIdempotencyStore)
+
+
+def test_compact_store_preallocates_and_evicts_oldest_when_full():
+    store = CompactIdempotencyStore(ttl_seconds=10_000, max_entries=96, probe_window=8)
+    assert store.capacity == 128
+    assert store.nbytes == 128 * 36
+
+    for index in range(1_000):
+        store.reserve(f"k{index}", "fp", 1_000 + index)
+    assert len(store) <= store.capacity
+    assert store.reserve("k999", "fp", 2_000).created is False
+    assert store.reserve("k0", "fp", 2_000).created is True
+
+    store.clear()
+    assert len(store) == 0
+    assert store.reserve("k999", "fp", 2_000).created is True
+
+
+def test_sqlite_group_commit_acknowledges_after_commit(tmp_path):
+    path = tmp_path / "idem.sqlite"
+    store = SQLiteIdempotencyStore(path, ttl_seconds=60, group_commit_ms=20, group_commit_max=64, synchronous="normal")
+    results = []
+
+    def worker(index: int) -> None:
+        results.append(store.reserve(f"k{index}", "fp", 1_000).created)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [True] * 16
+    # Every acknowledged reservation is visible to an independent connection.
+    with sqlite3.connect(path) as conn:
+        (count,) = conn.execute("SELECT COUNT(*) FROM idempotency_records").fetchone()
+    assert count == 16
+    assert store.reserve("k3", "fp", 1_001).created is False
+    with pytest.raises(IdempotencyConflictError):
+        store.reserve("k3", "other", 1_001)
+    store.close()
+
+    reopened = SQLiteIdempotencyStore(path, ttl_seconds=60, group_commit_ms=5)
+    assert reopened.reserve("k3", "fp", 1_002).created is False
+    reopened.close()
+
+
+def test_sqlite_purges_expired_rows_in_background(tmp_path):
+    path = tmp_path / "idem.sqlite"
+    store = SQLiteIdempotencyStore(path, ttl_seconds=10, purge_interval_s=0.01)
+    store.reserve("old", "fp", 1_000)
+    # Expired rows are ignored right away, even before the purge ran.
+    assert store.reserve("old", "fp", 1_020).created is True
+    store.reserve("fresh", "fp", 1_035)
+
+    def remaining() -> int:
+        with sqlite3.connect(path) as conn:
+            return conn.execute("SELECT COUNT(*) FROM idempotency_records").fetchone()[0]
+
+    deadline = time.monotonic() + 2
+    while remaining() > 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert remaining() == 1
+    store.close()
+
+
+def _reserve_in_child(name: str, key: str, results) -> None:
+    store = SharedMemoryIdempotencyStore(name, ttl_seconds=60, slots=1_024)
+    try:
+        results.put(store.reserve(key, "fp", 1_000).created)
+    finally:
+        store.close()
+
+
+@pytest.fixture
+def shm_store():
+    name = f"sheratan_test_{uuid.uuid4().hex[:12]}"
+    store = SharedMemoryIdempotencyStore(name, ttl_seconds=60, slots=1_024, stripes=4, probe_window=4)
+    yield store
+    store.close()
+    store.unlink()
+
+
+def test_shared_memory_store_is_shared_across_processes(shm_store):
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    child = ctx.Process(target=_reserve_in_child, args=(shm_store._name, "from-child", results))
+    child.start()
+    assert results.get(timeout=30) is True
+    child.join(timeout=30)
+
+    assert shm_store.reserve("from-child", "fp", 1_001).created is False
+    with pytest.raises(IdempotencyConflictError):
+        shm_store.reserve("from-child", "other", 1_001)
+
+
+def test_shared_memory_contention_does_not_block_the_event_loop(shm_store):
+    store = as_async_store(shm_store)
+    assert isinstance(store, ExecutorIdempotencyStore)
+    held = threading.Event()
+    release = threading.Event()
+
+    def hold_stripes() -> None:
+        # Stands in for another worker holding the stripe locks.
+        for lock in shm_store._thread_locks:
+            lock.acquire()
+        held.set()
+        release.wait()
+        for lock in shm_store._thread_locks:
+            lock.release()
+
+    holder = threading.Thread(target=hold_stripes)
+    holder.start()
+    held.wait()
+
+    async def scenario():
+        reservation = asyncio.ensure_future(store.reserve("contended", "fp", 1_000))
+        ticks = 0
+        while ticks < 10:
+            await asyncio.sleep(0.005)
+            ticks += 1
+        assert not reservation.done()
+        release.set()
+        return (await reservation).created, ticks
+
+    assert asyncio.run(scenario()) == (True, 10)
+    holder.join()
+    results = asyncio.run(store.reserve_many([("contended", "fp", 1_000), ("contended", "other", 1_000)]))
+    assert results[0].created is False and isinstance(results[1], IdempotencyConflictError)
+
+
+def test_shared_memory_store_reuses_expired_and_evicts_oldest(shm_store):
+    assert shm_store.reserve("k", "fp", 1_000).created is True
+    assert shm_store.reserve("k", "fp", 1_061).created is True
+
+    # 4 stripes x 256 slots with a probe window of 4: flooding one table
+    # far past capacity must keep answering and keep recent keys.
+    for index in range(5_000):
+        shm_store.reserve(f"flood-{index}", "fp", 2_000 + index // 100)
+    assert shm_store.reserve("flood-4999", "fp", 2_050).created is False
+
+
+def test_sqlite_view_is_bounded_and_expires_from_the_front(tmp_path):
+    store = SQLiteIdempotencyStore(tmp_path / "idem.sqlite", ttl_seconds=10, purge_interval_s=0.01, view_max_entries=3)
+    for index in range(5):
+        store.reserve(f"k{index}", "fp", 1_000 + index)
+    assert list(store._view) == ["k2", "k3", "k4"]
+    # Keys pushed out of the view are still answered from the table.
+    assert store.reserve("k0", "fp", 1_005).created is False
+
+    store.reserve("late", "fp", 1_013)
+    deadline = time.monotonic() + 2
+    while "k2" in store._view and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert list(store._view) == ["k3", "k4", "late"]
+    store.close()
+
+
+def test_sqlite_stores_on_one_file_admit_a_key_once(tmp_path):
+    path = tmp_path / "idem.sqlite"
+    first = SQLiteIdempotencyStore(path, ttl_seconds=60, purge_interval_s=0)
+    second = SQLiteIdempotencyStore(path, ttl_seconds=60, purge_interval_s=0, group_commit_ms=1)
+
+    # ``second`` misses the key in its own view; the conditional upsert
+    # still reports the row written by ``first`` instead of overwriting it.
+    assert first.reserve("k", "fp", 1_000).created is True
+    second._view.clear()
+    second._lookup = lambda key, timestamp, cutoff: None  # simulate the race window
+    assert second.reserve("k", "fp", 1_000).created is False
+    with pytest.raises(IdempotencyConflictError):
+        second.reserve("k", "other", 1_000)
+    first.close()
+    second.close()
+
+
+def test_bloom_filter_has_no_false_negatives_and_bounded_fpr():
+    bloom = BloomFilter(capacity=10_000, fpr=0.01)
+    for index in range(10_000):
+        bloom.add(f"in-{index}")
+
+    assert all(f"in-{index}" in bloom for index in range(10_000))
+    false_positives = sum(f"out-{index}" in bloom for index in range(10_000))
+    assert false_positives < 300
+    assert 0.005 < bloom.estimated_fpr() < 0.02
+
+
+def test_rotating_bloom_filter_keeps_keys_for_one_period():
+    bloom = RotatingBloomFilter(capacity=100, fpr=0.01, period=10, now=1_000)
+    bloom.add("k", 1_005)
+
+    assert bloom.might_contain("k", 1_014)
+    assert bloom.might_contain("k", 1_019)
+    assert not bloom.might_contain("k", 1_020)
+
+
+def test_sqlite_bloom_skips_reads_for_new_keys_and_rebuilds(tmp_path):
+    path = tmp_path / "idem.sqlite"
+    now = int(time.time())
+    store = SQLiteIdempotencyStore(path, ttl_seconds=900, purge_interval_s=0, bloom_capacity=1_000)
+    selects = []
+    store._conn.set_trace_callback(lambda sql: selects.append(sql) if sql.startswith("SELECT") else None)
+
+    for index in range(50):
+        assert store.reserve(f"k{index}", "fp", now).created is True
+    assert len(selects) < 5
+    assert store.reserve("k7", "fp", now).created is False
+    store.close()
+
+    reopened = SQLiteIdempotencyStore(path, ttl_seconds=900, purge_interval_s=0, bloom_capacity=1_000)
+    assert reopened._bloom.might_contain("k7", now)
+    assert reopened.reserve("k7", "fp", now).created is False
+    with pytest.raises(IdempotencyConflictError):
+        reopened.reserve("k8", "other", now)
+    reopened.close()
+
+
+def test_async_adapter_runs_in_memory_reserve_inline():
+    store = as_async_store(InMemoryIdempotencyStore(ttl_seconds=60))
+    assert isinstance(store, AsyncStoreAdapter)
+
+    async def scenario():
+        first = await store.reserve("k", "fp", 1_000)
+        second = await store.reserve("k", "fp", 1_000)
+        with pytest.raises(IdempotencyConflictError):
+            await store.reserve("k", "other", 1_000)
+        return first.created, second.created
+
+    assert asyncio.run(scenario()) == (True, False)
+
+
+def test_writer_thread_batches_sqlite_reservations(tmp_path):
+    sqlite_store = SQLiteIdempotencyStore(tmp_path / "idem.sqlite", ttl_seconds=60, purge_interval_s=0)
+    store = as_async_store(sqlite_store)
+    assert isinstance(store, WriterThreadIdempotencyStore)
+    batches = []
+    commit = sqlite_store._commit
+
+    def recording(batch):
+        batches.append(len(batch))
+        commit(batch)
+
+    sqlite_store._commit = recording
+
+    async def scenario():
+        keys = [f"k{i % 40}" for i in range(50)]
+        results = await asyncio.gather(*(store.reserve(key, "fp", 1_000) for key in keys))
+        with pytest.raises(IdempotencyConflictError):
+            await store.reserve("k1", "other", 1_000)
+        return results
+
+    results = asyncio.run(scenario())
+    # Sync callers go through the same writer thread and commits.
+    assert sqlite_store.reserve("k2", "fp", 1_000).created is False
+    assert sqlite_store.reserve("fresh", "fp", 1_000).created is True
+    store.close()
+    assert sum(r.created for r in results) == 40
+    # The conflict and the sync repeat are answered from the committed view.
+    assert sum(batches) == 51
+    assert len(batches) < 51
+
+
+class _FailingCommit:
+    """Connection proxy whose next ``commit`` fails."""
+
+    def __init__(self, conn, release):
+        self._conn = conn
+        self._release = release
+        self.fail = True
+
+    def __getattr__(self, item):
+        return getattr(self._conn, item)
+
+    def commit(self):
+        self._release.wait()
+        if self.fail:
+            self.fail = False
+            raise sqlite3.OperationalError("disk I/O error")
+        self._conn.commit()
+
+
+def test_sqlite_pending_duplicates_wait_for_the_commit(tmp_path):
+    store = SQLiteIdempotencyStore(tmp_path / "idem.sqlite", ttl_seconds=60, group_commit_ms=20, purge_interval_s=0)
+    release = threading.Event()
+    store._conn = _FailingCommit(store._conn, release)
+    outcomes = []
+
+    def worker() -> None:
+        try:
+            outcomes.append(store.reserve("k", "fp", 1_000).created)
+        except sqlite3.Error as e:
+            outcomes.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    # Neither the first reservation nor its duplicate is answered before the commit.
+    assert outcomes == []
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    # The failed batch is reported to both, so the duplicate was not admitted.
+    assert [type(outcome) for outcome in outcomes] == [sqlite3.OperationalError] * 2
+    assert store.reserve("k", "fp", 1_000).created is True
+    assert store.reserve("k", "fp", 1_001).created is False
+    store._conn = store._conn._conn
+    store.close()
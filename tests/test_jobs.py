@@ -0,0 +1,89 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from sheratan_core import api  # noqa: E402
+from sheratan_core.eventlog import JobEventLog  # noqa: E402
+from sheratan_core.jobs import JobIndex  # noqa: E402
+from sheratan_core.schemas import RelayFinal, RelayStatus  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_final_callback_supersedes_later_progress():
+    index = JobIndex(max_entries=10, max_age_seconds=60)
+    index.apply_status(RelayStatus(job_id="a", phase="running", progress=10), tenant="t1")
+    index.apply_final(RelayFinal(job_id="a", status="done"))
+    index.apply_status(RelayStatus(job_id="a", phase="running", progress=50))
+
+    state = index.get("a")
+    assert (state.status, state.phase, state.progress, state.tenant) == ("done", "running", 10, "t1")
+
+
+def test_index_is_bounded_by_entries_and_age():
+    clock = FakeClock()
+    index = JobIndex(max_entries=3, max_age_seconds=60, clock=clock)
+    for job in ("a", "b", "c"):
+        index.apply_status(RelayStatus(job_id=job, progress=1))
+    index.apply_status(RelayStatus(job_id="a", progress=2))  # a is now the most recent
+    index.apply_status(RelayStatus(job_id="d", progress=1))
+    assert index.get("b") is None
+    assert [state.job_id for state in index.query()[0]] == ["d", "a", "c"]
+
+    clock.now += 61
+    assert index.get("a") is None
+    index.apply_status(RelayStatus(job_id="e", progress=1))
+    assert len(index) == 1
+
+
+def test_query_filters_and_pages_most_recent_first():
+    index = JobIndex(max_entries=100, max_age_seconds=60)
+    for number in range(7):
+        index.apply_status(RelayStatus(job_id=f"job-{number}"), tenant="t1" if number % 2 else "t2")
+    index.apply_final(RelayFinal(job_id="job-3", status="failed"))
+
+    page, next_offset = index.query(tenant="t1", limit=2)
+    assert [state.job_id for state in page] == ["job-3", "job-5"]
+    page, next_offset = index.query(tenant="t1", offset=next_offset, limit=2)
+    assert [state.job_id for state in page] == ["job-1"]
+    assert next_offset is None
+    assert [state.job_id for state in index.query(status="failed")[0]] == ["job-3"]
+
+
+def test_index_is_rebuilt_from_the_event_log(tmp_path):
+    log = JobEventLog(tmp_path, fsync_interval_ms=0)
+    log.append_status(RelayStatus(job_id="a", phase="running", progress=30), tenant="t1")
+    log.append_final(RelayFinal(job_id="a", status="done"), tenant="t1")
+    log.append_status(RelayStatus(job_id="b", phase="queued"))
+
+    index = JobIndex()
+    assert index.rebuild(log.scan()) == 3
+    assert (index.get("a").status, index.get("a").tenant, index.get("a").progress) == ("done", "t1", 30)
+    assert index.get("b").phase == "queued"
+    log.close()
+
+
+def test_job_endpoints_serve_the_index(monkeypatch):
+    index = JobIndex()
+    monkeypatch.setattr(api, "job_index", index)
+    index.apply_status(RelayStatus(job_id="job-1", phase="running", progress=5), tenant="acme")
+
+    state = asyncio.run(api.job_status("job-1"))
+    assert (state.phase, state.progress, state.status, state.tenant) == ("running", 5, "running", "acme")
+    listed = asyncio.run(api.list_jobs(status="running", tenant="acme", offset=0, limit=10))
+    assert [item.job_id for item in listed.items] == ["job-1"]
+    assert listed.next_offset is None
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(api.job_status("missing"))
+    assert exc.value.status_code == 404
@@ -2,7 +2,6 @@ import asyncio
 import sys
 from pathlib import Path
 
-from starlette.requests import Request
 from starlette.responses import Response as StarletteResponse
 
 
@@ -11,7 +10,7 @@ sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
 from sheratan_core import api  # noqa: E402
 
 
-def _build_request(path: str, method: str = "GET") -> Request:
+def _build_scope(path: str, method: str = "GET", route: str | None = None) -> dict:
     scope = {
         "type": "http",
         "http_version": "1.1",
@@ -25,39 +24,74 @@ def _build_request(path: str, method: str = "GET") -> Request:
         "client": ("127.0.0.1", 12345),
         "server": ("testserver", 80),
     }
-    scope["route"] = type("Route", (), {"path": path})()
-    return Request(scope)
+    if route is not None:
+        scope["route"] = type("Route", (), {"path": route})()
+    return scope
 
 
-def test_metrics_records_success():
-    middleware = api.ApiMetricsMiddleware(api.app)
-    request = _build_request("/api/v1/router/models")
+def _respond(status_code: int):
+    async def app(scope, receive, send):
+        await StarletteResponse(status_code=status_code)(scope, receive, send)
+
+    return app
+
+
+def _call(middleware, scope: dict) -> None:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        return None
 
-    async def call_next(_: Request):
-        return StarletteResponse(status_code=200)
+    asyncio.run(middleware(scope, receive, send))
 
-    asyncio.run(middleware.dispatch(request, call_next))
-    response = asyncio.run(api.metrics())
-    body = response.body.decode()
+
+def _metrics_body() -> str:
+    return asyncio.run(api.metrics()).body.decode()
+
+
+def test_metrics_records_success():
+    middleware = api.ApiMetricsMiddleware(_respond(200))
+    _call(middleware, _build_scope("/api/v1/router/models", route="/api/v1/router/models"))
 
     assert (
         'sheratan_api_request_duration_seconds_count{method="GET",path="/api/v1/router/models",status="200"}'
-        in body
+        in _metrics_body()
     )
 
 
 def test_metrics_records_errors():
-    middleware = api.ApiMetricsMiddleware(api.app)
-    request = _build_request("/api/v1/router/health")
-
-    async def call_next(_: Request):
-        return StarletteResponse(status_code=502)
-
-    asyncio.run(middleware.dispatch(request, call_next))
-    response = asyncio.run(api.metrics())
-    body = response.body.decode()
+    middleware = api.ApiMetricsMiddleware(_respond(502))
+    _call(middleware, _build_scope("/api/v1/router/health", route="/api/v1/router/health"))
 
     assert (
         'sheratan_api_request_errors_total{method="GET",path="/api/v1/router/health",status="502"} 1.0'
-        in body
+        in _metrics_body()
     )
+
+
+def test_metrics_label_matched_routes_by_template():
+    import httpx
+
+    async def scenario():
+        middleware = api.ApiMetricsMiddleware(api.app)
+        transport = httpx.ASGITransport(app=middleware)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            for job_id in ("metrics-a", "metrics-b", "metrics-c"):
+                assert (await client.get(f"/api/v1/jobs/{job_id}")).status_code == 404
+
+    asyncio.run(scenario())
+    body = _metrics_body()
+    assert 'sheratan_api_request_errors_total{method="GET",path="/api/v1/jobs/{job_id}",status="404"}' in body
+    assert "metrics-a" not in body
+
+
+def test_unmatched_paths_are_capped():
+    middleware = api.ApiMetricsMiddleware(_respond(404), max_unmatched_paths=2)
+    for index in range(5):
+        _call(middleware, _build_scope(f"/scan-{index}", method="PROPFIND"))
+
+    body = _metrics_body()
+    assert 'path="/scan-0"' in body and 'path="/scan-1"' in body
+    assert 'path="/scan-2"' not in body
+    assert 'sheratan_api_request_errors_total{method="OTHER",path="__unmatched__",status="404"} 3.0' in body
@@ -0,0 +1,113 @@
+import asyncio
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from sheratan_core.pool import PoolMember, RouterPool, _parse_members  # noqa: E402
+from sheratan_core.types import LLMRouter  # noqa: E402
+
+
+class TimedRouter:
+    def __init__(self, label: str, delay: float = 0.0, fail: bool = False) -> None:
+        self.label = label
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+
+    def name(self) -> str:
+        return self.label
+
+    async def health(self) -> Dict[str, Any]:
+        return {"status": self.label}
+
+    def models(self) -> List[str]:
+        return [f"{self.label}-model"]
+
+    def metadata(self) -> Dict[str, Any]:
+        return {}
+
+    async def complete(self, req: Dict[str, Any]) -> Dict[str, Any]:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError(f"{self.label} down")
+        return {"model": req.get("model", ""), "output": self.label, "usage": {}}
+
+    async def stream(self, req: Dict[str, Any]):
+        yield {"delta": self.label}
+
+
+def create_stub() -> TimedRouter:
+    return TimedRouter("stub")
+
+
+def _pool(*routers: TimedRouter, **kwargs: Any) -> RouterPool:
+    return RouterPool([PoolMember(r.label, r) for r in routers], **kwargs)
+
+
+def test_pool_satisfies_router_protocol():
+    assert isinstance(_pool(TimedRouter("a")), LLMRouter)
+
+
+def test_ewma_prefers_faster_router():
+    fast, slow = TimedRouter("fast", 0.001), TimedRouter("slow", 0.02)
+    pool = _pool(fast, slow)
+
+    async def scenario():
+        for _ in range(20):
+            await pool.complete({"model": "m"})
+
+    asyncio.run(scenario())
+    assert fast.calls > slow.calls
+    assert slow.calls >= 1
+
+
+def test_least_outstanding_spreads_concurrent_load():
+    a, b = TimedRouter("a", 0.01), TimedRouter("b", 0.01)
+    pool = _pool(a, b, strategy="least_outstanding")
+
+    async def scenario():
+        await asyncio.gather(*(pool.complete({"model": "m"}) for _ in range(10)))
+
+    asyncio.run(scenario())
+    assert a.calls == b.calls == 5
+
+
+def test_failing_router_is_ejected():
+    broken, healthy = TimedRouter("broken", fail=True), TimedRouter("healthy", 0.005)
+    pool = _pool(broken, healthy, strategy="least_outstanding", eject_after_errors=2, eject_seconds=60)
+
+    async def scenario():
+        outputs = []
+        for _ in range(10):
+            try:
+                outputs.append((await pool.complete({"model": "m"}))["output"])
+            except RuntimeError:
+                outputs.append("error")
+        return outputs
+
+    outputs = asyncio.run(scenario())
+    assert broken.calls == 2
+    assert outputs[-5:] == ["healthy"] * 5
+    assert pool.metadata()["members"][0]["breaker"] == "open"
+
+
+def test_model_routes_pin_models_to_members():
+    a, b = TimedRouter("a"), TimedRouter("b")
+    pool = _pool(a, b, model_routes={"special": ["b"]})
+
+    async def scenario():
+        return [await pool.complete({"model": "special"}) for _ in range(3)]
+
+    assert {r["output"] for r in asyncio.run(scenario())} == {"b"}
+    with pytest.raises(ValueError):
+        _pool(a, model_routes={"x": ["missing"]})
+
+
+def test_members_are_parsed_from_specs():
+    members = _parse_members("primary=test_pool:create_stub@3, test_pool:create_stub")
+    assert [(m.name, m.weight) for m in members] == [("primary", 3.0), ("router1", 1.0)]
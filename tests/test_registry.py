@@ -0,0 +1,70 @@
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from sheratan_core.registry import RouterManager  # noqa: E402
+
+
+class ClosableRouter:
+    def __init__(self, spec: str) -> None:
+        self.spec = spec
+        self.closed = False
+
+    async def aclose(self) -> None:
+        self.closed = True
+
+
+def _manager(spec_holder: dict, built: list) -> RouterManager:
+    def loader(spec: str) -> ClosableRouter:
+        router = ClosableRouter(spec)
+        built.append(router)
+        return router
+
+    return RouterManager(loader=loader, spec_provider=lambda: spec_holder["spec"])
+
+
+def test_router_is_built_once_and_shared():
+    spec = {"spec": "a:create"}
+    built: list = []
+    manager = _manager(spec, built)
+
+    async def scenario():
+        for _ in range(5):
+            async with manager.lease() as router:
+                assert router is built[0]
+
+    asyncio.run(scenario())
+    assert len(built) == 1
+
+
+def test_spec_change_swaps_after_inflight_leases_finish():
+    spec = {"spec": "a:create"}
+    built: list = []
+    manager = _manager(spec, built)
+
+    async def scenario():
+        async with manager.lease() as old:
+            spec["spec"] = "b:create"
+            async with manager.lease() as new:
+                assert new is not old
+                assert new.spec == "b:create"
+            # The in-flight request keeps a usable router.
+            assert old.closed is False
+        await asyncio.sleep(0)
+        assert old.closed is True
+        await manager.aclose()
+        assert new.closed is True
+
+    asyncio.run(scenario())
+
+
+def test_unset_spec_yields_no_router():
+    manager = _manager({"spec": ""}, [])
+
+    async def scenario():
+        async with manager.lease() as router:
+            assert router is None
+
+    asyncio.run(scenario())
@@ -2,6 +2,7 @@ import asyncio
 import hmac
 import hashlib
 import json
+import statistics
 import sys
 import time
 from pathlib import Path
@@ -12,6 +13,7 @@ from starlette.requests import Request
 
 sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
 
+from sheratan_core import api
 from sheratan_core.api import (
     IDEMPOTENCY_HEADER,
     SIGNATURE_HEADER,
@@ -110,3 +112,342 @@ async def _call_status(payload: dict, headers: dict[str, str]):
         idempotency=headers[IDEMPOTENCY_HEADER],
         signature=headers.get(SIGNATURE_HEADER),
     )
+
+
+def test_health_latency_stays_flat_while_callbacks_are_written(monkeypatch, tmp_path):
+    monkeypatch.setenv("SHERATAN_IDEMPOTENCY_SQLITE_PATH", str(tmp_path / "idem.sqlite"))
+    _reset_hmac_state()
+    store = api._relay_store()
+    commit = store.store._commit
+
+    def slow_disk(batch):
+        time.sleep(0.05)  # a slow fsync on the writer thread
+        commit(batch)
+
+    store.store._commit = slow_disk
+
+    async def callbacks():
+        for batch in range(4):
+            calls = []
+            for index in range(10):
+                payload = {"job_id": f"job-{batch}-{index}", "phase": "running"}
+                headers = _make_headers("super-secret", payload, idempotency=f"load-{batch}-{index}")
+                calls.append(_call_status(payload, headers))
+            await asyncio.gather(*calls)
+
+    async def probe(until) -> list:
+        latencies = []
+        while not until():
+            started = time.perf_counter()
+            await api.health()
+            await asyncio.sleep(0)
+            latencies.append(time.perf_counter() - started)
+            await asyncio.sleep(0.005)
+        return latencies
+
+    def p90(values: list) -> float:
+        return statistics.quantiles(values, n=10)[-1]
+
+    async def scenario():
+        idle_until = time.monotonic() + 0.2
+        baseline = await probe(lambda: time.monotonic() >= idle_until)
+        writer = asyncio.create_task(callbacks())
+        loaded = await probe(writer.done)
+        await writer
+        return baseline, loaded
+
+    baseline, loaded = asyncio.run(scenario())
+    assert len(loaded) > 10
+    # A commit blocking the loop would show up as >= 50 ms; leave ample
+    # headroom for callback CPU work and a noisy machine.
+    assert p90(loaded) < max(10 * p90(baseline), 0.02)
+
+
+def _post_status(client, payload: dict, headers: dict[str, str]):
+    return client.post("/relay/status", content=json.dumps(payload), headers=headers)
+
+
+async def _post_sequentially(*requests):
+    import httpx
+
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return [await _post_status(client, payload, headers) for payload, headers in requests]
+
+
+@pytest.fixture
+def replay_enabled(monkeypatch):
+    monkeypatch.setenv("SHERATAN_FEATURE_IDEMPOTENCY_REPLAY", "1")
+    _reset_hmac_state()
+    calls = []
+    verify = api._verify_relay_request
+
+    async def counting_verify(*args, **kwargs):
+        calls.append(args[2])
+        await asyncio.sleep(0.05)
+        await verify(*args, **kwargs)
+
+    monkeypatch.setattr(api, "_verify_relay_request", counting_verify)
+    return calls
+
+
+def test_duplicate_callback_is_answered_from_the_replay_cache(replay_enabled):
+    payload = {"job_id": "job-9", "phase": "running"}
+    headers = _make_headers("super-secret", payload, idempotency="replay-me")
+    changed = {"job_id": "job-9", "phase": "done"}
+    changed_headers = _make_headers("super-secret", changed, idempotency="replay-me")
+
+    first, second, conflict = asyncio.run(
+        _post_sequentially((payload, headers), (payload, headers), (changed, changed_headers))
+    )
+
+    assert first.status_code == second.status_code == 200
+    assert second.content == first.content
+    assert second.headers["x-sheratan-idempotent-replay"] == "true"
+    assert "x-sheratan-idempotent-replay" not in first.headers
+    assert replay_enabled == ["replay-me"]
+    assert conflict.status_code == 409
+
+
+def test_in_flight_duplicate_waits_for_the_first_request(replay_enabled):
+    import httpx
+
+    payload = {"job_id": "job-10", "phase": "running"}
+    headers = _make_headers("super-secret", payload, idempotency="in-flight")
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(_post_status(client, payload, headers) for _ in range(3)))
+
+    responses = asyncio.run(scenario())
+    assert [r.status_code for r in responses] == [200, 200, 200]
+    assert sum("x-sheratan-idempotent-replay" in r.headers for r in responses) == 2
+    assert replay_enabled == ["in-flight"]
+
+
+def test_oversized_responses_are_not_replayed(monkeypatch, replay_enabled):
+    monkeypatch.setenv("SHERATAN_IDEMPOTENCY_REPLAY_MAX_BODY_BYTES", "1")
+    _reset_hmac_state()
+    payload = {"job_id": "job-11", "phase": "running"}
+    headers = _make_headers("super-secret", payload, idempotency="too-big")
+
+    first, duplicate = asyncio.run(_post_sequentially((payload, headers), (payload, headers)))
+
+    assert first.status_code == 200
+    assert duplicate.status_code == 401
+    assert duplicate.json()["detail"] == "Replay detected"
+
+
+def test_accepted_callbacks_update_the_job_index_and_event_log(monkeypatch, tmp_path):
+    from sheratan_core.eventlog import JobEventLog
+    from sheratan_core.jobs import JobIndex
+
+    log = JobEventLog(tmp_path, fsync_interval_ms=0)
+    monkeypatch.setattr(api, "event_log", log)
+    monkeypatch.setattr(api, "job_index", JobIndex())
+    payload = {"job_id": "job-12", "phase": "running", "progress": 40}
+    headers = _make_headers("super-secret", payload, idempotency="logged")
+    headers["X-Sheratan-Tenant"] = "acme"
+    asyncio.run(_call_status(payload, headers))
+
+    assert log.latest("job-12").decode() == {**payload, "tenant": "acme"}
+    assert (api.job_index.get("job-12").progress, api.job_index.get("job-12").tenant) == (40, "acme")
+    log.close()
+
+
+def test_event_log_is_reopened_for_each_lifespan(monkeypatch, tmp_path):
+    from fastapi.testclient import TestClient
+
+    monkeypatch.setenv("SHERATAN_EVENT_LOG_DIR", str(tmp_path))
+    monkeypatch.setattr(api, "status_coalescer", None)
+    for run in range(2):
+        payload = {"job_id": f"life-{run}", "phase": "running", "progress": 10 * (run + 1)}
+        headers = _make_headers("super-secret", payload, idempotency=f"life-{run}")
+        with TestClient(api.app) as client:
+            assert client.post("/relay/status", content=json.dumps(payload), headers=headers).status_code == 200
+            # The index was rebuilt from the log at startup, so earlier runs stay visible.
+            assert client.get("/api/v1/jobs/life-0").json()["progress"] == 10
+        assert api.event_log is None
+    assert api.job_index.get("life-1").progress == 20
+
+
+def _post_batch(body: bytes, idempotency: str = "batch-1"):
+    import httpx
+
+    timestamp = str(int(time.time()))
+    message = b"|".join([timestamp.encode("utf-8"), idempotency.encode("utf-8"), body])
+    headers = {
+        TIMESTAMP_HEADER: timestamp,
+        IDEMPOTENCY_HEADER: idempotency,
+        SIGNATURE_HEADER: hmac.new(b"super-secret", message, hashlib.sha256).hexdigest(),
+        "X-Sheratan-Tenant": "acme",
+    }
+
+    async def send():
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/relay/batch", content=body, headers=headers)
+
+    return asyncio.run(send())
+
+
+def test_relay_batch_reports_results_per_event(monkeypatch):
+    from sheratan_core.jobs import JobIndex
+
+    monkeypatch.setattr(api, "job_index", JobIndex())
+    lines = [
+        {"type": "status", "idempotency_key": "e1", "event": {"job_id": "b1", "phase": "running", "progress": 10}},
+        {"type": "status", "idempotency_key": "e2", "event": {"job_id": "b1", "progress": "lots"}},
+        {"type": "final", "idempotency_key": "e3", "event": {"job_id": "b1", "status": "done"}},
+        {"type": "status", "idempotency_key": "e1", "event": {"job_id": "b1", "phase": "running", "progress": 10}},
+    ]
+    body = b"\n".join(json.dumps(line).encode("utf-8") for line in lines) + b"\n"
+
+    response = _post_batch(body)
+    assert response.status_code == 200
+    result = response.json()
+    assert result["accepted"] == 2
+    assert result["results"] == ["accepted", "invalid", "accepted", "duplicate"]
+    assert result["errors"]["1"].startswith("status.event.progress")
+    state = api.job_index.get("b1")
+    assert (state.status, state.progress, state.tenant) == ("done", 10, "acme")
+
+    conflicting = [{"type": "status", "idempotency_key": "e1", "event": {"job_id": "b1", "progress": 99}}]
+    response = _post_batch(json.dumps(conflicting).encode("utf-8"), idempotency="batch-2")
+    assert response.json()["results"] == ["conflict"]
+
+
+def test_relay_batch_rejects_bad_signatures_and_oversized_batches(monkeypatch):
+    body = json.dumps([{"type": "status", "idempotency_key": f"k{i}", "event": {"job_id": "x"}} for i in range(3)])
+    monkeypatch.setattr(api, "RELAY_BATCH_MAX_EVENTS", 2)
+    assert _post_batch(body.encode("utf-8")).status_code == 413
+
+    monkeypatch.setenv("SHERATAN_HMAC_SECRET", "other-secret")
+    _reset_hmac_state()
+    assert _post_batch(body.encode("utf-8")).status_code == 401
+
+
+def test_relay_batch_caps_bytes_and_parses_arrays_incrementally(monkeypatch):
+    items = [{"type": "status", "idempotency_key": f"inc-{i}", "event": {"job_id": "x"}} for i in range(3)]
+    body = json.dumps(items).encode("utf-8")
+    monkeypatch.setattr(api, "RELAY_BATCH_MAX_BYTES", len(body) - 1)
+    assert _post_batch(body).status_code == 413
+
+    monkeypatch.setattr(api, "RELAY_BATCH_MAX_BYTES", 4096)
+    # Items past the event cap are never decoded, so the broken tail is not reached.
+    monkeypatch.setattr(api, "RELAY_BATCH_MAX_EVENTS", 2)
+    assert _post_batch(body[:-1] + b", {broken").status_code == 413
+    monkeypatch.setattr(api, "RELAY_BATCH_MAX_EVENTS", 10)
+    assert _post_batch(body[:-1] + b", {broken", idempotency="batch-3").status_code == 400
+    assert _post_batch(body + b" []", idempotency="batch-4").status_code == 400
+    assert _post_batch(b" [ ] ", idempotency="batch-5").json()["results"] == []
+    assert list(api._json_array_items('[1, {"a": [2, 3]} ,"x"]')) == [1, {"a": [2, 3]}, "x"]
+
+
+def test_relay_batch_body_without_content_length_is_counted_while_read(monkeypatch):
+    monkeypatch.setattr(api, "RELAY_BATCH_MAX_BYTES", 10)
+    messages = [{"type": "http.request", "body": b"x" * 6, "more_body": True} for _ in range(100)]
+
+    async def receive():
+        return messages.pop(0)
+
+    request = Request({"type": "http", "method": "POST", "headers": []}, receive)
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(api._read_batch_body(request))
+    assert excinfo.value.status_code == 413
+    # Rejected after the second chunk rather than after buffering everything.
+    assert len(messages) == 98
+
+
+def _signed_post(secret: str, payload: dict, idempotency: str, key_id: str | None = None, chunk: int = 0):
+    import httpx
+
+    headers = _make_headers(secret, payload, idempotency=idempotency)
+    if key_id is not None:
+        headers["X-Sheratan-Key-Id"] = key_id
+    body = json.dumps(payload).encode("utf-8")
+
+    async def chunks():
+        for start in range(0, len(body), chunk):
+            yield body[start : start + chunk]
+
+    async def send():
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/relay/status", content=chunks() if chunk else body, headers=headers)
+
+    return asyncio.run(send())
+
+
+def test_rotated_secrets_are_selected_by_key_id(monkeypatch):
+    monkeypatch.setenv("SHERATAN_HMAC_SECRETS", "2025-06:next-secret")
+    _reset_hmac_state()
+    payload = {"job_id": "job-13", "phase": "running"}
+
+    assert _signed_post("next-secret", payload, "rot-1", key_id="2025-06").status_code == 200
+    assert _signed_post("super-secret", payload, "rot-2", key_id="default").status_code == 200
+    # Without a key id only ``default`` is tried while several secrets are active.
+    assert _signed_post("next-secret", payload, "rot-3").status_code == 401
+    assert _signed_post("super-secret", payload, "rot-3b").status_code == 200
+    assert _signed_post("next-secret", payload, "rot-4", key_id="default").status_code == 401
+    assert _signed_post("next-secret", payload, "rot-5", key_id="unknown").status_code == 401
+
+
+def test_chunked_body_is_verified_in_the_middleware_only(monkeypatch):
+    from sheratan_core.jobs import JobIndex
+    from sheratan_core.security import HmacKeyring
+
+    def fail(*args, **kwargs):
+        raise AssertionError("route re-verified a request the middleware already checked")
+
+    monkeypatch.setattr(HmacKeyring, "verify", fail)
+    monkeypatch.setattr(api, "job_index", JobIndex())
+    payload = {"job_id": "job-14", "phase": "running", "progress": 70, "message": "x" * 200}
+
+    response = _signed_post("super-secret", payload, "chunked", chunk=16)
+    assert response.status_code == 200
+    assert api.job_index.get("job-14").progress == 70
+
+    rejected = _signed_post("wrong-secret", payload, "chunked-bad", chunk=16)
+    assert rejected.status_code == 401
+    assert rejected.json() == {"detail": "Invalid signature"}
+
+
+def test_middleware_rejects_oversized_bodies_while_reading():
+    import httpx
+    from starlette.responses import JSONResponse
+
+    from sheratan_core.relay_auth import RelaySignatureMiddleware
+    from sheratan_core.security import HmacKeyring
+
+    received = []
+
+    async def route(scope, receive, send):
+        received.append(scope["path"])
+        await JSONResponse({"ok": True})(scope, receive, send)
+
+    keyring = HmacKeyring({"default": "super-secret"})
+    middleware = RelaySignatureMiddleware(route, ["/relay/status"], lambda: keyring, max_body_bytes=64)
+    payload = {"job_id": "job-15", "message": "x" * 100}
+    headers = _make_headers("super-secret", payload, idempotency="too-large")
+    body = json.dumps(payload).encode("utf-8")
+    streamed = []
+
+    async def chunks():
+        for start in range(0, len(body), 16):
+            streamed.append(start)
+            yield body[start : start + 16]
+
+    async def send(content):
+        transport = httpx.ASGITransport(app=middleware)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/relay/status", content=content, headers=headers)
+
+    assert asyncio.run(send(body)).status_code == 413
+    response = asyncio.run(send(chunks()))
+    assert response.status_code == 413
+    assert response.json() == {"detail": "Request body too large"}
+    # Refused on the chunk that crossed the limit, before the rest was read.
+    assert len(streamed) == 5 < len(range(0, len(body), 16))
+    assert received == []
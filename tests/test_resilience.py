@@ -0,0 +1,174 @@
+import asyncio
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from sheratan_core.pool import PoolMember, RouterPool  # noqa: E402
+from sheratan_core.batching import MicroBatcher, supports_batch  # noqa: E402
+from sheratan_core.resilience import (  # noqa: E402
+    CircuitBreaker,
+    CircuitOpenError,
+    ResilientBatchRouter,
+    ResilientRouter,
+    wrap_router,
+)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class ScriptedRouter:
+    """Router whose per-call delays and failures are scripted."""
+
+    def __init__(self, delays: List[float], fail: bool = False) -> None:
+        self.delays = list(delays)
+        self.fail = fail
+        self.calls = 0
+        self.cancelled = 0
+
+    def name(self) -> str:
+        return "scripted"
+
+    async def complete(self, req: Dict[str, Any]) -> Dict[str, Any]:
+        delay = self.delays[min(self.calls, len(self.delays) - 1)]
+        self.calls += 1
+        call = self.calls
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.fail:
+            raise RuntimeError("upstream failed")
+        return {"model": "m", "output": f"call-{call}", "usage": {}}
+
+
+def test_breaker_opens_half_opens_and_closes():
+    clock = FakeClock()
+    breaker = CircuitBreaker("r", failure_threshold=2, reset_timeout_s=10, clock=clock)
+
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.allow() is False
+    assert breaker.retry_after() == 10
+
+    clock.now = 10
+    assert breaker.state == "half_open"
+    assert breaker.allow() is True
+    # Only one probe at a time.
+    assert breaker.allow() is False
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_breaker_reopens_when_probe_fails():
+    clock = FakeClock()
+    breaker = CircuitBreaker("r", failure_threshold=1, reset_timeout_s=5, clock=clock)
+    breaker.allow()
+    breaker.record_failure()
+    clock.now = 5
+    assert breaker.allow() is True
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+
+def test_resilient_router_fails_fast_when_open():
+    inner = ScriptedRouter([0.0], fail=True)
+    router = ResilientRouter(inner, breaker=CircuitBreaker("scripted", failure_threshold=2))
+
+    async def scenario():
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                await router.complete({})
+        with pytest.raises(CircuitOpenError):
+            await router.complete({})
+
+    asyncio.run(scenario())
+    assert inner.calls == 2
+
+
+class ScriptedBatchRouter(ScriptedRouter):
+    async def complete_batch(self, reqs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [await self.complete(req) for req in reqs]
+
+
+def test_batched_calls_go_through_the_breaker(monkeypatch):
+    monkeypatch.setenv("SHERATAN_FEATURE_CIRCUIT_BREAKER", "1")
+    from sheratan_core.config import reload_settings
+
+    reload_settings()
+    inner = ScriptedBatchRouter([0.0], fail=True)
+    router = wrap_router(inner)
+    assert isinstance(router, ResilientBatchRouter) and supports_batch(router)
+    assert not supports_batch(wrap_router(ScriptedRouter([0.0])))
+    assert not supports_batch(ResilientRouter(inner))
+    router.breaker = CircuitBreaker("scripted", failure_threshold=2)
+    batcher = MicroBatcher(max_batch_size=1)
+
+    async def scenario():
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                await batcher.submit(router, {"model": "m"})
+        for _ in range(5):
+            with pytest.raises(CircuitOpenError):
+                await batcher.submit(router, {"model": "m"})
+
+    asyncio.run(scenario())
+    monkeypatch.delenv("SHERATAN_FEATURE_CIRCUIT_BREAKER")
+    reload_settings()
+    assert inner.calls == 2
+    assert router.breaker.state == "open"
+
+
+def test_hedge_takes_first_answer_and_cancels_straggler():
+    # Warm-up calls establish a ~10ms quantile, then the primary gets stuck.
+    inner = ScriptedRouter([0.01] * 5 + [5.0, 0.01])
+    router = ResilientRouter(inner, hedge_quantile=0.95, hedge_budget=1.0, hedge_min_delay_ms=1)
+
+    async def scenario():
+        for _ in range(5):
+            await router.complete({})
+        return await asyncio.wait_for(router.complete({}), timeout=1)
+
+    result = asyncio.run(scenario())
+    assert result["output"] == "call-7"
+    assert inner.cancelled == 1
+
+
+def test_hedge_budget_caps_extra_calls():
+    inner = ScriptedRouter([0.01] + [0.05] * 20)
+    router = ResilientRouter(inner, hedge_quantile=0.5, hedge_budget=0.0, hedge_min_delay_ms=1)
+    router._budget._tokens = 0.0
+
+    async def scenario():
+        for _ in range(5):
+            await router.complete({})
+
+    asyncio.run(scenario())
+    assert inner.calls == 5
+
+
+def test_pool_fails_fast_when_every_member_is_open():
+    members = [PoolMember("a", ScriptedRouter([0.0], fail=True))]
+    pool = RouterPool(members, eject_after_errors=1, eject_seconds=60)
+
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            await pool.complete({})
+        with pytest.raises(CircuitOpenError) as exc:
+            await pool.complete({})
+        return exc.value
+
+    error = asyncio.run(scenario())
+    assert error.retry_after > 0
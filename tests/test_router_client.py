@@ -0,0 +1,125 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from sheratan_core.router_client import (  # noqa: E402
+    AsyncRouterClient,
+    HttpRouter,
+    RouterClientConfig,
+)
+
+
+def _handler(request: httpx.Request) -> httpx.Response:
+    if request.url.path == "/health":
+        return httpx.Response(200, json={"status": "green"})
+    if request.url.path == "/models":
+        return httpx.Response(200, json=["alpha"])
+    payload = json.loads(request.content)
+    timeout = request.extensions["timeout"]["read"]
+    return httpx.Response(
+        200,
+        json={"model": payload.get("model", "default"), "output": payload["prompt"], "usage": {"timeout": timeout}},
+    )
+
+
+def _client() -> AsyncRouterClient:
+    config = RouterClientConfig(base_url="http://router.test", timeout_s=5.0)
+    client = AsyncRouterClient(config=config)
+    client._client = httpx.AsyncClient(
+        base_url=config.base_url, transport=httpx.MockTransport(_handler), timeout=config.timeout_s
+    )
+    return client
+
+
+def test_async_client_reuses_pool_and_honours_call_timeout():
+    async def scenario():
+        client = _client()
+        pool = client.client
+        first = await client.complete("hi", model="alpha")
+        second = await client.complete("again", timeout_s=0.5)
+        assert client.client is pool
+        await client.aclose()
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first == {"model": "alpha", "output": "hi", "usage": {"timeout": 5.0}}
+    assert second["usage"]["timeout"] == 0.5
+
+
+def test_http_router_caches_models_from_health():
+    async def scenario():
+        router = HttpRouter(_client())
+        assert router.models() == []
+        assert await router.health() == {"status": "green"}
+        result = await router.complete({"prompt": "x", "max_tokens": 4})
+        await router.aclose()
+        return router, result
+
+    router, result = asyncio.run(scenario())
+    assert router.models() == ["alpha"]
+    assert result["output"] == "x"
+
+
+def test_http_router_fetches_models_on_first_use():
+    async def scenario():
+        router = HttpRouter(_client())
+        assert router.models() == []
+        for _ in range(5):
+            await asyncio.sleep(0)
+        models = router.models()
+        await router.aclose()
+        return models
+
+    assert asyncio.run(scenario()) == ["alpha"]
+
+
+def test_config_requires_base_url(monkeypatch):
+    monkeypatch.delenv("SHERATAN_ROUTER_BASE", raising=False)
+    with pytest.raises(RuntimeError):
+        RouterClientConfig.from_env()
+
+
+def test_sync_client_delegates_to_the_async_client():
+    from sheratan_core.router_client import RouterClient
+
+    client = RouterClient(config=RouterClientConfig(base_url="http://router.test", timeout_s=5.0))
+    client._async = _client()
+    try:
+        assert client.health() == {"status": "green"}
+        assert client.models() == ["alpha"]
+        assert client.complete("hi", model="alpha", timeout_s=0.5)["usage"]["timeout"] == 0.5
+    finally:
+        client.close()
+    client.close()
+
+
+def test_sync_clients_share_one_loop_and_close_their_pools():
+    import gc
+    import threading
+
+    from sheratan_core.router_client import RouterClient
+
+    config = RouterClientConfig(base_url="http://router.test", timeout_s=5.0)
+    with RouterClient(config=config) as first:
+        first._async = _client()
+        first_pool = first._async.client
+        assert first.health() == {"status": "green"}
+        second = RouterClient(config=config)
+        assert second._loop is first._loop
+    assert first_pool.is_closed and first._async._client is None
+
+    pool = second._async.client
+    del second
+    gc.collect()
+    for _ in range(100):
+        if pool.is_closed:
+            break
+        threading.Event().wait(0.01)
+    assert pool.is_closed
+    assert sum(thread.name == "router-client" for thread in threading.enumerate()) == 1
@@ -10,6 +10,7 @@ from fastapi import HTTPException
 sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
 
 from sheratan_core import api
+from sheratan_core.registry import RouterManager
 
 
 class StubRouter:
@@ -37,9 +38,13 @@ class StubRouter:
         yield {"chunk": 0}
 
 
+def _manager_for(router):
+    return RouterManager(loader=lambda spec: router, spec_provider=lambda: "stub:create")
+
+
 def test_router_health_endpoint(monkeypatch):
     stub = StubRouter()
-    monkeypatch.setattr(api, "load_router", lambda: stub)
+    monkeypatch.setattr(api, "router_manager", _manager_for(stub))
 
     payload = asyncio.run(api.router_health())
 
@@ -50,7 +55,7 @@ def test_router_health_endpoint(monkeypatch):
 
 def test_router_models_endpoint(monkeypatch):
     stub = StubRouter()
-    monkeypatch.setattr(api, "load_router", lambda: stub)
+    monkeypatch.setattr(api, "router_manager", _manager_for(stub))
 
     payload = asyncio.run(api.router_models())
 
@@ -60,7 +65,7 @@ def test_router_models_endpoint(monkeypatch):
 
 
 def test_router_endpoints_without_router(monkeypatch):
-    monkeypatch.setattr(api, "load_router", lambda: None)
+    monkeypatch.setattr(api, "router_manager", _manager_for(None))
 
     with pytest.raises(HTTPException) as health_exc:
         asyncio.run(api.router_health())
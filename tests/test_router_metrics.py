@@ -0,0 +1,113 @@
+import asyncio
+import sys
+from pathlib import Path
+
+from prometheus_client import REGISTRY
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from sheratan_core.batching import supports_batch  # noqa: E402
+from sheratan_core.metrics import buckets_from_env  # noqa: E402
+from sheratan_core.pool import PoolMember, RouterPool  # noqa: E402
+from sheratan_core.router_metrics import (  # noqa: E402
+    InstrumentedBatchRouter,
+    InstrumentedRouter,
+    instrument_router,
+)
+
+
+class UsageRouter:
+    def __init__(self, label: str) -> None:
+        self.label = label
+
+    def name(self) -> str:
+        return self.label
+
+    async def health(self) -> dict:
+        return {"ok": True}
+
+    def models(self):
+        return ["m1"]
+
+    def metadata(self):
+        return {}
+
+    async def complete(self, req):
+        await asyncio.sleep(0.01)
+        return {"model": req["model"], "output": "ok", "usage": {"prompt_tokens": 7, "completion_tokens": 20}}
+
+    async def stream(self, req):
+        await asyncio.sleep(0.01)
+        yield {"delta": "a"}
+        yield {"delta": "b", "usage": {"input_tokens": 3, "output_tokens": 2}}
+        yield {"delta": "", "usage": {"input_tokens": 3, "output_tokens": 5}}
+
+
+class BatchUsageRouter(UsageRouter):
+    async def complete_batch(self, reqs):
+        return [await self.complete(req) for req in reqs]
+
+
+def _sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_complete_records_latency_and_tokens():
+    router = instrument_router(UsageRouter("metrics-complete"))
+    assert isinstance(router, InstrumentedRouter) and not supports_batch(router)
+
+    result = asyncio.run(router.complete({"model": "m1", "prompt": "hi"}))
+    assert result["output"] == "ok"
+    labels = {"router": "metrics-complete", "model": "m1"}
+    assert _sample("sheratan_router_request_duration_seconds_count", operation="complete", **labels) == 1
+    assert _sample("sheratan_router_request_duration_seconds_sum", operation="complete", **labels) >= 0.01
+    assert _sample("sheratan_router_prompt_tokens_total", **labels) == 7
+    assert _sample("sheratan_router_completion_tokens_total", **labels) == 20
+    assert _sample("sheratan_router_completion_tokens_per_second_count", **labels) == 1
+    assert _sample("sheratan_router_completion_tokens_per_second_sum", **labels) <= 2000
+
+
+def test_stream_records_ttfc_and_final_usage():
+    router = instrument_router(UsageRouter("metrics-stream"))
+
+    async def consume():
+        return [chunk async for chunk in router.stream({"model": "m1"})]
+
+    assert len(asyncio.run(consume())) == 3
+    labels = {"router": "metrics-stream", "model": "m1"}
+    assert _sample("sheratan_router_stream_ttfc_seconds_count", **labels) == 1
+    assert _sample("sheratan_router_stream_ttfc_seconds_sum", **labels) >= 0.01
+    assert _sample("sheratan_router_request_duration_seconds_count", operation="stream", **labels) == 1
+    assert _sample("sheratan_router_prompt_tokens_total", **labels) == 3
+    assert _sample("sheratan_router_completion_tokens_total", **labels) == 5
+
+
+def test_batch_routers_keep_complete_batch_and_models_are_capped():
+    router = InstrumentedBatchRouter(BatchUsageRouter("metrics-batch"), max_models=1)
+    assert supports_batch(instrument_router(BatchUsageRouter("metrics-batch-2")))
+
+    asyncio.run(router.complete_batch([{"model": "m1"}, {"model": "m1"}]))
+    asyncio.run(router.complete({"model": "m2"}))
+    asyncio.run(router.complete({"model": "m3"}))
+
+    assert _sample(
+        "sheratan_router_request_duration_seconds_count", router="metrics-batch", model="m1", operation="complete_batch"
+    ) == 1
+    assert _sample("sheratan_router_completion_tokens_total", router="metrics-batch", model="m1") == 40
+    assert _sample("sheratan_router_completion_tokens_total", router="metrics-batch", model="__other__") == 40
+    assert _sample("sheratan_router_completion_tokens_total", router="metrics-batch", model="m2") == 0
+
+
+def test_pools_are_not_instrumented_twice():
+    pool = RouterPool([PoolMember("a", instrument_router(UsageRouter("metrics-member")))])
+    assert instrument_router(pool) is pool
+
+    asyncio.run(pool.complete({"model": "m1"}))
+    assert _sample("sheratan_router_completion_tokens_total", router="metrics-member", model="m1") == 20
+
+
+def test_buckets_from_env(monkeypatch):
+    monkeypatch.setenv("SHERATAN_TEST_BUCKETS", "5, 0.5,1")
+    assert buckets_from_env("SHERATAN_TEST_BUCKETS", (1.0,)) == (0.5, 1.0, 5.0)
+    monkeypatch.setenv("SHERATAN_TEST_BUCKETS", "fast")
+    assert buckets_from_env("SHERATAN_TEST_BUCKETS", (1.0,)) == (1.0,)
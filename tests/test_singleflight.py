@@ -0,0 +1,90 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from sheratan_core.singleflight import SingleFlight  # noqa: E402
+
+
+def test_concurrent_identical_calls_share_one_upstream_call():
+    flights: SingleFlight[str] = SingleFlight()
+    calls = 0
+
+    async def upstream() -> str:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "shared"
+
+    async def scenario():
+        return await asyncio.gather(*(flights.do("k", upstream) for _ in range(10)))
+
+    results = asyncio.run(scenario())
+    assert results == ["shared"] * 10
+    assert calls == 1
+    assert len(flights) == 0
+
+
+def test_errors_propagate_to_every_waiter():
+    flights: SingleFlight[str] = SingleFlight()
+
+    async def upstream() -> str:
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    async def scenario():
+        return await asyncio.gather(
+            *(flights.do("k", upstream) for _ in range(3)), return_exceptions=True
+        )
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_cancelled_waiter_does_not_cancel_shared_call():
+    flights: SingleFlight[str] = SingleFlight()
+    started = 0
+
+    async def upstream() -> str:
+        nonlocal started
+        started += 1
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def scenario():
+        leaving = asyncio.create_task(flights.do("k", upstream))
+        staying = asyncio.create_task(flights.do("k", upstream))
+        await asyncio.sleep(0.01)
+        leaving.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leaving
+        return await staying
+
+    assert asyncio.run(scenario()) == "done"
+    assert started == 1
+
+
+def test_shared_call_is_cancelled_when_last_waiter_leaves():
+    flights: SingleFlight[str] = SingleFlight()
+
+    async def scenario():
+        observed = asyncio.Event()
+
+        async def upstream() -> str:
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                observed.set()
+                raise
+            return "never"
+
+        waiter = asyncio.create_task(flights.do("k", upstream))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.wait_for(observed.wait(), timeout=1)
+        assert len(flights) == 0
+
+    asyncio.run(scenario())
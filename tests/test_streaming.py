@@ -0,0 +1,139 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from sheratan_core import api  # noqa: E402
+from sheratan_core.admission import AdmissionController  # noqa: E402
+from sheratan_core.registry import RouterManager  # noqa: E402
+from sheratan_core.schemas import CompleteRequest  # noqa: E402
+from sheratan_core.streaming import ENCODERS, relay_stream  # noqa: E402
+
+
+class CountingSource:
+    def __init__(self, total: int) -> None:
+        self.total = total
+        self.produced = 0
+        self.closed = False
+
+    async def __aiter__(self):
+        try:
+            for i in range(self.total):
+                self.produced += 1
+                yield {"delta": str(i)}
+        finally:
+            self.closed = True
+
+
+class StreamingRouter:
+    def name(self) -> str:
+        return "streaming"
+
+    async def stream(self, req: Dict[str, Any]):
+        for token in ("Sher", "atan"):
+            yield {"delta": token}
+
+
+class EndlessRouter:
+    def name(self) -> str:
+        return "endless"
+
+    async def stream(self, req: Dict[str, Any]):
+        while True:
+            yield {"delta": "x"}
+            await asyncio.sleep(0.01)
+
+
+def test_stream_endpoint_emits_sse_frames(monkeypatch):
+    manager = RouterManager(loader=lambda spec: StreamingRouter(), spec_provider=lambda: "s:create")
+    monkeypatch.setattr(api, "router_manager", manager)
+
+    async def scenario() -> List[bytes]:
+        response = await api.llm_stream(CompleteRequest(prompt="hi"), fmt="sse")
+        assert response.media_type == "text/event-stream"
+        return [frame async for frame in response.body_iterator]
+
+    frames = asyncio.run(scenario())
+    assert frames[0] == b'data: {"delta":"Sher"}\n\n'
+    assert frames[-1] == b"event: done\ndata: {}\n\n"
+
+
+def test_relay_stream_applies_backpressure_and_cancels_on_disconnect():
+    source = CountingSource(total=1_000)
+
+    async def scenario() -> None:
+        stream = relay_stream(source.__aiter__(), ENCODERS["ndjson"], buffer_size=4)
+        first = await stream.__anext__()
+        assert json.loads(first) == {"delta": "0"}
+        # Slow client: give the producer time to run ahead.
+        await asyncio.sleep(0.05)
+        assert source.produced <= 4 + 2
+        # Client disconnects.
+        await stream.aclose()
+
+    asyncio.run(scenario())
+    assert source.closed is True
+    assert source.produced < 1_000
+
+
+def test_relay_stream_reports_router_errors():
+    async def failing():
+        yield {"delta": "a"}
+        raise RuntimeError("boom")
+
+    async def scenario() -> List[bytes]:
+        return [frame async for frame in relay_stream(failing(), ENCODERS["sse"])]
+
+    frames = asyncio.run(scenario())
+    assert frames[-1] == b'event: error\ndata: {"detail":"Router error: boom"}\n\n'
+
+
+def test_stream_endpoint_releases_admission_on_client_disconnect(monkeypatch):
+    manager = RouterManager(loader=lambda spec: EndlessRouter(), spec_provider=lambda: "s:create")
+    controller = AdmissionController(max_concurrency=1)
+    monkeypatch.setattr(api, "router_manager", manager)
+    monkeypatch.setattr(api, "admission", controller)
+
+    async def scenario() -> None:
+        got_frame = asyncio.Event()
+        sent: List[Dict[str, Any]] = []
+        request_sent = False
+
+        async def receive() -> Dict[str, Any]:
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": b'{"prompt":"hi"}', "more_body": False}
+            await got_frame.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message: Dict[str, Any]) -> None:
+            sent.append(message)
+            if message["type"] == "http.response.body" and message.get("body"):
+                assert controller.active == 1
+                got_frame.set()
+                # Slow client: the body stays parked at its yield until the disconnect.
+                await asyncio.Event().wait()
+
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "POST",
+            "scheme": "http",
+            "path": "/api/v1/llm/stream",
+            "raw_path": b"/api/v1/llm/stream",
+            "query_string": b"format=ndjson",
+            "root_path": "",
+            "headers": [(b"content-type", b"application/json")],
+            "client": ("test", 1),
+            "server": ("test", 80),
+        }
+        await asyncio.wait_for(api.app(scope, receive, send), timeout=5)
+        assert sent[0]["status"] == 200
+        assert controller.active == 0
+
+    asyncio.run(scenario())